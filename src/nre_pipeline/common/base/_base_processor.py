@@ -2,9 +2,22 @@ from multiprocessing import Process
 import multiprocessing
 import os
 import queue
+import signal
 import threading
+import time
 from abc import abstractmethod
-from typing import Any, Dict, Generator, List, Self, Tuple, cast
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Self,
+    Tuple,
+    TypeVar,
+    cast,
+)
 from loguru import logger
 from nre_pipeline.app.verbose_mixin import VerboseMixin
 from nre_pipeline.common.base._component_base import _BaseProcess
@@ -12,8 +25,17 @@ from nre_pipeline.common.base._consts import (
     QUEUE_EMPTY,
     TQueueEmpty,
 )
+from nre_pipeline.manifest import QuarantineLog, get_quarantine_path
 from nre_pipeline.models._nlp_result import NLPResultItem
+from nre_pipeline.models._nlp_result_batch import NLPResultBatch
 from nre_pipeline.models._batch import DocumentBatch
+from nre_pipeline.models._shared_batch import SharedDocumentBatch
+from nre_pipeline.queues import (
+    NativeQueueTransport,
+    ShardedQueue,
+    create_queue,
+    get_queue_transport,
+)
 
 import queue, threading
 
@@ -120,17 +142,103 @@ import queue, threading
 #             logger.error(f"Error draining queue: {e}")
 
 
+T = TypeVar("T")
+
+# Metadata flag of a document whose worker hung on it; it is not processed again
+QUARANTINED = "quarantined"
+
+
+class DocumentTimeoutError(BaseException):
+    """Raised in a worker when a document runs past the time limit.
+
+    A BaseException, like KeyboardInterrupt, so the ``except Exception`` that
+    processors wrap around each document does not swallow it.
+    """
+
+
+def _call_with_time_limit(seconds: float, func: Callable[[], T]) -> T:
+    """Call ``func`` and raise DocumentTimeoutError if it runs past ``seconds``.
+
+    Uses SIGALRM, so it only applies in the main thread of a process. The
+    signal is handled between Python bytecodes; a C call that never returns
+    to the interpreter is left to :meth:`Processor.supervise`. An alarm that
+    arrives once ``func`` has returned is ignored, so a document finished
+    right at the limit keeps its results.
+    """
+    if seconds <= 0 or threading.current_thread() is not threading.main_thread():
+        return func()
+
+    result: List[T] = []
+
+    def _on_alarm(signum, frame):
+        if not result:
+            raise DocumentTimeoutError()
+
+    previous_handler = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        result.append(func())
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+    return result[0]
+
+
 class Processor(_BaseProcess, VerboseMixin):
+    """
+    Base class of the processes that turn document batches into results.
+
+    With a per-document time limit (``document_timeout``) the processor is
+    called one document at a time. A document that runs past the limit is
+    interrupted, recorded in the quarantine file with its note id, size and
+    elapsed time, and skipped; the worker goes on with the rest of the batch.
+    Processors must tolerate being interrupted mid-document.
+
+    A worker stuck in code the time limit cannot interrupt is found by
+    :meth:`supervise`, which the parent runs instead of joining the workers:
+    once a document has run for ``hang_timeout``, the worker is terminated,
+    the document is quarantined, and a replacement worker processes the rest
+    of the batch. The results of a batch are held until all its documents
+    are done, so none of the terminated worker's results reach the writer,
+    and native outqueues are SynchronousPutQueue objects, which a worker
+    terminated while on a document cannot leave locked or with results
+    unsent.
+    Each worker reports its current document in a shared array and publishes
+    the SharedDocumentBatch handle of its batch. Only batches read with
+    ``shared_memory_batches`` can be handed to the replacement; of a batch
+    that came through the queue only the note ids are published, and its
+    other notes are left unwritten and uncompleted for a resumed run.
+
+    Args:
+        document_timeout (float | None, optional): Seconds per document, 0 for
+            no limit. Defaults to the DOCUMENT_TIMEOUT_SECONDS environment
+            variable.
+        hang_timeout (float | None, optional): Seconds after which a worker
+            still on one document is replaced. Defaults to the
+            DOCUMENT_HANG_SECONDS environment variable, or twice the time
+            limit.
+        quarantine_path (str | None, optional): The quarantine file. Defaults
+            to the QUARANTINE_PATH environment variable.
+    """
 
     def __init__(
         self,
         processor_id: int,
         total_documents_processed,
         inqueue: queue.Queue[DocumentBatch | TQueueEmpty],
-        outqueue: queue.Queue[NLPResultItem | TQueueEmpty],
+        outqueue: queue.Queue[NLPResultBatch | TQueueEmpty] | ShardedQueue,
         process_counter,
         processor_lock,
         inqueue_empty_sentinel,
+        result_batch_size: int | None = None,
+        num_readers: int = 1,
+        sentinels_received=None,
+        document_timeout: float | None = None,
+        hang_timeout: float | None = None,
+        quarantine_path: str | None = None,
+        heartbeat=None,
+        in_flight=None,
+        recovered_batch: SharedDocumentBatch | None = None,
         **config,
     ) -> None:
         self._process_name = f"{self.__class__.__name__}-{processor_id}"
@@ -141,10 +249,30 @@ class Processor(_BaseProcess, VerboseMixin):
         self._process_counter = process_counter
         self._processor_index: int = processor_id
         self._inqueue: queue.Queue[DocumentBatch | TQueueEmpty] = inqueue
-        self._outqueue: queue.Queue[NLPResultItem | TQueueEmpty] = outqueue
+        self._outqueue: queue.Queue[NLPResultBatch | TQueueEmpty] | ShardedQueue = (
+            outqueue
+        )
+        self._result_batch_size: int = self._get_result_batch_size(result_batch_size)
         self._total_documents_processed = total_documents_processed
         self._processor_lock = processor_lock
         self._inqueue_empty_sentinel = inqueue_empty_sentinel
+        # One QUEUE_EMPTY arrives per reader; the inqueue is done after the last
+        self._num_readers: int = num_readers
+        self._sentinels_received = sentinels_received
+        self._document_timeout: float = self._get_document_timeout(document_timeout)
+        self._hang_timeout: float = self._get_hang_timeout(hang_timeout)
+        self._quarantine: QuarantineLog = QuarantineLog(
+            get_quarantine_path(quarantine_path)
+        )
+        # (start time, index in batch, size) of this worker's document, with a
+        # start time of 0 between documents, and the handle of each worker's
+        # batch, for the supervisor
+        self._heartbeat = heartbeat
+        self._in_flight = in_flight
+        # The batch of the worker this one replaces
+        self._recovered_batch: SharedDocumentBatch | None = recovered_batch
+        # Set by create, to start a replacement
+        self._create_config: Dict[str, Any] | None = None
 
         # Name the current thread using the derived class name and processor index
         threading.current_thread().name = (
@@ -155,11 +283,96 @@ class Processor(_BaseProcess, VerboseMixin):
     def processor_config(self) -> Dict[str, Any]:
         return self._processor_config
 
+    def _get_result_batch_size(self, result_batch_size: int | None = None) -> int:
+        """Get the maximum number of result items per NLPResultBatch.
+
+        Args:
+            result_batch_size (int | None, optional): The desired size. Defaults to
+                the RESULT_BATCH_MAX_ITEMS environment variable.
+
+        Raises:
+            ValueError: If the size is negative.
+
+        Returns:
+            int: The maximum batch size; 0 emits one batch per document batch.
+        """
+        if result_batch_size is None:
+            result_batch_size = int(os.getenv("RESULT_BATCH_MAX_ITEMS", 0) or 0)
+        if result_batch_size < 0:
+            raise ValueError("result_batch_size must be 0 or a positive integer")
+        return result_batch_size
+
+    @staticmethod
+    def _get_document_timeout(document_timeout: float | None = None) -> float:
+        """Get the time limit per document.
+
+        Args:
+            document_timeout (float | None, optional): The desired limit, in
+                seconds. Defaults to the DOCUMENT_TIMEOUT_SECONDS environment
+                variable.
+
+        Raises:
+            ValueError: If the limit is negative.
+
+        Returns:
+            float: The limit; 0 for none.
+        """
+        if document_timeout is None:
+            document_timeout = float(os.getenv("DOCUMENT_TIMEOUT_SECONDS", 0) or 0)
+        if document_timeout < 0:
+            raise ValueError("document_timeout must be 0 or a positive number")
+        return document_timeout
+
+    def _get_hang_timeout(self, hang_timeout: float | None = None) -> float:
+        """Get the time on one document after which a worker is replaced.
+
+        Args:
+            hang_timeout (float | None, optional): The desired time, in seconds.
+                Defaults to the DOCUMENT_HANG_SECONDS environment variable, or
+                twice the time limit per document.
+
+        Raises:
+            ValueError: If the time is negative.
+
+        Returns:
+            float: The time; 0 when there is no time limit per document.
+        """
+        if hang_timeout is None:
+            hang_timeout = float(os.getenv("DOCUMENT_HANG_SECONDS", 0) or 0)
+        if hang_timeout < 0:
+            raise ValueError("hang_timeout must be 0 or a positive number")
+        if not self._document_timeout:
+            return 0.0
+        return hang_timeout or 2 * self._document_timeout
+
     @classmethod
     def create(
         cls, manager, **config
-    ) -> Tuple[List[Self], queue.Queue[NLPResultItem | TQueueEmpty], Any]:
-
+    ) -> Tuple[
+        List[Self], queue.Queue[NLPResultBatch | TQueueEmpty] | ShardedQueue, Any
+    ]:
+        """Create processor processes that share one inqueue and one outqueue.
+
+        With a ``document_timeout``, results on the native queue transport go
+        through SynchronousPutQueue objects, whose ``put`` writes to the pipe
+        in the calling thread, so :meth:`supervise` can terminate a hung
+        worker without losing or blocking results.
+
+        Args:
+            manager: The multiprocessing manager.
+            **config: The processor configuration, with ``num_workers``,
+                ``inqueue`` and ``num_readers`` (see ``CorpusReader.num_readers``)
+                required, and optionally ``queue_transport`` and
+                ``num_writer_shards``.
+
+        Raises:
+            ValueError: If a count or OUTQUEUE_MAX_DOCBATCH_COUNT is invalid.
+            RuntimeError: If no inqueue is given.
+
+        Returns:
+            Tuple[List[Self], queue.Queue | ShardedQueue, Any]: The processors,
+                their outqueue and the shared count of processors still running.
+        """
         num_workers: int = int(config.pop("num_workers", -1))
         if num_workers < 1:
             raise ValueError("num_workers must be a positive integer")
@@ -168,9 +381,15 @@ class Processor(_BaseProcess, VerboseMixin):
         if inqueue is None:
             raise RuntimeError("inqueue must be provided")
 
+        # Readers sharing the inqueue (see CorpusReader.num_readers)
+        num_readers: int = int(config.pop("num_readers", -1))
+        if num_readers < 1:
+            raise ValueError("num_readers must be a positive integer")
+
         process_counter = manager.Value("i", num_workers)
         processor_lock = manager.Lock()
         inqueue_empty_sentinel = manager.Event()
+        sentinels_received = manager.Value("i", 0)
 
         ###############################################################################
         # One outqueue to rule them all...
@@ -179,11 +398,37 @@ class Processor(_BaseProcess, VerboseMixin):
         if outqueue_size < 1:
             raise ValueError("OUTQUEUE_MAX_DOCBATCH_COUNT must be a positive integer")
 
-        outqueue: queue.Queue[NLPResultItem | TQueueEmpty] = manager.Queue(
-            outqueue_size
+        queue_transport = get_queue_transport(
+            manager, config.pop("queue_transport", None)
+        )
+        if cls._get_document_timeout(config.get("document_timeout")) and isinstance(
+            queue_transport, NativeQueueTransport
+        ):
+            # supervise terminates hung workers, which must not leave results
+            # in a feeder thread or the queue locked
+            queue_transport = NativeQueueTransport(
+                manager, queue_transport.context, synchronous_put=True
+            )
+        num_writer_shards: int = _get_number_writer_shards(
+            config.pop("num_writer_shards", None)
         )
+        outqueue: queue.Queue[NLPResultBatch | TQueueEmpty] | ShardedQueue
+        if num_writer_shards == 1:
+            outqueue = create_queue(manager, outqueue_size, queue_transport)
+        else:
+            ###########################################################################
+            # ...unless the results are split across writer shards
+            ###########################################################################
+            outqueue = ShardedQueue(
+                [
+                    create_queue(manager, outqueue_size, queue_transport)
+                    for _ in range(num_writer_shards)
+                ],
+                num_producers=num_workers,
+            )
 
         total_documents_processed = manager.Value("i", 0)
+        in_flight = manager.dict()
         processor_ids: List[int] = list(range(num_workers))
 
         configs = []
@@ -196,16 +441,44 @@ class Processor(_BaseProcess, VerboseMixin):
             new_config["process_counter"] = process_counter
             new_config["processor_lock"] = processor_lock
             new_config["inqueue_empty_sentinel"] = inqueue_empty_sentinel
+            new_config["num_readers"] = num_readers
+            new_config["sentinels_received"] = sentinels_received
+            # Written once per document; a manager round-trip would be too slow
+            new_config["heartbeat"] = multiprocessing.Array("d", 3)
+            new_config["in_flight"] = in_flight
             configs.append(new_config)
 
         processors = []
         for config in configs:
-            processors.append(cls(**config))
+            processor = cls(**config)
+            processor._create_config = config
+            processors.append(processor)
 
         return processors, outqueue, process_counter
 
+    def _on_worker_start(self) -> None:
+        """Hook run in the worker process before it takes its first batch.
+
+        Subclasses load per-process resources here, such as models that
+        cannot be pickled to a spawned worker or that should load in every
+        worker at once rather than one after another in the parent.
+        """
+        return
+
+    def _on_worker_exit(self) -> None:
+        """Hook run in the worker process after its last batch.
+
+        Runs even if the worker failed, before it signals the outqueue.
+        Subclasses report or persist per-process state here.
+        """
+        return
+
     def _runner(self):
         try:
+            self._on_worker_start()
+            if self._recovered_batch is not None:
+                self._handle_document_batch(self._recovered_batch)
+                self._recovered_batch = None
             # Only the first processor should propagate QUEUE_EMPTY to avoid infinite propagation
 
             while not self._inqueue_empty_sentinel.is_set():
@@ -219,12 +492,7 @@ class Processor(_BaseProcess, VerboseMixin):
                     continue
 
                 if isinstance(item, DocumentBatch):
-                    doc_batch: DocumentBatch = cast(DocumentBatch, item)
-                    total_output_count = self.total_docs_processed.get()
-                    for result in self._call_processor(doc_batch):
-                        total_output_count += 1
-                        self._outqueue.put(result)
-                    self.update_total_docs_processed(total_output_count)
+                    self._handle_document_batch(cast(DocumentBatch, item))
                 else:
                     #############################################################################
                     # Check for sentinel value indicating no more items
@@ -232,6 +500,9 @@ class Processor(_BaseProcess, VerboseMixin):
                     # exit this processor
                     #############################################################################
                     with self._processor_lock:
+                        if item == QUEUE_EMPTY and not self._last_reader_finished():
+                            # Other readers are still filling the inqueue
+                            continue
                         if item == QUEUE_EMPTY or self._inqueue_empty_sentinel.is_set():
                             logger.debug(
                                 "Processor count: {}", self._process_counter.get()
@@ -243,6 +514,10 @@ class Processor(_BaseProcess, VerboseMixin):
         except Exception as e:
             logger.error(f"Error in processor loop: {e}")
         finally:
+            try:
+                self._on_worker_exit()
+            except Exception as e:
+                logger.error(f"Error in processor exit hook: {e}")
             with self._processor_lock:
                 self._outqueue.put(QUEUE_EMPTY)
                 if self._process_counter.get() > 0:
@@ -250,6 +525,267 @@ class Processor(_BaseProcess, VerboseMixin):
 
             logger.debug("{} processor exiting...", self.get_process_name())
 
+    def _handle_document_batch(self, doc_batch: DocumentBatch) -> None:
+        try:
+            total_output_count = self._process_document_batch(doc_batch)
+        finally:
+            # Acknowledge the batch (frees shared memory batches)
+            doc_batch.release()
+        self.update_total_docs_processed(total_output_count)
+
+    def _last_reader_finished(self) -> bool:
+        """Count a reader's QUEUE_EMPTY sentinel (under the processor lock).
+
+        Returns:
+            bool: True once every reader's sentinel has been received.
+        """
+        if self._sentinels_received is None:
+            return True
+        received = self._sentinels_received.get() + 1
+        self._sentinels_received.set(received)
+        logger.debug("QUEUE_EMPTY {} of {}", received, self._num_readers)
+        return received >= self._num_readers
+
+    def _process_document_batch(self, doc_batch: DocumentBatch) -> int:
+        """Run the processor over a document batch and emit NLPResultBatch objects.
+
+        ``_call_processor`` may yield NLPResultBatch objects, which are put on
+        the outqueue as-is, or NLPResultItem objects, which are packed into a
+        columnar batch. Packed items are put once per document batch, every
+        ``result_batch_size`` items, or whenever their schema changes.
+
+        The last batch of every document batch is held back and carries the
+        manifest entries of the batch's valid documents, so the writer can
+        mark them completed once it has committed their rows, along with the
+        batch's duplicate references.
+
+        Args:
+            doc_batch (DocumentBatch): The document batch to process.
+
+        Returns:
+            int: The number of result rows emitted.
+        """
+        total_output_count = 0
+        held_batch: NLPResultBatch | None = None
+
+        def _emit(batch: NLPResultBatch) -> None:
+            nonlocal total_output_count, held_batch
+            if len(batch) == 0:
+                return
+            if held_batch is not None:
+                total_output_count += self._put_result_batch(held_batch)
+            held_batch = batch
+
+        result_batch = NLPResultBatch()
+        for result in self._iter_results(doc_batch):
+            if isinstance(result, NLPResultBatch):
+                _emit(result_batch)
+                _emit(result)
+                result_batch = NLPResultBatch()
+                continue
+
+            if not result_batch.accepts(result):
+                _emit(result_batch)
+                result_batch = NLPResultBatch()
+            result_batch.append(result)
+            if self._result_batch_size and len(result_batch) >= self._result_batch_size:
+                _emit(result_batch)
+                result_batch = NLPResultBatch()
+
+        _emit(result_batch)
+        last_batch: NLPResultBatch = held_batch or NLPResultBatch()
+        last_batch.completed.extend(doc_batch.manifest_entries())
+        last_batch.duplicates.extend(doc_batch.duplicates)
+        total_output_count += self._put_result_batch(last_batch)
+        return total_output_count
+
+    def _iter_results(
+        self, doc_batch: DocumentBatch
+    ) -> Iterable[NLPResultItem | NLPResultBatch]:
+        if not self._document_timeout:
+            return self._call_processor(doc_batch)
+        return self._call_processor_per_document(doc_batch)
+
+    def _call_processor_per_document(
+        self, doc_batch: DocumentBatch
+    ) -> List[NLPResultItem | NLPResultBatch]:
+        """Call the processor one document at a time, under the time limit.
+
+        Documents over the limit are quarantined and yield no results. The
+        result batches of the other documents are concatenated, so the writer
+        gets the same batches as without a time limit. The current document
+        is published for :meth:`supervise` while the batch is processed, with
+        the batch's shared memory handle, or only its note ids for a batch
+        that came through the queue.
+
+        Args:
+            doc_batch (DocumentBatch): The document batch to process.
+
+        Returns:
+            List[NLPResultItem | NLPResultBatch]: The results of the batch.
+        """
+        results: List[NLPResultItem | NLPResultBatch] = []
+        if self._in_flight is not None:
+            self._in_flight[self._processor_index] = (
+                doc_batch
+                if isinstance(doc_batch, SharedDocumentBatch)
+                else [document.note_id for document in doc_batch]
+            )
+        try:
+            for index, document in enumerate(doc_batch):
+                if document.metadata.get(QUARANTINED):
+                    continue
+                size = len(document.text)
+                if self._heartbeat is not None:
+                    self._heartbeat[:] = [time.time(), index, size]
+                start = time.perf_counter()
+                try:
+                    document_results = _call_with_time_limit(
+                        self._document_timeout,
+                        lambda: list(self._call_processor(DocumentBatch([document]))),
+                    )
+                except DocumentTimeoutError:
+                    self._quarantine.record(
+                        document.note_id,
+                        size,
+                        time.perf_counter() - start,
+                        "timeout",
+                        self.get_process_name(),
+                    )
+                    continue
+                finally:
+                    if self._heartbeat is not None:
+                        self._heartbeat[0] = 0.0
+                for result in document_results:
+                    last = results[-1] if results else None
+                    # One batch per document batch, as without the time limit
+                    if (
+                        isinstance(result, NLPResultBatch)
+                        and isinstance(last, NLPResultBatch)
+                        and (
+                            not len(result)
+                            or not last.schema
+                            or result.schema == last.schema
+                        )
+                    ):
+                        last.extend(result)
+                    else:
+                        results.append(result)
+        finally:
+            if self._in_flight is not None:
+                self._in_flight.pop(self._processor_index, None)
+        return results
+
+    @classmethod
+    def supervise(
+        cls, processors: List["Processor"], poll_seconds: float = 1.0
+    ) -> List["Processor"]:
+        """Wait for started processors to exit, replacing hung ones.
+
+        Run in the parent instead of joining the processors, and before
+        joining the readers, which may be waiting on a full inqueue behind a
+        hung worker. Without a time limit per document this only joins them.
+
+        Args:
+            processors (List[Processor]): The started processors.
+            poll_seconds (float, optional): Seconds between checks. Defaults to 1.
+
+        Returns:
+            List[Processor]: The processors that ran last, replacements included.
+        """
+        running: List[Processor] = list(processors)
+        while any(p.is_alive() for p in running):
+            for index, processor in enumerate(running):
+                if processor.is_alive() and processor._is_hung():
+                    running[index] = processor._replace()
+            time.sleep(poll_seconds)
+        for processor in running:
+            processor.join()
+        return running
+
+    def _is_hung(self, at: float | None = None) -> bool:
+        if not self._hang_timeout or self._heartbeat is None:
+            return False
+        started_at = self._heartbeat[0]
+        return bool(started_at) and (at or time.time()) - started_at > self._hang_timeout
+
+    def _replace(self) -> "Processor":
+        """Terminate this hung worker and start one for the rest of its batch.
+
+        Raises:
+            RuntimeError: If the processor was not made by :meth:`create`.
+
+        Returns:
+            Processor: The started replacement.
+        """
+        if self._create_config is None:
+            raise RuntimeError("Only processors made by create can be replaced")
+        detected_at = time.time()
+        self.terminate()
+        self.join(5)
+        if self.is_alive():
+            self.kill()
+            self.join()
+
+        # The worker is gone, so what it published can be read at leisure
+        started_at, index, size = self._heartbeat[:]
+        index = int(index)
+        published: SharedDocumentBatch | List[str | int] | None = self._in_flight.pop(
+            self._processor_index, None
+        )
+        recovered_batch: SharedDocumentBatch | None = (
+            published if isinstance(published, SharedDocumentBatch) else None
+        )
+        # Unless it moved on to another document just before it was stopped
+        if published is not None and self._is_hung(detected_at):
+            note_id = (
+                recovered_batch.note_id(index)
+                if recovered_batch is not None
+                else published[index]
+            )
+            elapsed = detected_at - started_at
+            logger.error(
+                "{} was on note {} for {:.0f}s; replaced it",
+                self.get_process_name(),
+                note_id,
+                elapsed,
+            )
+            self._quarantine.record(
+                note_id, int(size), elapsed, "hung", self.get_process_name()
+            )
+            if recovered_batch is not None:
+                # Still completed in the manifest with the batch, but not processed
+                recovered_batch.document_metadata(index)[QUARANTINED] = True
+        if published is not None and recovered_batch is None:
+            # Its texts were only in the worker; a resumed run picks them up
+            logger.error(
+                "The other {} notes of its batch were not written; use shared memory batches to recover them",
+                len(published) - 1,
+            )
+        self._heartbeat[0] = 0.0
+
+        replacement = type(self)(
+            **{**self._create_config, "recovered_batch": recovered_batch}
+        )
+        replacement._create_config = self._create_config
+        replacement.start()
+        return replacement
+
+    def _put_result_batch(self, result_batch: NLPResultBatch) -> int:
+        """Put a result batch with rows, completions or duplicates on the outqueue.
+
+        Returns:
+            int: The number of rows put.
+        """
+        if (
+            len(result_batch) == 0
+            and not result_batch.completed
+            and not result_batch.duplicates
+        ):
+            return 0
+        self._outqueue.put(result_batch)
+        return len(result_batch)
+
     def get_process_name(self):
         return self._process_name
 
@@ -268,11 +804,25 @@ class Processor(_BaseProcess, VerboseMixin):
     @abstractmethod
     def _call_processor(
         self, document_batch: DocumentBatch
-    ) -> Generator[NLPResultItem, Any, None]:
-        """Process a document and return the result."""
+    ) -> Generator[NLPResultItem | NLPResultBatch, Any, None]:
+        """Process a document batch and yield its results.
+
+        Implementations should prefer yielding columnar NLPResultBatch objects
+        (one per document batch, or every ``result_batch_size`` rows); single
+        NLPResultItem objects are still accepted.
+        """
         raise NotImplementedError("Subclasses must implement this method.")
 
 
+def _get_number_writer_shards(num_writer_shards: int | None = None) -> int:
+    if num_writer_shards is None:
+        num_writer_shards = int(os.getenv("NUMBER_WRITER_SHARDS", 1) or 1)
+    if num_writer_shards < 1:
+        raise ValueError("num_writer_shards must be a positive integer")
+    logger.debug("NUMBER_WRITER_SHARDS: {}", num_writer_shards)
+    return num_writer_shards
+
+
 def _get_number_starting_processors():
     NUMBER_STARTING_PROCESSORS = os.getenv("NUMBER_STARTING_PROCESSORS", None)
     if NUMBER_STARTING_PROCESSORS is None or len(NUMBER_STARTING_PROCESSORS) == 0:
@@ -1,18 +1,53 @@
 import os
 import queue
+import secrets
+import zlib
 from abc import abstractmethod
-from typing import Any, Iterator, Optional, Self
+from typing import Any, Dict, Iterator, List, Optional, Self, Tuple
 from nre_pipeline.app.verbose_mixin import VerboseMixin
 from ._component_base import _BaseProcess
 from nre_pipeline.common.base._consts import QUEUE_EMPTY, TProcessingStatus, TQueueEmpty
+from nre_pipeline.manifest import (
+    CompletedNoteIndex,
+    NoteDeduplicator,
+    ProcessedNoteManifest,
+    TDuplicateNote,
+    TTextNormalization,
+    get_dedup_store_path,
+)
+from nre_pipeline.manifest._note_deduplicator import (
+    DEFAULT_MAX_ENTRIES,
+    TEXT_NORMALIZATIONS,
+)
 from nre_pipeline.models import Document
-from nre_pipeline.models._batch import DocumentBatch
+from nre_pipeline.models._batch import DocumentBatch, DocumentBatchBuilder
+from nre_pipeline.models._shared_batch import SharedDocumentBatch, unlink_segment
+from nre_pipeline.queues import create_queue
 from loguru import logger
 
 
 class CorpusReader(_BaseProcess, VerboseMixin):
     """
     Abstract base class for corpus readers that iterate over files.
+
+    Several readers can share one inqueue (see ``create_readers``); each
+    reads the shard ``shard_index`` of ``num_shards`` of the input, as
+    defined by the subclass. Every reader puts its own QUEUE_EMPTY sentinel
+    when it finishes (also on failure) and counts itself down on the shared
+    ``reader_counter``; the processors stop once they have received one
+    sentinel per reader, so pass ``num_readers`` to ``Processor.create``.
+
+    With ``deduplicate`` enabled, notes whose text matches an earlier note
+    are dropped from their batch before it is queued and sent along as
+    references to that note, whose results the writer copies. Each reader
+    keeps its own seen-set, so duplicates read by different readers are
+    processed separately.
+
+    With ``shared_memory_batches`` enabled, readers made by ``create`` name
+    their segments after a run prefix and a counter kept in the reader
+    process, and report the count once when they finish, so the parent can
+    unlink the segments no processor released with ``unlink_shared_batches``
+    once the processors have exited.
     """
 
     def __init__(
@@ -20,12 +55,57 @@ class CorpusReader(_BaseProcess, VerboseMixin):
         inqueue: queue.Queue[DocumentBatch | TQueueEmpty],
         total_read,
         doc_batch_size: int | None = None,
+        max_batch_chars: int | None = None,
+        sort_window: int | None = None,
+        shared_memory_batches: bool | None = None,
+        resume: bool | None = None,
+        manifest_path: str | None = None,
+        shard_index: int | None = None,
+        num_shards: int | None = None,
+        reader_counter=None,
+        reader_lock=None,
+        num_readers: int = 1,
+        deduplicate: bool | None = None,
+        dedup_max_entries: int | None = None,
+        dedup_normalization: TTextNormalization | None = None,
+        dedup_store_path: str | None = None,
+        segment_prefix: str | None = None,
+        segments_created=None,
         **config,
     ) -> None:
 
         self._init_debug_config(config)
         super().__init__()
         self._doc_batch_size: int = self._get_document_batch_size(doc_batch_size)
+        self._max_batch_chars: int | None = self._get_max_batch_chars(max_batch_chars)
+        self._sort_window: int = self._get_sort_window(sort_window)
+        self._shared_memory_batches: bool = self._get_shared_memory_batches(
+            shared_memory_batches
+        )
+        # Segment n is named "<prefix>_<n>"; None for a standalone reader
+        self._segment_prefix: str | None = segment_prefix
+        self._segments_created = segments_created
+        # Counted in the reader process; reported to segments_created at the end
+        self._segment_count: int = 0
+        self._resume: bool = self._get_resume(resume)
+        self._manifest_path: str | None = manifest_path
+        # Loaded in the reader process on first use
+        self._completed_notes: CompletedNoteIndex | None = None
+        self._skipped_completed: int = 0
+        self._num_shards: int = self._get_num_shards(num_shards)
+        self._shard_index: int = self._get_shard_index(shard_index)
+        # Shared by the readers of one inqueue; None for a standalone reader
+        self._reader_counter = reader_counter
+        self._reader_lock = reader_lock
+        self._num_readers: int = num_readers
+        self._deduplicate: bool = self._get_deduplicate(deduplicate)
+        self._dedup_max_entries: int = self._get_dedup_max_entries(dedup_max_entries)
+        self._dedup_normalization: TTextNormalization = self._get_dedup_normalization(
+            dedup_normalization
+        )
+        self._dedup_store_path: str | None = get_dedup_store_path(dedup_store_path)
+        # Created in the reader process on first use
+        self._deduplicator: NoteDeduplicator | None = None
         self._total_documents_read = total_read
         self._inqueue: queue.Queue[DocumentBatch | TQueueEmpty] = inqueue
 
@@ -36,14 +116,60 @@ class CorpusReader(_BaseProcess, VerboseMixin):
 
     @classmethod
     def create(cls, manager, **config) -> Self:
+        readers, _, _ = cls.create_readers(manager, num_readers=1, **config)
+        return readers[0]
+
+    @classmethod
+    def create_readers(
+        cls, manager, num_readers: int | None = None, **config
+    ) -> Tuple[List[Self], queue.Queue[DocumentBatch | TQueueEmpty], Any]:
+        """Create reader processes that share one inqueue.
+
+        With more than one reader, reader ``i`` is given ``shard_index=i`` and
+        ``num_shards=num_readers``, replacing any shard settings in the config.
+        Pass ``num_readers`` of any of the readers to ``Processor.create`` so
+        the processors wait for every reader's QUEUE_EMPTY sentinel.
+
+        Args:
+            manager: The multiprocessing manager.
+            num_readers (int | None, optional): The number of readers. Defaults
+                to the NUMBER_READERS environment variable, then 1.
+            **config: The reader configuration.
+
+        Raises:
+            ValueError: If INQUEUE_MAX_DOCBATCH_COUNT or the reader count is invalid.
+
+        Returns:
+            Tuple[List[Self], queue.Queue, Any]: The readers, their inqueue and
+                the shared count of readers still running.
+        """
+        num_readers = _get_number_readers(num_readers)
         inqueue_size = int(os.getenv("INQUEUE_MAX_DOCBATCH_COUNT", -1))
         if inqueue_size < 1:
             raise ValueError("INQUEUE_MAX_DOCBATCH_COUNT must be at least 1")
-        inqueue: queue.Queue[DocumentBatch | TQueueEmpty] = manager.Queue(inqueue_size)
+        inqueue: queue.Queue[DocumentBatch | TQueueEmpty] = create_queue(
+            manager, inqueue_size, config.pop("queue_transport", None)
+        )
         total_read = manager.Value("i", 0)
-        config["inqueue"] = inqueue
-        config["total_read"] = total_read
-        return cls(**config)
+        reader_counter = manager.Value("i", num_readers)
+        reader_lock = manager.Lock()
+        segment_prefix = f"nre_{secrets.token_hex(4)}"
+
+        readers: List[Self] = []
+        for reader_index in range(num_readers):
+            new_config: Dict[str, Any] = {k: v for k, v in config.items()}
+            new_config["inqueue"] = inqueue
+            new_config["total_read"] = total_read
+            new_config["reader_counter"] = reader_counter
+            new_config["reader_lock"] = reader_lock
+            new_config["num_readers"] = num_readers
+            new_config["segment_prefix"] = f"{segment_prefix}_{reader_index}"
+            new_config["segments_created"] = manager.Value("i", 0)
+            if num_readers > 1:
+                new_config["shard_index"] = reader_index
+                new_config["num_shards"] = num_readers
+            readers.append(cls(**new_config))
+        return readers, inqueue, reader_counter
 
     def _runner(self) -> None:
         """Run the reader process."""
@@ -53,15 +179,32 @@ class CorpusReader(_BaseProcess, VerboseMixin):
 
                 self._debug_log("Starting reader loop")
                 # Iterate through all batches
+                if self._deduplicate:
+                    document_batch = self._drop_duplicates(document_batch)
+                    if len(document_batch) == 0 and not document_batch.duplicates:
+                        continue
 
                 self._place_document_batch_in_queue(document_batch)
 
-            self._mark_all_documents_read()
+            if self._resume:
+                logger.info(
+                    "Skipped {} notes completed by an earlier run",
+                    self._skipped_completed,
+                )
+            if self._deduplicator is not None:
+                logger.info(
+                    "Found {} duplicate notes", self._deduplicator.duplicates_found
+                )
             self._reader_status = "complete"
         except Exception as e:
             logger.error(f"Error occurred in reader loop: {e}")
             self._reader_status = "failure"
         finally:
+            if self._deduplicator is not None:
+                self._deduplicator.close()
+            self._report_segments_created()
+            # Also on failure, so the other readers and the processors can finish
+            self._mark_reader_finished()
             self._debug_log("Reader loop finished")
 
     @property
@@ -77,6 +220,15 @@ class CorpusReader(_BaseProcess, VerboseMixin):
     def inqueue(self) -> queue.Queue[DocumentBatch | TQueueEmpty]:
         return self._inqueue
 
+    @property
+    def num_readers(self) -> int:
+        """Get the number of readers sharing the inqueue.
+
+        Returns:
+            int: The number of QUEUE_EMPTY sentinels the inqueue will receive.
+        """
+        return self._num_readers
+
     @abstractmethod
     def _iter(self) -> Iterator[DocumentBatch]:
         """
@@ -109,6 +261,282 @@ class CorpusReader(_BaseProcess, VerboseMixin):
 
         return document_batch_size
 
+    def _get_max_batch_chars(self, max_batch_chars: int | None = None) -> int | None:
+        """Get the character budget of a document batch.
+
+        Args:
+            max_batch_chars (int | None, optional): The desired budget. Defaults to
+                the DOCUMENT_BATCH_MAX_CHARS environment variable; 0 disables it.
+
+        Raises:
+            ValueError: If the budget is negative.
+
+        Returns:
+            int | None: The budget, or None to cut batches by document count only.
+        """
+        if max_batch_chars is None:
+            max_batch_chars = int(os.getenv("DOCUMENT_BATCH_MAX_CHARS", 0) or 0)
+        if max_batch_chars < 0:
+            raise ValueError("max_batch_chars must not be negative")
+        return max_batch_chars or None
+
+    def _get_sort_window(self, sort_window: int | None = None) -> int:
+        """Get the number of documents sorted by length before batching.
+
+        Args:
+            sort_window (int | None, optional): The desired window. Defaults to
+                the DOCUMENT_BATCH_SORT_WINDOW environment variable; 0 disables it.
+
+        Raises:
+            ValueError: If the window is negative.
+
+        Returns:
+            int: The window size.
+        """
+        if sort_window is None:
+            sort_window = int(os.getenv("DOCUMENT_BATCH_SORT_WINDOW", 0) or 0)
+        if sort_window < 0:
+            raise ValueError("sort_window must not be negative")
+        return sort_window
+
+    def _new_batch_builder(self) -> DocumentBatchBuilder:
+        """Create a batch builder with this reader's batching settings."""
+        return DocumentBatchBuilder(
+            self._doc_batch_size,
+            max_batch_chars=self._max_batch_chars,
+            sort_window=self._sort_window,
+        )
+
+    def _get_shared_memory_batches(self, shared_memory_batches: bool | None) -> bool:
+        """Get whether document batches are packed into shared memory.
+
+        Args:
+            shared_memory_batches (bool | None, optional): The desired setting. Defaults
+                to the SHARED_MEMORY_BATCHES environment variable.
+
+        Returns:
+            bool: True if batches are sent as SharedDocumentBatch handles.
+        """
+        if shared_memory_batches is None:
+            shared_memory_batches = os.getenv(
+                "SHARED_MEMORY_BATCHES", "false"
+            ).lower() in ("true", "1", "yes")
+        if shared_memory_batches and os.name == "nt":
+            logger.warning(
+                "Shared memory batches require POSIX shared memory; sending batches through the queue."
+            )
+            return False
+        return shared_memory_batches
+
+    def _get_resume(self, resume: bool | None = None) -> bool:
+        """Get whether notes already in the processed-note manifest are skipped.
+
+        Args:
+            resume (bool | None, optional): The desired setting. Defaults to the
+                RESUME environment variable.
+
+        Returns:
+            bool: True if completed notes are skipped.
+        """
+        if resume is None:
+            resume = os.getenv("RESUME", "false").lower() in ("true", "1", "yes")
+        return resume
+
+    def _completed_index(self) -> CompletedNoteIndex:
+        """Get the completed notes of earlier runs, loading the manifest on first use."""
+        if self._completed_notes is None:
+            manifest = ProcessedNoteManifest(self._manifest_path)
+            try:
+                self._completed_notes = manifest.load_index()
+            finally:
+                manifest.close()
+        return self._completed_notes
+
+    def _is_completed(
+        self, note_id: str | int, mtime_ns: int | None, size: int | None
+    ) -> bool:
+        """Check whether a note version was completed by an earlier run.
+
+        Always False unless the reader was created with ``resume=True``.
+
+        Args:
+            note_id (str | int): The note id.
+            mtime_ns (int | None): The modification time of the note source.
+            size (int | None): The size of the note source.
+
+        Returns:
+            bool: True if the note should be skipped.
+        """
+        if not self._resume:
+            return False
+        if self._completed_index().contains(note_id, mtime_ns, size):
+            self._skipped_completed += 1
+            return True
+        return False
+
+    def _get_deduplicate(self, deduplicate: bool | None = None) -> bool:
+        """Get whether notes with the text of an earlier note are dropped.
+
+        Args:
+            deduplicate (bool | None, optional): The desired setting. Defaults to
+                the DEDUPLICATE_NOTES environment variable.
+
+        Returns:
+            bool: True if duplicates are sent as references instead of processed.
+        """
+        if deduplicate is None:
+            deduplicate = os.getenv("DEDUPLICATE_NOTES", "false").lower() in (
+                "true",
+                "1",
+                "yes",
+            )
+        return deduplicate
+
+    def _get_dedup_max_entries(self, dedup_max_entries: int | None = None) -> int:
+        """Get the number of note fingerprints the seen-set keeps.
+
+        Args:
+            dedup_max_entries (int | None, optional): The desired size. Defaults
+                to the DEDUP_MAX_ENTRIES environment variable.
+
+        Raises:
+            ValueError: If the size is less than 1.
+
+        Returns:
+            int: The seen-set size.
+        """
+        if dedup_max_entries is None:
+            dedup_max_entries = int(
+                os.getenv("DEDUP_MAX_ENTRIES", DEFAULT_MAX_ENTRIES) or DEFAULT_MAX_ENTRIES
+            )
+        if dedup_max_entries < 1:
+            raise ValueError("dedup_max_entries must be at least 1")
+        return dedup_max_entries
+
+    def _get_dedup_normalization(
+        self, dedup_normalization: TTextNormalization | None = None
+    ) -> TTextNormalization:
+        """Get how note texts are normalized before hashing.
+
+        Args:
+            dedup_normalization (TTextNormalization | None, optional): The desired
+                normalization. Defaults to the DEDUP_NORMALIZATION environment
+                variable, then "exact".
+
+        Raises:
+            ValueError: If the normalization is not supported.
+
+        Returns:
+            TTextNormalization: "exact", "whitespace" or "casefold".
+        """
+        if dedup_normalization is None:
+            dedup_normalization = os.getenv("DEDUP_NORMALIZATION", "exact") or "exact"  # type: ignore[assignment]
+        dedup_normalization = dedup_normalization.lower()  # type: ignore[assignment]
+        if dedup_normalization not in TEXT_NORMALIZATIONS:
+            raise ValueError(
+                f"Unsupported dedup normalization '{dedup_normalization}', expected one of {list(TEXT_NORMALIZATIONS)}"
+            )
+        return dedup_normalization
+
+    def _drop_duplicates(self, document_batch: DocumentBatch) -> DocumentBatch:
+        """Move the notes whose text was seen before into the batch's duplicates.
+
+        Invalid documents are always kept, so their failure is reported.
+
+        Args:
+            document_batch (DocumentBatch): The batch built by ``_iter``.
+
+        Returns:
+            DocumentBatch: The unique documents, carrying the duplicate references.
+        """
+        if self._deduplicator is None:
+            self._deduplicator = NoteDeduplicator(
+                self._dedup_max_entries,
+                self._dedup_normalization,
+                self._dedup_store_path,
+            )
+        documents: List[Document] = []
+        duplicates: List[TDuplicateNote] = list(document_batch.duplicates)
+        for document in document_batch:
+            canonical_note_id = (
+                self._deduplicator.check(document.note_id, document.text)
+                if document.valid
+                else None
+            )
+            if canonical_note_id is None:
+                documents.append(document)
+                continue
+            duplicates.append(
+                (
+                    document.note_id,
+                    canonical_note_id,
+                    document.metadata.get("mtime_ns"),
+                    document.metadata.get("size"),
+                )
+            )
+        if not duplicates:
+            return document_batch
+        return DocumentBatch(documents, duplicates)
+
+    def _get_num_shards(self, num_shards: int | None = None) -> int:
+        """Get the number of shards the input is split into.
+
+        Args:
+            num_shards (int | None, optional): The desired count. Defaults to
+                the READER_NUM_SHARDS environment variable, then 1.
+
+        Raises:
+            ValueError: If the count is less than 1.
+
+        Returns:
+            int: The number of shards.
+        """
+        if num_shards is None:
+            num_shards = int(os.getenv("READER_NUM_SHARDS", 1) or 1)
+        if num_shards < 1:
+            raise ValueError("num_shards must be at least 1")
+        return num_shards
+
+    def _get_shard_index(self, shard_index: int | None = None) -> int:
+        """Get the shard of the input read by this reader.
+
+        Args:
+            shard_index (int | None, optional): The desired shard. Defaults to
+                the READER_SHARD_INDEX environment variable, then 0.
+
+        Raises:
+            ValueError: If the shard is not in ``[0, num_shards)``.
+
+        Returns:
+            int: The shard index.
+        """
+        if shard_index is None:
+            shard_index = int(os.getenv("READER_SHARD_INDEX", 0) or 0)
+        if not 0 <= shard_index < self._num_shards:
+            raise ValueError(
+                f"shard_index must be in [0, {self._num_shards}), got {shard_index}"
+            )
+        return shard_index
+
+    def _in_shard(self, key: str) -> bool:
+        """Check whether a key (e.g. a file path) hashes into this reader's shard.
+
+        The hash is stable across processes and runs, unlike ``hash()``.
+        """
+        if self._num_shards == 1:
+            return True
+        digest = zlib.crc32(key.encode("utf-8", "surrogateescape"))
+        return digest % self._num_shards == self._shard_index
+
+    def _mark_reader_finished(self) -> None:
+        """Count this reader down and put its QUEUE_EMPTY sentinel."""
+        if self._reader_counter is not None:
+            with self._reader_lock:
+                remaining = self._reader_counter.get() - 1
+                self._reader_counter.set(remaining)
+            logger.debug("{} reader(s) still running", remaining)
+        self._mark_all_documents_read()
+
     def _mark_all_documents_read(self) -> None:
         """Mark all documents as read by placing a QUEUE_EMPTY signal in the queue."""
         self._inqueue.put(QUEUE_EMPTY)
@@ -119,9 +547,55 @@ class CorpusReader(_BaseProcess, VerboseMixin):
         Args:
             document_batch (DocumentBatch): The document batch to place in the queue.
         """
+        if self._shared_memory_batches:
+            document_batch = SharedDocumentBatch.from_batch(
+                document_batch, self._next_segment_name()
+            )
         self._inqueue.put(document_batch)
-        new_total = len(document_batch) + self._total_documents_read.get()
-        self._total_documents_read.value = new_total
+        if self._reader_lock is None:
+            new_total = len(document_batch) + self._total_documents_read.get()
+            self._total_documents_read.value = new_total
+            return
+        # Several readers may add to the total at once
+        with self._reader_lock:
+            new_total = len(document_batch) + self._total_documents_read.get()
+            self._total_documents_read.value = new_total
+
+    def _next_segment_name(self) -> str | None:
+        if self._segment_prefix is None or self._segments_created is None:
+            return None
+        # Counted before the segment exists, so the parent never misses one
+        index = self._segment_count
+        self._segment_count += 1
+        return f"{self._segment_prefix}_{index}"
+
+    def _report_segments_created(self) -> None:
+        # Before the QUEUE_EMPTY, so the count is set once the processors exit
+        if self._segments_created is not None:
+            self._segments_created.set(self._segment_count)
+
+    def unlink_shared_batches(self) -> int:
+        """Unlink the shared memory batches of this reader no processor released.
+
+        Call in the parent once the processors have exited. Batches still in
+        the inqueue, or held by a processor that failed or was terminated,
+        would otherwise stay in shared memory until the machine restarts.
+
+        Returns:
+            int: The number of segments unlinked.
+        """
+        if self._segment_prefix is None or self._segments_created is None:
+            return 0
+        unlinked = sum(
+            unlink_segment(f"{self._segment_prefix}_{index}")
+            for index in range(self._segments_created.get())
+        )
+        if unlinked:
+            logger.warning(
+                "Unlinked {} shared memory batches that were never released",
+                unlinked,
+            )
+        return unlinked
 
     @abstractmethod
     def make_doc(self, source: Any) -> Document:
@@ -160,6 +634,15 @@ class CorpusReader(_BaseProcess, VerboseMixin):
             raise ValueError("max_notes_to_read must be an integer")
 
 
+def _get_number_readers(num_readers: int | None = None) -> int:
+    if num_readers is None:
+        num_readers = int(os.getenv("NUMBER_READERS", 1) or 1)
+    if num_readers < 1:
+        raise ValueError("num_readers must be a positive integer")
+    logger.debug("NUMBER_READERS: {}", num_readers)
+    return num_readers
+
+
 #############################################################
 # Limited run code for later
 #############################################################
@@ -205,12 +688,6 @@ class CorpusReader(_BaseProcess, VerboseMixin):
 #     logger.debug("NUMBER_DOCS_TO_READ_BEFORE_YIELD: {}", NUMBER_DOCS_TO_READ_BEFORE_YIELD)
 #     return NUMBER_DOCS_TO_READ_BEFORE_YIELD
 
-#############################################################
-# If there were ever more than one reader process
-#############################################################
-# self._num_processor_workers = config.get("num_processor_workers", 1)
-
-
 #############################################################
 # If needed to resize batches
 #############################################################
@@ -2,19 +2,44 @@ from datetime import datetime
 import os
 from pathlib import Path
 import queue
+import shutil
 from abc import abstractmethod
-from typing import Any, Callable, Dict, List, Union, cast
+from typing import Any, Callable, Dict, List, Self, Sequence, Set, Union, cast
 from loguru import logger
 from nre_pipeline.app.verbose_mixin import VerboseMixin
 from nre_pipeline.common.base._component_base import _BaseProcess
 from nre_pipeline.common.base._consts import QUEUE_EMPTY, TQueueEmpty
+from nre_pipeline.manifest import ProcessedNoteManifest, TDuplicateNote, TManifestEntry
 from nre_pipeline.models._nlp_result import NLPResultItem
+from nre_pipeline.models._nlp_result_batch import NLPResultBatch
+from nre_pipeline.queues import ShardedQueue
 from nre_pipeline.writer import NUMBER_DOCS_TO_WRITE_BEFORE_YIELD
 
 
 class NLPResultWriter(_BaseProcess, VerboseMixin):
     """
     Abstract base class for corpus writers that write to files.
+
+    A writer stops once it has received one QUEUE_EMPTY sentinel from each
+    producer of its outqueue (``expected_sentinels``; ``create`` takes the
+    count from the processors' ``process_counter``).
+
+    Several writers can share a run as shards (see ``create_shards``): each
+    drains its own outqueue shard into ``results_<id>_shard<K>`` and stops
+    once every producer's QUEUE_EMPTY sentinel has arrived. ``merge_shards``
+    combines the shard outputs into a single ``results_<id>`` output.
+
+    With ``update_manifest`` enabled the writer records every completed note
+    in the processed-note manifest once its rows are committed, so a later
+    run can resume with ``resume=True`` on the reader. Subclasses call
+    ``_mark_committed`` whenever the rows recorded so far are durable; notes
+    are marked at least once, never before their rows are written.
+
+    Notes the reader dropped as duplicates arrive as references to their
+    canonical note. Their results usually reach the writer after the
+    canonical rows were written, so once the output is complete
+    ``_copy_results`` copies the canonical rows under each duplicate's note
+    id in a single pass over the output.
     """
 
     def __init__(
@@ -23,12 +48,31 @@ class NLPResultWriter(_BaseProcess, VerboseMixin):
         total_written,
         process_counter,
         output_path: str | None = None,
+        results_id: str | None = None,
+        shard_index: int | None = None,
+        expected_sentinels: int | None = None,
+        total_written_lock=None,
+        update_manifest: bool | None = None,
+        manifest_path: str | None = None,
         **config,
     ):
-        self._outqueue: queue.Queue[NLPResultItem | TQueueEmpty] = outqueue
+        self._outqueue: queue.Queue[NLPResultBatch | TQueueEmpty] = outqueue
         self._total_written = total_written
+        self._total_written_lock = total_written_lock
         self._process_counter = process_counter
+        self._results_id: str = results_id or self._new_results_id()
+        self._shard_index: int | None = shard_index
+        self._expected_sentinels: int = expected_sentinels or 1
         self._output_path: str = self._build_output_path(output_path)
+        self._manifest: ProcessedNoteManifest | None = (
+            ProcessedNoteManifest(manifest_path)
+            if self._get_update_manifest(update_manifest)
+            else None
+        )
+        self._pending_completed: List[TManifestEntry] = []
+        # Note ids marked completed by this run, to vouch for their duplicates
+        self._completed_note_ids: Set[str | int] = set()
+        self._duplicates: List[TDuplicateNote] = []
 
         super().__init__()
 
@@ -55,6 +99,36 @@ class NLPResultWriter(_BaseProcess, VerboseMixin):
     def total_written(self):
         return self._total_written
 
+    def _get_update_manifest(self, update_manifest: bool | None = None) -> bool:
+        """Get whether completed notes are recorded in the processed-note manifest.
+
+        Args:
+            update_manifest (bool | None, optional): The desired setting. Defaults
+                to the PROCESSED_NOTE_MANIFEST environment variable.
+
+        Returns:
+            bool: True if the manifest is updated.
+        """
+        if update_manifest is None:
+            update_manifest = os.getenv("PROCESSED_NOTE_MANIFEST", "false").lower() in (
+                "true",
+                "1",
+                "yes",
+            )
+        return update_manifest
+
+    def _mark_committed(self) -> None:
+        """Record the notes completed by the batches recorded so far.
+
+        Subclasses call this once every recorded row is durable (committed,
+        flushed or closed).
+        """
+        if self._manifest is None or not self._pending_completed:
+            return
+        completed, self._pending_completed = self._pending_completed, []
+        self._manifest.mark_completed(completed)
+        self._completed_note_ids.update(note_id for note_id, _, _ in completed)
+
     def _get_output_path(self, db_path: str | None) -> str:
         _path = db_path or os.getenv("OUTPUT_ROOT_PATH", None)
         if _path is None or os.path.isdir(_path) is False:
@@ -64,34 +138,140 @@ class NLPResultWriter(_BaseProcess, VerboseMixin):
         return cast(str, _path)
 
     def update_total_written(self, current_total_written: int):
-        new_total = self._total_written.get() + current_total_written
-        self._total_written.set(new_total)
+        if self._total_written_lock is None:
+            new_total = self._total_written.get() + current_total_written
+            self._total_written.set(new_total)
+            return
+        with self._total_written_lock:
+            new_total = self._total_written.get() + current_total_written
+            self._total_written.set(new_total)
 
     @classmethod
     def create(cls, manager, **config):
         _outqueue = config.get("outqueue")
         if _outqueue is None:
             raise ValueError("Outqueue must be provided.")
-        outqueue: queue.Queue[NLPResultItem | TQueueEmpty] = cast(
-            queue.Queue[NLPResultItem | TQueueEmpty], _outqueue
+        if isinstance(_outqueue, ShardedQueue):
+            raise ValueError("Use create_shards for a sharded outqueue.")
+        outqueue: queue.Queue[NLPResultBatch | TQueueEmpty] = cast(
+            queue.Queue[NLPResultBatch | TQueueEmpty], _outqueue
         )
         total_written = manager.Value("i", 0)
         config["outqueue"] = outqueue
         config["total_written"] = total_written
         config["process_counter"] = config.get("process_counter")
+        if config.get("expected_sentinels") is None:
+            if config["process_counter"] is None:
+                raise ValueError("process_counter or expected_sentinels must be provided.")
+            # One QUEUE_EMPTY per processor; create the writer before they start
+            config["expected_sentinels"] = config["process_counter"].get()
         config["all_processes_complete_barrier"] = config.get(
             "all_processes_complete_barrier"
         )
         return cls(**config)
 
-    def _get_results_id(self) -> str:
+    @classmethod
+    def create_shards(cls, manager, **config) -> List[Self]:
+        """Create one writer per shard of a ShardedQueue.
+
+        The shards share a results id, so their outputs are named
+        ``results_<id>_shard<K>``, and a total_written counter.
+
+        Args:
+            manager: The multiprocessing manager.
+            **config: The writer configuration; ``outqueue`` must be the
+                ShardedQueue returned by ``Processor.create``.
+
+        Returns:
+            List[Self]: One writer per shard.
+        """
+        outqueue = config.pop("outqueue", None)
+        if not isinstance(outqueue, ShardedQueue):
+            raise ValueError("create_shards requires a ShardedQueue outqueue.")
+        total_written = manager.Value("i", 0)
+        total_written_lock = manager.Lock()
+        results_id: str = config.pop("results_id", None) or cls._new_results_id()
+
+        writers = []
+        for shard_index, shard in enumerate(outqueue.shards):
+            shard_config = {k: v for k, v in config.items()}
+            shard_config["outqueue"] = shard
+            shard_config["total_written"] = total_written
+            shard_config["total_written_lock"] = total_written_lock
+            shard_config["results_id"] = results_id
+            shard_config["shard_index"] = shard_index
+            shard_config["expected_sentinels"] = outqueue.num_producers
+            writers.append(cls(**shard_config))
+        return writers
+
+    @classmethod
+    def merge_shards(
+        cls, writers: Sequence["NLPResultWriter"], remove_shards: bool = True
+    ) -> str:
+        """Merge the outputs of finished shard writers into one output.
+
+        Args:
+            writers (Sequence[NLPResultWriter]): The joined shard writers.
+            remove_shards (bool, optional): Delete the shard outputs after the
+                merge. Defaults to True.
+
+        Returns:
+            str: The path of the merged output.
+        """
+        if not writers:
+            raise ValueError("No shard writers to merge.")
+        shard_paths: List[str] = [
+            writer.output_path
+            for writer in writers
+            if os.path.exists(writer.output_path)
+        ]
+        merged_path: str = writers[0].merged_output_path
+        logger.info("Merging {} shard(s) into {}", len(shard_paths), merged_path)
+        writers[0]._merge_outputs(shard_paths, merged_path)
+        if remove_shards:
+            for shard_path in shard_paths:
+                writers[0]._remove_output(shard_path)
+        return merged_path
+
+    def _merge_outputs(self, shard_paths: List[str], merged_path: str) -> None:
+        """Combine shard outputs into ``merged_path``."""
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not support merging shards."
+        )
+
+    def _remove_output(self, output_path: str) -> None:
+        if os.path.isdir(output_path):
+            shutil.rmtree(output_path)
+        elif os.path.exists(output_path):
+            os.remove(output_path)
+
+    @property
+    def merged_output_path(self) -> str:
+        """The output path of the run without the shard suffix."""
+        shard_index, self._shard_index = self._shard_index, None
+        try:
+            file_name: str = self._build_output_file_name()
+        finally:
+            self._shard_index = shard_index
+        return str(Path(self.output_path).parent / file_name)
+
+    @staticmethod
+    def _new_results_id() -> str:
         return datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
 
+    def _get_results_id(self) -> str:
+        if self._shard_index is None:
+            return self._results_id
+        return f"{self._results_id}_shard{self._shard_index}"
+
     def get_process_name(self) -> str:
-        return f"{self.__class__.__name__}"
+        if self._shard_index is None:
+            return f"{self.__class__.__name__}"
+        return f"{self.__class__.__name__}-shard{self._shard_index}"
 
     def _runner(self):
         queue_empty_set = False
+        sentinels_received = 0
         try:
             write_batch = []
             while True:
@@ -102,41 +282,121 @@ class NLPResultWriter(_BaseProcess, VerboseMixin):
                     queue_empty_set = nlp_result == QUEUE_EMPTY
 
                 except queue.Empty:
-                    if queue_empty_set and self._process_counter.get() == 0:
-                        logger.info("Received QUEUE_EMPTY sentinel")
+                    continue
+
+                if queue_empty_set:
+                    # Other producers may still be sending results, so stop
+                    # only once every producer has finished
+                    sentinels_received += 1
+                    if sentinels_received >= self._expected_sentinels:
+                        logger.info("Received QUEUE_EMPTY from all producers")
                         break
                     continue
 
-                if isinstance(nlp_result, NLPResultItem):
+                if isinstance(nlp_result, NLPResultBatch):
+                    # Processors already grouped the results; record them as-is
+                    if len(nlp_result):
+                        self.record(nlp_result)
+                        self.update_total_written(len(nlp_result))
+                    if self._manifest is not None and nlp_result.completed:
+                        self._pending_completed.extend(nlp_result.completed)
+                    if nlp_result.duplicates:
+                        self._duplicates.extend(nlp_result.duplicates)
+                elif isinstance(nlp_result, NLPResultItem):
                     write_batch.append(nlp_result)
                     if len(write_batch) >= NUMBER_DOCS_TO_WRITE_BEFORE_YIELD:
                         self.record(write_batch)
+                        self.update_total_written(len(write_batch))
                         write_batch = []
 
             if write_batch:
                 self.record(write_batch)
+                self.update_total_written(len(write_batch))
                 write_batch = []
         except Exception as e:
             logger.error(f"Error occurred while recording NLP results: {e}")
             pass
         finally:
             self._on_write_complete()
+            # Everything recorded is on disk once the output is closed
+            self._mark_committed()
+            self._write_duplicate_results()
+            if self._manifest is not None:
+                self._manifest.close()
+
+    def _write_duplicate_results(self) -> None:
+        """Copy the canonical results to every duplicate note received."""
+        if not self._duplicates:
+            return
+        duplicates, self._duplicates = self._duplicates, []
+        copies: Dict[str | int, List[str | int]] = {}
+        for note_id, canonical_note_id, _, _ in duplicates:
+            copies.setdefault(canonical_note_id, []).append(note_id)
+        try:
+            rows_copied: int = self._copy_results(copies)
+        except Exception as e:
+            # The duplicates stay out of the manifest and are tried again on resume
+            logger.error(
+                "Error occurred while copying results to {} duplicate notes: {}",
+                len(duplicates),
+                e,
+            )
+            return
+        self.update_total_written(rows_copied)
+        logger.info(
+            "Copied {} result rows to {} duplicate notes", rows_copied, len(duplicates)
+        )
+        if self._manifest is not None:
+            # A canonical note whose batch failed, or that was completed by an
+            # earlier run, had no rows to copy; resume retries its duplicates
+            completed: List[TManifestEntry] = [
+                (note_id, mtime_ns, size)
+                for note_id, canonical_note_id, mtime_ns, size in duplicates
+                if canonical_note_id in self._completed_note_ids
+            ]
+            if len(completed) < len(duplicates):
+                logger.warning(
+                    "{} duplicate notes left out of the manifest: their canonical note was not completed in this run",
+                    len(duplicates) - len(completed),
+                )
+            self._pending_completed.extend(completed)
+            self._mark_committed()
+
+    def _copy_results(self, copies: Dict[str | int, List[str | int]]) -> int:
+        """Append a copy of each canonical note's rows per duplicate note id.
+
+        Called once the output is complete and closed.
+
+        Args:
+            copies (Dict[str | int, List[str | int]]): The duplicate note ids of
+                each canonical note id.
+
+        Returns:
+            int: The number of rows written.
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not support duplicate notes."
+        )
 
     @abstractmethod
     def _on_write_complete(self):
         raise NotImplementedError("Subclasses must implement _on_write_complete.")
 
-    def record(self, nlp_result: Union[NLPResultItem, List[NLPResultItem]]) -> None:
+    def record(
+        self, nlp_result: Union[NLPResultItem, List[NLPResultItem], NLPResultBatch]
+    ) -> None:
         """
         Write data to the corpus.
 
         Args:
-            nlp_result: The NLPResult to write
+            nlp_result: The NLPResult, list of NLPResults or NLPResultBatch to write
         """
         self._record(nlp_result)
 
     @abstractmethod
-    def _record(self, nlp_result: Union[NLPResultItem, List[NLPResultItem]]) -> None:
+    def _record(
+        self, nlp_result: Union[NLPResultItem, List[NLPResultItem], NLPResultBatch]
+    ) -> None:
         pass
 
     @staticmethod
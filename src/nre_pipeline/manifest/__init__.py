@@ -0,0 +1,31 @@
+from ._note_deduplicator import (
+    NoteDeduplicator,
+    TDuplicateNote,
+    TTextNormalization,
+    get_dedup_store_path,
+    text_fingerprint,
+)
+from ._quarantine import QuarantineLog, TQuarantineReason, get_quarantine_path
+from ._processed_note_manifest import (
+    CompletedNoteIndex,
+    ProcessedNoteManifest,
+    TManifestEntry,
+    get_manifest_path,
+    note_fingerprint,
+)
+
+__all__ = [
+    "CompletedNoteIndex",
+    "NoteDeduplicator",
+    "ProcessedNoteManifest",
+    "QuarantineLog",
+    "TDuplicateNote",
+    "TManifestEntry",
+    "TQuarantineReason",
+    "TTextNormalization",
+    "get_dedup_store_path",
+    "get_manifest_path",
+    "get_quarantine_path",
+    "note_fingerprint",
+    "text_fingerprint",
+]
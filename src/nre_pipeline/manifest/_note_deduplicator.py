@@ -0,0 +1,205 @@
+"""
+Content-hash deduplication of notes before processing.
+
+A reader hashes the (optionally normalized) text of every note and keeps the
+fingerprints it has seen in a bounded LRU map to the first note with that
+text. A later note with a known fingerprint is not sent to the processors;
+it travels with its batch as a ``(note_id, canonical_note_id, mtime_ns,
+size)`` reference and the writer copies the canonical note's result rows
+under the duplicate's note id.
+"""
+
+import os
+import sqlite3
+from collections import OrderedDict
+from hashlib import blake2b
+from pathlib import Path
+from typing import List, Literal, Tuple, TypeAlias
+
+from loguru import logger
+
+TDuplicateNote: TypeAlias = Tuple[str | int, str | int, int | None, int | None]
+TTextNormalization = Literal["exact", "whitespace", "casefold"]
+
+TEXT_NORMALIZATIONS: Tuple[str, ...] = ("exact", "whitespace", "casefold")
+DEFAULT_MAX_ENTRIES = 1_000_000
+# New fingerprints are written to the persisted store this many at a time
+STORE_FLUSH_ROWS = 10000
+
+
+def normalize_text(text: str, normalization: TTextNormalization = "exact") -> str:
+    """Normalize a note text before hashing.
+
+    Args:
+        text (str): The note text.
+        normalization (TTextNormalization, optional): "exact" keeps the text,
+            "whitespace" collapses runs of whitespace and strips the ends,
+            "casefold" also folds case. Defaults to "exact".
+
+    Returns:
+        str: The normalized text.
+    """
+    if normalization == "exact":
+        return text
+    text = " ".join(text.split())
+    if normalization == "casefold":
+        text = text.casefold()
+    return text
+
+
+def text_fingerprint(text: str, normalization: TTextNormalization = "exact") -> bytes:
+    """Get the 128-bit fingerprint of a note text.
+
+    blake2b runs at memory speed in C; at 16 bytes a collision between two
+    different notes is negligible even over billions of notes.
+    """
+    normalized = normalize_text(text, normalization)
+    return blake2b(
+        normalized.encode("utf-8", "surrogatepass"), digest_size=16
+    ).digest()
+
+
+class NoteDeduplicator:
+    """
+    Bounded seen-set of note fingerprints, optionally persisted in SQLite.
+
+    The map keeps the ``max_entries`` most recently seen fingerprints; older
+    ones are evicted, so a duplicate further apart than that in the input is
+    processed again rather than referenced. With ``store_path`` the seen
+    fingerprints are loaded at start and saved as the run goes, so a later
+    run references notes of this one. Every reference is also recorded in
+    the store's ``duplicate_notes`` table: the writer can only copy results
+    written in the same run, so duplicates of an earlier run's notes must be
+    joined to that run's output through this table.
+
+    Args:
+        max_entries (int, optional): Fingerprints kept in memory. Defaults to
+            DEFAULT_MAX_ENTRIES.
+        normalization (TTextNormalization, optional): How texts are normalized
+            before hashing. Defaults to "exact".
+        store_path (str | None, optional): The SQLite database persisting the
+            seen-set. Defaults to None (in memory only).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        normalization: TTextNormalization = "exact",
+        store_path: str | None = None,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if normalization not in TEXT_NORMALIZATIONS:
+            raise ValueError(
+                f"Unsupported text normalization '{normalization}', expected one of {list(TEXT_NORMALIZATIONS)}"
+            )
+        self._max_entries: int = max_entries
+        self._normalization: TTextNormalization = normalization
+        self._seen: OrderedDict[bytes, str | int] = OrderedDict()
+        self._duplicates_found: int = 0
+        self._conn: sqlite3.Connection | None = None
+        self._pending_seen: List[Tuple[bytes, str | int]] = []
+        self._pending_duplicates: List[Tuple[str | int, str | int]] = []
+        if store_path:
+            self._open_store(store_path)
+
+    @property
+    def duplicates_found(self) -> int:
+        return self._duplicates_found
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def _open_store(self, store_path: str) -> None:
+        Path(store_path).parent.mkdir(parents=True, exist_ok=True)
+        # Several readers of one run may share the store
+        self._conn = sqlite3.connect(store_path, timeout=60)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_notes "
+            "(fingerprint BLOB PRIMARY KEY, note_id)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS duplicate_notes "
+            "(note_id PRIMARY KEY, canonical_note_id)"
+        )
+        self._conn.commit()
+        # Most recent entries last, so they are the last to be evicted
+        rows = self._conn.execute(
+            "SELECT fingerprint, note_id FROM seen_notes ORDER BY rowid DESC LIMIT ?",
+            (self._max_entries,),
+        ).fetchall()
+        for fingerprint, note_id in reversed(rows):
+            self._seen[fingerprint] = note_id
+        logger.info("Loaded {} note fingerprints from {}", len(rows), store_path)
+
+    def check(self, note_id: str | int, text: str) -> str | int | None:
+        """Look up a note's text, remembering it if it is new.
+
+        Args:
+            note_id (str | int): The note id.
+            text (str): The note text.
+
+        Returns:
+            str | int | None: The id of the first note with the same text, or
+                None if the text has not been seen.
+        """
+        fingerprint = text_fingerprint(text, self._normalization)
+        canonical_note_id = self._seen.get(fingerprint)
+        if canonical_note_id is not None:
+            self._seen.move_to_end(fingerprint)
+            if canonical_note_id == note_id:
+                # The same note read again (e.g. listed twice); not a duplicate
+                return None
+            self._duplicates_found += 1
+            if self._conn is not None:
+                self._pending_duplicates.append((note_id, canonical_note_id))
+            return canonical_note_id
+
+        self._seen[fingerprint] = note_id
+        if len(self._seen) > self._max_entries:
+            self._seen.popitem(last=False)
+        if self._conn is not None:
+            self._pending_seen.append((fingerprint, note_id))
+            if len(self._pending_seen) >= STORE_FLUSH_ROWS:
+                self.flush()
+        return None
+
+    def flush(self) -> None:
+        """Write the fingerprints and duplicates found since the last flush."""
+        if self._conn is None:
+            return
+        if self._pending_seen:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO seen_notes (fingerprint, note_id) VALUES (?, ?)",
+                self._pending_seen,
+            )
+        if self._pending_duplicates:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO duplicate_notes (note_id, canonical_note_id) VALUES (?, ?)",
+                self._pending_duplicates,
+            )
+        self._conn.commit()
+        self._pending_seen = []
+        self._pending_duplicates = []
+
+    def close(self) -> None:
+        """Flush and close the persisted store, if any."""
+        if self._conn is None:
+            return
+        self.flush()
+        self._conn.close()
+        self._conn = None
+
+
+def get_dedup_store_path(store_path: str | None = None) -> str | None:
+    """Get the path of the persisted seen-set, if any.
+
+    Args:
+        store_path (str | None, optional): The desired path. Defaults to the
+            DEDUP_STORE_PATH environment variable.
+
+    Returns:
+        str | None: The store path, or None to keep the seen-set in memory.
+    """
+    return store_path or os.getenv("DEDUP_STORE_PATH", None) or None
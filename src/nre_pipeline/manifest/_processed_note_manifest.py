@@ -0,0 +1,182 @@
+"""
+Checkpoint manifest of the notes whose results have been committed.
+
+Writers record ``(note_id, mtime_ns, size)`` for every note once its rows
+are durable; a resumed reader loads the manifest into a ``CompletedNoteIndex``
+and skips notes whose file has not changed since.
+"""
+
+import os
+import sqlite3
+from array import array
+from bisect import bisect_left
+from hashlib import blake2b
+from pathlib import Path
+from typing import Iterable, Tuple, TypeAlias
+
+from loguru import logger
+
+TManifestEntry: TypeAlias = Tuple[str | int, int | None, int | None]
+
+MANIFEST_FILE_NAME = "processed_notes.db"
+
+
+def get_manifest_path(manifest_path: str | None = None) -> str:
+    """Get the path of the processed-note manifest database.
+
+    Args:
+        manifest_path (str | None, optional): The desired path. Defaults to the
+            MANIFEST_PATH environment variable, then to
+            ``OUTPUT_ROOT_PATH/manifest/processed_notes.db``.
+
+    Raises:
+        ValueError: If no path can be determined.
+
+    Returns:
+        str: The manifest path.
+    """
+    _path = manifest_path or os.getenv("MANIFEST_PATH", None)
+    if _path:
+        return _path
+    output_root = os.getenv("OUTPUT_ROOT_PATH", None)
+    if output_root is None:
+        raise ValueError(
+            "Manifest path must be provided either as an argument or via the MANIFEST_PATH or OUTPUT_ROOT_PATH environment variables."
+        )
+    return os.path.join(output_root, "manifest", MANIFEST_FILE_NAME)
+
+
+def note_fingerprint(note_id: str | int, mtime_ns: int | None, size: int | None) -> int:
+    """Get the signed 64-bit fingerprint of a note version.
+
+    A note whose file is modified (new mtime or size) gets a new fingerprint
+    and is processed again on resume.
+    """
+    key = f"{note_id}\x00{mtime_ns}\x00{size}".encode("utf-8", "surrogatepass")
+    return int.from_bytes(blake2b(key, digest_size=8).digest(), "little", signed=True)
+
+
+class CompletedNoteIndex:
+    """
+    Exact membership index over note fingerprints.
+
+    The fingerprints are kept in a sorted ``array('q')`` (8 bytes per note,
+    about 80MB for 10M notes, against several hundred MB for a set of ints)
+    and looked up by binary search. Unlike a Bloom filter it has no false
+    positives beyond 64-bit hash collisions, so no note is skipped by mistake.
+    """
+
+    def __init__(self, fingerprints: array) -> None:
+        self._fingerprints: array = array("q", sorted(fingerprints))
+
+    def contains(self, note_id: str | int, mtime_ns: int | None, size: int | None) -> bool:
+        return note_fingerprint(note_id, mtime_ns, size) in self
+
+    def __contains__(self, fingerprint: int) -> bool:
+        index = bisect_left(self._fingerprints, fingerprint)
+        return (
+            index < len(self._fingerprints) and self._fingerprints[index] == fingerprint
+        )
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def __repr__(self) -> str:
+        return f"CompletedNoteIndex(note_count={len(self)})"
+
+
+class ProcessedNoteManifest:
+    """
+    SQLite table of the notes whose results have been committed.
+
+    The connection is opened lazily, so a manifest can be created in the
+    parent and used from the writer or reader process. Several writer shards
+    may update the same manifest.
+
+    Args:
+        manifest_path (str | None, optional): The manifest database path.
+            Defaults to ``get_manifest_path()``.
+    """
+
+    def __init__(self, manifest_path: str | None = None) -> None:
+        self._manifest_path: str = get_manifest_path(manifest_path)
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def manifest_path(self) -> str:
+        return self._manifest_path
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self._manifest_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self._manifest_path, timeout=60)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS processed_notes (
+                    note_id TEXT PRIMARY KEY,
+                    mtime_ns INTEGER,
+                    size INTEGER,
+                    fingerprint INTEGER NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+            self._conn.commit()
+        return self._conn
+
+    def mark_completed(self, entries: Iterable[TManifestEntry]) -> int:
+        """Record notes whose results are committed.
+
+        Args:
+            entries (Iterable[TManifestEntry]): ``(note_id, mtime_ns, size)`` tuples.
+
+        Returns:
+            int: The number of notes recorded.
+        """
+        rows = [
+            (str(note_id), mtime_ns, size, note_fingerprint(note_id, mtime_ns, size))
+            for note_id, mtime_ns, size in entries
+        ]
+        if not rows:
+            return 0
+        conn = self._connect()
+        conn.executemany(
+            "INSERT OR REPLACE INTO processed_notes (note_id, mtime_ns, size, fingerprint) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+        return len(rows)
+
+    def load_index(self) -> CompletedNoteIndex:
+        """Load the fingerprints of every completed note.
+
+        Returns:
+            CompletedNoteIndex: The in-memory lookup index.
+        """
+        fingerprints = array("q")
+        if os.path.exists(self._manifest_path):
+            cursor = self._connect().execute("SELECT fingerprint FROM processed_notes")
+            while True:
+                rows = cursor.fetchmany(100000)
+                if not rows:
+                    break
+                fingerprints.extend(row[0] for row in rows)
+        index = CompletedNoteIndex(fingerprints)
+        logger.info(
+            "Loaded {} completed notes from {}", len(index), self._manifest_path
+        )
+        return index
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_conn"] = None
+        return state
+
+    def __repr__(self) -> str:
+        return f"ProcessedNoteManifest(manifest_path={self._manifest_path})"
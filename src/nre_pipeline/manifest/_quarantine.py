@@ -0,0 +1,100 @@
+"""
+Quarantine of notes that a processor could not finish in time.
+
+A note is quarantined when processing it runs past the per-document time
+limit, or when the worker processing it stops responding and is replaced.
+It produces no results, but it is still completed in the manifest, so a
+resumed run does not stall on it again. The quarantine file lists these
+notes, one JSON object per line, for inspection or a separate run with
+other settings.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Literal
+
+from loguru import logger
+
+TQuarantineReason = Literal["timeout", "hung"]
+
+
+class QuarantineLog:
+    """
+    Append-only JSON lines file of quarantined notes.
+
+    Every record is one ``write`` in append mode, so the processors of a run
+    can share the file. Without a path, quarantined notes are only logged.
+
+    Args:
+        path (str | None, optional): The quarantine file. Defaults to None.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        self._path: str | None = path
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def path(self) -> str | None:
+        return self._path
+
+    def record(
+        self,
+        note_id: str | int,
+        size: int,
+        elapsed_seconds: float,
+        reason: TQuarantineReason,
+        processor: str,
+    ) -> None:
+        """Record a quarantined note.
+
+        Args:
+            note_id (str | int): The note id.
+            size (int): The length of the note text, in characters.
+            elapsed_seconds (float): How long the note was processed.
+            reason (TQuarantineReason): "timeout" if the time limit stopped it,
+                "hung" if its worker was replaced.
+            processor (str): The name of the processor.
+        """
+        logger.warning(
+            "Quarantined note {} ({} chars) after {:.1f}s: {} in {}",
+            note_id,
+            size,
+            elapsed_seconds,
+            reason,
+            processor,
+        )
+        if not self._path:
+            return
+        line = json.dumps(
+            {
+                "note_id": note_id,
+                "size": size,
+                "elapsed_seconds": round(elapsed_seconds, 3),
+                "reason": reason,
+                "processor": processor,
+                "quarantined_at": time.time(),
+            }
+        )
+        with open(self._path, "a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+
+    def __repr__(self) -> str:
+        return f"QuarantineLog(path={self._path!r})"
+
+
+def get_quarantine_path(quarantine_path: str | None = None) -> str | None:
+    """Get the path of the quarantine file, if any.
+
+    Args:
+        quarantine_path (str | None, optional): The desired path. Defaults to
+            the QUARANTINE_PATH environment variable.
+
+    Returns:
+        str | None: The path, or None to only log quarantined notes.
+    """
+    if quarantine_path is None:
+        quarantine_path = os.getenv("QUARANTINE_PATH", None)
+    return quarantine_path or None
@@ -1,4 +1,12 @@
 from ._document import Document
+from ._mapped_document import MappedDocument
 from ._batch import DocumentBatch
+from ._shared_batch import SharedDocumentBatch
 
-__all__ = ["_nlp_result", "Document", "DocumentBatch"]
+__all__ = [
+    "_nlp_result",
+    "Document",
+    "DocumentBatch",
+    "MappedDocument",
+    "SharedDocumentBatch",
+]
@@ -2,17 +2,31 @@ import os
 from pathlib import Path
 import sqlite3
 from typing import Iterator, List, Union
+from nre_pipeline.manifest import TDuplicateNote, TManifestEntry
 from regex import D
 from nre_pipeline.models._document import Document
 from loguru import logger
 
 
 class DocumentBatch:
+    """
+    A group of documents sent through the inqueue with a single put.
+
+    ``duplicates`` lists the ``(note_id, canonical_note_id, mtime_ns, size)``
+    of notes dropped by the reader's deduplication because their text matches
+    an earlier note; they are not processed, and the writer copies the
+    canonical note's results to them.
+    """
 
     # _db_path = os.getenv("BATCH_ID_PATH", None)
 
-    def __init__(self, documents: List[Document]):
+    def __init__(
+        self,
+        documents: List[Document],
+        duplicates: List[TDuplicateNote] | None = None,
+    ):
         self._documents: List[Document] = documents
+        self.duplicates: List[TDuplicateNote] = duplicates or []
     #     self._batch_id: int = self._get_next_id()
     #     is_inmem: bool = self._db_path is None
     #     if is_inmem:
@@ -61,27 +75,130 @@ class DocumentBatch:
             return self._documents[index]
         raise TypeError("Index must be an int or a slice")
 
+    def release(self) -> None:
+        """Acknowledge the batch once processed; in-memory batches hold no resources."""
+        return
+
+    def manifest_entries(self) -> List[TManifestEntry]:
+        """Get the ``(note_id, mtime_ns, size)`` of every valid document.
+
+        Invalid documents (e.g. unreadable files) are left out so a resumed
+        run tries them again.
+        """
+        return [
+            (doc.note_id, doc.metadata.get("mtime_ns"), doc.metadata.get("size"))
+            for doc in self._documents
+            if doc.valid
+        ]
+
     def __repr__(self) -> str:
         # return f"DocumentBatch(batch_id={self._batch_id}, doc_count={len(self._documents)})"
-        return f"DocumentBatch(doc_count={len(self._documents)})"
+        return f"DocumentBatch(doc_count={len(self._documents)}, duplicate_count={len(self.duplicates)})"
 
 
 class DocumentBatchBuilder:
-
-    def __init__(self, batch_size: int) -> None:
+    """
+    Cut a stream of documents into DocumentBatch objects.
+
+    A batch is cut once it holds ``batch_size`` documents or, when
+    ``max_batch_chars`` is set, once adding the next document would push its
+    total text length past the budget (a document longer than the budget
+    gets a batch of its own). Cutting by characters keeps the work per batch,
+    and the memory a batch holds in the queue, roughly constant when note
+    lengths vary widely.
+
+    With ``sort_window`` set, documents are buffered ``sort_window`` at a
+    time and sorted by length before being cut, so each batch holds notes of
+    similar length. Document order within the run is then not preserved.
+
+    Args:
+        batch_size (int): The maximum number of documents per batch.
+        max_batch_chars (int | None, optional): The character budget per batch.
+            Defaults to no budget.
+        sort_window (int, optional): Documents sorted by length together.
+            Defaults to 0 (no sorting).
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        max_batch_chars: int | None = None,
+        sort_window: int = 0,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if max_batch_chars is not None and max_batch_chars < 1:
+            raise ValueError("max_batch_chars must be at least 1")
+        if sort_window < 0:
+            raise ValueError("sort_window must not be negative")
         self._batch_size: int = batch_size
+        self._max_batch_chars: int | None = max_batch_chars
+        self._sort_window: int = sort_window
         self._documents: List[Document] = []
-
-    def add_document(self, document: Document) -> Union[DocumentBatch, None]:
-        self._documents.append(document)
-        if len(self._documents) >= self._batch_size:
-            batch = DocumentBatch(self._documents)
-            self._documents = []
-            return batch
-        return None
+        self._batch_chars: int = 0
+        self._window: List[Document] = []
+
+    def add(self, document: Document) -> List[DocumentBatch]:
+        """Add a document.
+
+        Args:
+            document (Document): The document to add.
+
+        Returns:
+            List[DocumentBatch]: The batches completed by this document, if any.
+        """
+        if self._sort_window:
+            self._window.append(document)
+            if len(self._window) >= self._sort_window:
+                return self._cut_window()
+            return []
+        return self._append(document)
+
+    def flush(self) -> List[DocumentBatch]:
+        """Cut the buffered documents into batches, the last one possibly partial.
+
+        Returns:
+            List[DocumentBatch]: The remaining batches.
+        """
+        batches: List[DocumentBatch] = self._cut_window() if self._window else []
+        if self._documents:
+            batches.append(self._take_batch())
+        return batches
 
     def has_docs(self) -> bool:
-        return len(self._documents) > 0
-
-    def build(self):
-        return DocumentBatch(self._documents)
+        return len(self._documents) > 0 or len(self._window) > 0
+
+    def _cut_window(self) -> List[DocumentBatch]:
+        window, self._window = self._window, []
+        window.sort(key=lambda document: len(document.text))
+        batches: List[DocumentBatch] = []
+        for document in window:
+            batches.extend(self._append(document))
+        # A window never shares a batch with the next one
+        if self._documents:
+            batches.append(self._take_batch())
+        return batches
+
+    def _append(self, document: Document) -> List[DocumentBatch]:
+        batches: List[DocumentBatch] = []
+        chars = len(document.text)
+        if (
+            self._max_batch_chars is not None
+            and self._documents
+            and self._batch_chars + chars > self._max_batch_chars
+        ):
+            batches.append(self._take_batch())
+        self._documents.append(document)
+        self._batch_chars += chars
+        if len(self._documents) >= self._batch_size or (
+            self._max_batch_chars is not None
+            and self._batch_chars >= self._max_batch_chars
+        ):
+            batches.append(self._take_batch())
+        return batches
+
+    def _take_batch(self) -> DocumentBatch:
+        batch = DocumentBatch(self._documents)
+        self._documents = []
+        self._batch_chars = 0
+        return batch
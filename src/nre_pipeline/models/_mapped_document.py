@@ -0,0 +1,70 @@
+import mmap
+from typing import Any, Dict
+
+from nre_pipeline.models._document import Document
+
+TEXT_ENCODING = "utf-8"
+
+
+class MappedDocument(Document):
+    """
+    A Document whose text is a byte range of a memory-mapped file.
+
+    The text is decoded (UTF-8, undecodable bytes dropped) on every access
+    and never cached, so a reader can hold many documents of a large file
+    without holding the decoded file. The mapping stays open as long as a
+    document references it. Pickling (e.g. putting the batch on the inqueue)
+    sends a plain Document with the decoded text, since a mapping cannot
+    cross processes.
+
+    Args:
+        note_id (str | int): The note id.
+        buffer (mmap.mmap): The mapped file.
+        start (int): The first byte of the text.
+        end (int): The byte after the text.
+        valid (bool, optional): Whether the document was read. Defaults to True.
+        metadata (Dict[str, Any] | None, optional): The document metadata.
+    """
+
+    def __init__(
+        self,
+        note_id: str | int,
+        buffer: mmap.mmap,
+        start: int,
+        end: int,
+        valid: bool = True,
+        metadata: Dict[str, Any] | None = None,
+    ) -> None:
+        self.note_id = note_id
+        self.valid = valid
+        self.metadata = metadata if metadata is not None else {}
+        self._buffer: mmap.mmap = buffer
+        self._start: int = start
+        self._end: int = end
+
+    @property
+    def text(self) -> str:  # type: ignore[override]
+        return str(self._buffer[self._start : self._end], TEXT_ENCODING, "ignore")
+
+    @property
+    def buffer(self) -> mmap.mmap:
+        return self._buffer
+
+    @property
+    def start(self) -> int:
+        return self._start
+
+    @property
+    def end(self) -> int:
+        return self._end
+
+    @property
+    def nbytes(self) -> int:
+        return self._end - self._start
+
+    def __reduce__(self):
+        return (Document, (self.note_id, self.text, self.valid, self.metadata))
+
+    def __repr__(self) -> str:
+        # Without the text, which may be the whole file
+        return f"MappedDocument(note_id={self.note_id!r}, start={self._start}, end={self._end}, valid={self.valid})"
@@ -0,0 +1,269 @@
+import numbers
+import sys
+from array import array
+from typing import (
+    Any,
+    Iterable,
+    Iterator,
+    List,
+    MutableSequence,
+    Sequence,
+    Tuple,
+    Type,
+    TypeAlias,
+    Union,
+)
+
+from nre_pipeline.manifest import TDuplicateNote, TManifestEntry
+from nre_pipeline.models._nlp_result import NLPResultItem
+from nre_pipeline.models._nlp_result_item import NLPResultFeature
+
+TResultSchema: TypeAlias = Tuple[Tuple[str, Type], ...]
+TResultRow: TypeAlias = Tuple[Any, ...]
+
+
+def _new_column(value_type: Type) -> MutableSequence[Any]:
+    """Create the column storage for a schema type.
+
+    Integers and floats are packed into ``array`` objects; everything else is
+    held in a list (strings are interned on append).
+    """
+    if value_type is not bool and issubclass(value_type, numbers.Integral):
+        return array("q")
+    if issubclass(value_type, numbers.Real) and value_type is not bool:
+        return array("d")
+    return []
+
+
+def _feature_type(feature: NLPResultFeature) -> Type:
+    return feature.value_type if feature.value_type is not None else type(None)
+
+
+class NLPResultBatch:
+    """
+    A columnar group of NLP results sent through the outqueue with a single put.
+
+    Every row shares one schema (the feature keys and their value types), so
+    a concept hit costs one entry per column instead of an NLPResultItem plus
+    a list of NLPResultFeature objects. Integer columns are stored as
+    ``array('q')``, float columns as ``array('d')`` and string values are
+    interned, which keeps both memory and pickling cost per match low.
+
+    Iterating a batch yields NLPResultItem objects for code that still
+    expects the row-oriented model; writers should use ``rows`` or
+    ``columns`` instead.
+
+    ``completed`` lists the ``(note_id, mtime_ns, size)`` of the notes whose
+    results are all in this or an earlier batch; writers record them in the
+    processed-note manifest once the rows are committed. A batch may carry
+    completions without any rows.
+
+    ``duplicates`` lists the ``(note_id, canonical_note_id, mtime_ns, size)``
+    of notes the reader dropped as duplicates; the writer copies the
+    canonical note's rows to them once writing completes.
+    """
+
+    def __init__(self, schema: TResultSchema | None = None) -> None:
+        self._schema: TResultSchema | None = None
+        self._note_ids: List[str | int] = []
+        self._columns: List[MutableSequence[Any]] = []
+        self.completed: List[TManifestEntry] = []
+        self.duplicates: List[TDuplicateNote] = []
+        if schema is not None:
+            self._set_schema(schema)
+
+    def _set_schema(self, schema: TResultSchema) -> None:
+        self._schema = tuple((key, value_type) for key, value_type in schema)
+        self._columns = [_new_column(value_type) for _, value_type in self._schema]
+
+    @staticmethod
+    def schema_of(item: NLPResultItem) -> TResultSchema:
+        """Get the schema of a row-oriented NLPResultItem.
+
+        Args:
+            item (NLPResultItem): The result item.
+
+        Returns:
+            TResultSchema: The (key, value_type) pairs of its features.
+        """
+        return tuple(
+            (feature.key, _feature_type(feature)) for feature in item.result_features
+        )
+
+    @classmethod
+    def from_items(cls, items: Iterable[NLPResultItem]) -> List["NLPResultBatch"]:
+        """Build columnar batches from NLPResultItem objects.
+
+        Consecutive items sharing a schema go into the same batch.
+
+        Args:
+            items (Iterable[NLPResultItem]): The result items.
+
+        Returns:
+            List[NLPResultBatch]: One batch per run of items sharing a schema.
+        """
+        batches: List[NLPResultBatch] = []
+        current: NLPResultBatch | None = None
+        for item in items:
+            if current is None or not current.accepts(item):
+                current = cls()
+                batches.append(current)
+            current.append(item)
+        return batches
+
+    @property
+    def schema(self) -> TResultSchema:
+        return self._schema or ()
+
+    @property
+    def keys(self) -> Tuple[str, ...]:
+        return tuple(key for key, _ in self.schema)
+
+    @property
+    def note_ids(self) -> Sequence[str | int]:
+        return self._note_ids
+
+    @property
+    def columns(self) -> Sequence[Sequence[Any]]:
+        return self._columns
+
+    def column(self, key: str) -> Sequence[Any]:
+        return self._columns[self.keys.index(key)]
+
+    def accepts(self, item: NLPResultItem) -> bool:
+        """Return True if the item can be appended without changing the schema."""
+        return self._schema is None or self.schema_of(item) == self._schema
+
+    def append_row(self, note_id: str | int, values: Sequence[Any]) -> None:
+        """Append one result row; ``values`` follow the schema order.
+
+        Args:
+            note_id (str | int): The note the result belongs to.
+            values (Sequence[Any]): One value per schema column.
+
+        Raises:
+            ValueError: If the batch has no schema or the row has the wrong width.
+        """
+        if self._schema is None:
+            raise ValueError("NLPResultBatch schema must be set before appending rows")
+        if len(values) != len(self._columns):
+            raise ValueError(
+                f"Expected {len(self._columns)} values for schema {self.keys}, got {len(values)}"
+            )
+        self._note_ids.append(note_id)
+        for index, value in enumerate(values):
+            if type(value) is str:
+                value = sys.intern(value)
+            column = self._columns[index]
+            try:
+                column.append(value)
+            except (TypeError, OverflowError):
+                # e.g. None in a numeric column; fall back to a list column
+                self._columns[index] = column = list(column)
+                column.append(value)
+
+    def append(self, item: NLPResultItem) -> None:
+        """Append a row-oriented NLPResultItem.
+
+        Raises:
+            ValueError: If the item's schema differs from the batch schema.
+        """
+        if self._schema is None:
+            self._set_schema(self.schema_of(item))
+        elif not self.accepts(item):
+            raise ValueError(
+                f"Result item schema {self.schema_of(item)} does not match batch schema {self._schema}"
+            )
+        self.append_row(item.note_id, [feature.value for feature in item.result_features])
+
+    def extend(self, other: "NLPResultBatch") -> None:
+        """Append every row (completion and duplicate) of a batch with the same schema."""
+        self.completed.extend(other.completed)
+        self.duplicates.extend(other.duplicates)
+        if len(other) == 0:
+            return
+        if self._schema is None:
+            self._set_schema(other.schema)
+        elif other.schema != self._schema:
+            raise ValueError(
+                f"Batch schema {other.schema} does not match batch schema {self._schema}"
+            )
+        self._note_ids.extend(other._note_ids)
+        for index, column in enumerate(other._columns):
+            target = self._columns[index]
+            if isinstance(target, array) and not (
+                isinstance(column, array) and column.typecode == target.typecode
+            ):
+                self._columns[index] = target = list(target)
+            target.extend(column)
+
+    def select(self, indices: Sequence[int]) -> "NLPResultBatch":
+        """Build a new batch from the rows at ``indices``, keeping the schema.
+
+        Args:
+            indices (Sequence[int]): The row indices to copy, in order.
+
+        Returns:
+            NLPResultBatch: The selected rows.
+        """
+        batch = NLPResultBatch(self._schema)
+        batch._note_ids = [self._note_ids[i] for i in indices]
+        batch._columns = [
+            (
+                array(column.typecode, [column[i] for i in indices])
+                if isinstance(column, array)
+                else [column[i] for i in indices]
+            )
+            for column in self._columns
+        ]
+        return batch
+
+    def rows(self) -> Iterator[TResultRow]:
+        """Iterate ``(note_id, *values)`` tuples in schema order."""
+        return zip(self._note_ids, *self._columns)
+
+    def _item(self, index: int) -> NLPResultItem:
+        return NLPResultItem(
+            note_id=self._note_ids[index],
+            result_features=[
+                NLPResultFeature(key, self._columns[col][index], value_type)
+                for col, (key, value_type) in enumerate(self.schema)
+            ],
+        )
+
+    def __iter__(self) -> Iterator[NLPResultItem]:
+        return (self._item(i) for i in range(len(self)))
+
+    def __len__(self) -> int:
+        return len(self._note_ids)
+
+    def __getitem__(
+        self, index: int | slice
+    ) -> Union[NLPResultItem, List[NLPResultItem]]:
+        if isinstance(index, slice):
+            return [self._item(i) for i in range(len(self))[index]]
+        if isinstance(index, int):
+            return self._item(range(len(self))[index])
+        raise TypeError("Index must be an int or a slice")
+
+    def __repr__(self) -> str:
+        return f"NLPResultBatch(row_count={len(self)}, keys={self.keys}, completed_count={len(self.completed)}, duplicate_count={len(self.duplicates)})"
+
+
+def as_result_batches(
+    nlp_result: Union[NLPResultItem, List[NLPResultItem], NLPResultBatch],
+) -> List[NLPResultBatch]:
+    """Normalize the values accepted by ``NLPResultWriter.record`` to batches.
+
+    Args:
+        nlp_result: An NLPResultItem, a list of NLPResultItem objects or an
+            NLPResultBatch.
+
+    Returns:
+        List[NLPResultBatch]: The columnar batches to write.
+    """
+    if isinstance(nlp_result, NLPResultBatch):
+        return [nlp_result]
+    if isinstance(nlp_result, NLPResultItem):
+        return NLPResultBatch.from_items([nlp_result])
+    return NLPResultBatch.from_items(nlp_result)
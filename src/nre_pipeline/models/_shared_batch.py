@@ -0,0 +1,200 @@
+from array import array
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Iterator, List, Union
+
+from loguru import logger
+
+from nre_pipeline.manifest import TDuplicateNote, TManifestEntry
+from nre_pipeline.models._batch import DocumentBatch
+from nre_pipeline.models._document import Document
+
+TEXT_ENCODING = "utf-8"
+TEXT_ERRORS = "surrogatepass"
+
+
+class SharedDocumentBatch(DocumentBatch):
+    """
+    A DocumentBatch whose texts live in a ``multiprocessing.shared_memory``
+    segment instead of travelling through the queue.
+
+    The reader packs every ``Document.text`` into one UTF-8 blob plus an
+    offsets array; only the segment name, the offsets, the note ids, the
+    valid flags and the metadata are pickled into the queue. Processors
+    decode each note lazily on access and call ``release`` once the batch has
+    been processed, which unlinks the segment. Segments of batches never
+    released (still queued, or held by a processor that died) are unlinked
+    by ``CorpusReader.unlink_shared_batches`` at shutdown.
+    """
+
+    def __init__(
+        self,
+        shm_name: str,
+        offsets: array,
+        note_ids: List[str | int],
+        valid: List[bool],
+        metadata: List[Dict[str, Any]],
+        duplicates: List[TDuplicateNote] | None = None,
+    ) -> None:
+        self._shm_name: str = shm_name
+        self._offsets: array = offsets
+        self._note_ids: List[str | int] = note_ids
+        self._valid: List[bool] = valid
+        self._metadata: List[Dict[str, Any]] = metadata
+        self.duplicates: List[TDuplicateNote] = duplicates or []
+        self._shm: shared_memory.SharedMemory | None = None
+        self._released: bool = False
+
+    @classmethod
+    def from_batch(
+        cls, document_batch: DocumentBatch, shm_name: str | None = None
+    ) -> "SharedDocumentBatch":
+        """Pack a DocumentBatch into a new shared memory segment.
+
+        Args:
+            document_batch (DocumentBatch): The batch to pack.
+            shm_name (str | None, optional): The segment name. Defaults to a
+                random name.
+
+        Returns:
+            SharedDocumentBatch: The handle to place in the queue.
+        """
+        documents: List[Document] = list(document_batch)
+        encoded: List[bytes] = [
+            doc.text.encode(TEXT_ENCODING, TEXT_ERRORS) for doc in documents
+        ]
+
+        offsets = array("q", [0])
+        total_bytes = 0
+        for blob in encoded:
+            total_bytes += len(blob)
+            offsets.append(total_bytes)
+
+        shm = shared_memory.SharedMemory(
+            name=shm_name, create=True, size=max(total_bytes, 1)
+        )
+        try:
+            for blob, start in zip(encoded, offsets):
+                shm.buf[start : start + len(blob)] = blob
+            # The consuming processor owns the segment from here on; stop the
+            # reader's resource tracker from unlinking it when the reader exits.
+            resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+        except Exception:
+            shm.close()
+            shm.unlink()
+            raise
+        shm.close()
+
+        return cls(
+            shm_name=shm.name,
+            offsets=offsets,
+            note_ids=[doc.note_id for doc in documents],
+            valid=[doc.valid for doc in documents],
+            metadata=[doc.metadata for doc in documents],
+            duplicates=document_batch.duplicates,
+        )
+
+    @property
+    def shm_name(self) -> str:
+        return self._shm_name
+
+    @property
+    def nbytes(self) -> int:
+        return self._offsets[-1]
+
+    def _attach(self) -> shared_memory.SharedMemory:
+        shm = shared_memory.SharedMemory(name=self._shm_name)
+        # Attaching registers the segment with this process's resource
+        # tracker, which would unlink it if the process is terminated; the
+        # batch must survive for the processor that replaces it.
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+        return shm
+
+    def _buffer(self) -> memoryview:
+        if self._released:
+            raise RuntimeError(f"Shared batch {self._shm_name} was already released")
+        if self._shm is None:
+            self._shm = self._attach()
+        return self._shm.buf
+
+    def _document(self, index: int) -> Document:
+        start, end = self._offsets[index], self._offsets[index + 1]
+        text = str(self._buffer()[start:end], TEXT_ENCODING, TEXT_ERRORS)
+        return Document(
+            note_id=self._note_ids[index],
+            text=text,
+            valid=self._valid[index],
+            metadata=self._metadata[index],
+        )
+
+    def note_id(self, index: int) -> str | int:
+        """Get the note id of a document without decoding its text."""
+        return self._note_ids[index]
+
+    def document_metadata(self, index: int) -> Dict[str, Any]:
+        """Get the metadata of a document without decoding its text."""
+        return self._metadata[index]
+
+    def release(self) -> None:
+        """Acknowledge the batch and free its shared memory segment."""
+        if self._released:
+            return
+        try:
+            shm = self._shm or self._attach()
+            shm.close()
+            # unlink() unregisters the segment again; balance _attach
+            resource_tracker.register(shm._name, "shared_memory")  # type: ignore[attr-defined]
+            shm.unlink()
+        except FileNotFoundError:
+            logger.warning("Shared batch {} was already unlinked", self._shm_name)
+        finally:
+            self._shm = None
+            self._released = True
+
+    def manifest_entries(self) -> List[TManifestEntry]:
+        # Read from the pickled fields; the texts are not decoded
+        return [
+            (note_id, metadata.get("mtime_ns"), metadata.get("size"))
+            for note_id, valid, metadata in zip(
+                self._note_ids, self._valid, self._metadata
+            )
+            if valid
+        ]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_shm"] = None
+        return state
+
+    def __iter__(self) -> Iterator[Document]:
+        return (self._document(i) for i in range(len(self)))
+
+    def __len__(self) -> int:
+        return len(self._note_ids)
+
+    def __getitem__(self, index: int | slice) -> Union[Document, List[Document]]:
+        if isinstance(index, slice):
+            return [self._document(i) for i in range(len(self))[index]]
+        if isinstance(index, int):
+            return self._document(range(len(self))[index])
+        raise TypeError("Index must be an int or a slice")
+
+    def __repr__(self) -> str:
+        return f"SharedDocumentBatch(doc_count={len(self)}, nbytes={self.nbytes}, shm={self._shm_name})"
+
+
+def unlink_segment(shm_name: str) -> bool:
+    """Unlink a shared memory segment if it still exists.
+
+    Args:
+        shm_name (str): The segment name.
+
+    Returns:
+        bool: True if the segment existed.
+    """
+    try:
+        shm = shared_memory.SharedMemory(name=shm_name)
+    except FileNotFoundError:
+        return False
+    shm.close()
+    shm.unlink()
+    return True
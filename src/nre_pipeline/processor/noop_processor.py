@@ -4,9 +4,9 @@ from typing import Any, Generator, List
 
 from nre_pipeline.common.base._consts import TQueueEmpty
 from nre_pipeline.models._nlp_result import NLPResultItem
+from nre_pipeline.models._nlp_result_batch import NLPResultBatch, TResultSchema
 from nre_pipeline.models._batch import DocumentBatch
 from nre_pipeline.models._document import Document
-from nre_pipeline.models._nlp_result_item import NLPResultFeature
 from nre_pipeline.common.base._base_processor import Processor
 
 
@@ -25,24 +25,36 @@ class NoOpProcessor(Processor):
     #         processor_id, total_documents_processed, inqueue, outqueue, **config
     #     )
 
+    RESULT_SCHEMA: TResultSchema = (
+        ("first_word", str),
+        ("last_word", str),
+        ("token_count", int),
+        ("the_count", int),
+        ("fraction_of_thes", float),
+    )
+
     def _call_processor(
         self, document_batch: DocumentBatch
-    ) -> Generator[NLPResultItem, Any, None]:
+    ) -> Generator[NLPResultBatch, Any, None]:
         """Return the input document unchanged."""
 
+        result_batch = NLPResultBatch(self.RESULT_SCHEMA)
         doc: Document
         for doc in document_batch:
             tokens: List[str] = doc.text.split()
             the_count = sum(1 for token in tokens if token.lower() == "the")
-            fraction_of_thes = the_count / len(tokens) if len(tokens) > 0 else 0
-            result = NLPResultItem(
-                note_id=doc.note_id,
-                result_features=[
-                    NLPResultFeature(key="first_word", value=doc.text.split()[0]),
-                    NLPResultFeature(key="last_word", value=doc.text.split()[-1]),
-                    NLPResultFeature(key="token_count", value=len(tokens)),
-                    NLPResultFeature(key="the_count", value=the_count),
-                    NLPResultFeature(key="fraction_of_thes", value=fraction_of_thes),
-                ],
+            fraction_of_thes = the_count / len(tokens) if len(tokens) > 0 else 0.0
+            result_batch.append_row(
+                doc.note_id,
+                (
+                    tokens[0] if tokens else "",
+                    tokens[-1] if tokens else "",
+                    len(tokens),
+                    the_count,
+                    fraction_of_thes,
+                ),
             )
-            yield result
+            if self._result_batch_size and len(result_batch) >= self._result_batch_size:
+                yield result_batch
+                result_batch = NLPResultBatch(self.RESULT_SCHEMA)
+        yield result_batch
@@ -0,0 +1,229 @@
+"""
+Per-worker cache of QuickUMLS simstring candidate lookups.
+
+QuickUMLS normalizes every candidate n-gram of a sentence (unidecode and
+lowercasing, per its configuration) and retrieves the UMLS terms within the
+similarity threshold from its simstring database. The same n-grams ("the
+patient", "no acute", ...) recur in nearly every note, so the retrievals are
+cached here by normalized n-gram, in front of the matcher's ``ss_db``.
+"""
+
+import json
+import sqlite3
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Tuple
+
+from loguru import logger
+
+TCandidates = Tuple[str, ...]
+
+DEFAULT_MAX_ENTRIES = 200_000
+
+
+def candidate_namespace(similarity_name: str, threshold: float) -> str:
+    """Get the namespace of the lookups of a matcher configuration.
+
+    Simstring candidates depend on the similarity metric and threshold only.
+    The window and minimum match length decide which n-grams are looked up,
+    not what a lookup returns, so caches of matchers differing in those are
+    interchangeable.
+
+    Args:
+        similarity_name (str): The simstring similarity metric.
+        threshold (float): The similarity threshold.
+
+    Returns:
+        str: The namespace.
+    """
+    return f"{similarity_name}:{float(threshold)!r}"
+
+
+class CandidateCache:
+    """
+    Bounded LRU cache in front of a QuickUMLS simstring reader.
+
+    It replaces the matcher's ``ss_db`` and answers ``get(term)`` from the
+    ``max_entries`` most recently used n-grams, then from the read-only warm
+    cache file, if any, and only then from simstring. Other attributes are
+    those of the wrapped reader.
+
+    The warm cache is a SQLite file written by :meth:`save` in earlier runs.
+    It is opened read-only, so any number of workers and runs can share it,
+    and it is ignored if it was written for another namespace (similarity
+    metric and threshold). It must come from the same QuickUMLS data.
+
+    Args:
+        reader (Any): The simstring reader (``QuickUMLS.ss_db``).
+        namespace (str): The namespace of the lookups, see
+            :func:`candidate_namespace`.
+        max_entries (int, optional): N-grams kept in memory. Defaults to
+            DEFAULT_MAX_ENTRIES.
+        warm_path (str | None, optional): The warm cache file. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        reader: Any,
+        namespace: str,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        warm_path: str | None = None,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self._reader = reader
+        self._namespace: str = namespace
+        self._max_entries: int = max_entries
+        self._entries: OrderedDict[str, TCandidates] = OrderedDict()
+        self._warm: sqlite3.Connection | None = None
+        self.hits: int = 0
+        self.warm_hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        if warm_path and Path(warm_path).exists():
+            self._open_warm(warm_path)
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for attributes not set in __init__
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._reader, name)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _open_warm(self, warm_path: str) -> None:
+        conn = sqlite3.connect(f"file:{warm_path}?mode=ro", uri=True)
+        try:
+            namespace = _read_namespace(conn)
+        except sqlite3.DatabaseError as e:
+            logger.warning("Ignoring the n-gram cache {}: {}", warm_path, e)
+            conn.close()
+            return
+        if namespace != self._namespace:
+            logger.warning(
+                "Ignoring the n-gram cache {}: written for {}, not {}",
+                warm_path,
+                namespace,
+                self._namespace,
+            )
+            conn.close()
+            return
+        self._warm = conn
+
+    def get(self, term: str) -> TCandidates:
+        """Get the simstring candidates of a normalized n-gram.
+
+        Args:
+            term (str): The normalized n-gram.
+
+        Returns:
+            TCandidates: The UMLS terms within the similarity threshold.
+        """
+        candidates = self._entries.get(term)
+        if candidates is not None:
+            self._entries.move_to_end(term)
+            self.hits += 1
+            return candidates
+
+        candidates = self._get_warm(term)
+        if candidates is not None:
+            self.warm_hits += 1
+        else:
+            self.misses += 1
+            candidates = tuple(self._reader.get(term))
+        self._entries[term] = candidates
+        if len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return candidates
+
+    def _get_warm(self, term: str) -> TCandidates | None:
+        if self._warm is None:
+            return None
+        row = self._warm.execute(
+            "SELECT candidates FROM ngram_candidates WHERE ngram = ?", (term,)
+        ).fetchone()
+        return tuple(json.loads(row[0])) if row is not None else None
+
+    def stats(self) -> Dict[str, int]:
+        """Get the lookup counters.
+
+        Returns:
+            Dict[str, int]: The hits, warm_hits, misses and evictions so far,
+                and the number of n-grams held.
+        """
+        return {
+            "hits": self.hits,
+            "warm_hits": self.warm_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+        }
+
+    def save(self, path: str) -> int:
+        """Add the n-grams held in memory to a warm cache file.
+
+        The file is created if needed. Entries already in it are kept, so
+        workers can save to the same file one after another.
+
+        Args:
+            path (str): The warm cache file.
+
+        Returns:
+            int: The number of n-grams offered to the file, or 0 if it belongs
+                to another namespace.
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Every worker saves when it exits
+        conn = sqlite3.connect(path, timeout=600)
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_info (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ngram_candidates "
+                "(ngram TEXT PRIMARY KEY, candidates TEXT)"
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO cache_info (key, value) VALUES ('namespace', ?)",
+                (self._namespace,),
+            )
+            namespace = _read_namespace(conn)
+            if namespace != self._namespace:
+                logger.warning(
+                    "Not saving the n-gram cache to {}: written for {}, not {}",
+                    path,
+                    namespace,
+                    self._namespace,
+                )
+                conn.rollback()
+                return 0
+            conn.executemany(
+                "INSERT OR IGNORE INTO ngram_candidates (ngram, candidates) VALUES (?, ?)",
+                _dump_entries(self._entries.items()),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return len(self._entries)
+
+    def close(self) -> None:
+        """Close the warm cache file, if any."""
+        if self._warm is not None:
+            self._warm.close()
+            self._warm = None
+
+
+def _read_namespace(conn: sqlite3.Connection) -> str | None:
+    row = conn.execute(
+        "SELECT value FROM cache_info WHERE key = 'namespace'"
+    ).fetchone()
+    return row[0] if row is not None else None
+
+
+def _dump_entries(
+    entries: Iterable[Tuple[str, TCandidates]],
+) -> Iterable[Tuple[str, str]]:
+    for term, candidates in entries:
+        yield term, json.dumps(candidates, ensure_ascii=False)
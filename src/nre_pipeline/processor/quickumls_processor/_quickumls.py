@@ -1,17 +1,34 @@
+import gc
+import multiprocessing
 import os
 import sys
+import time
 from pathlib import Path
-from typing import Any, Dict, Generator, List, Literal, Optional, Set, Union
+from typing import Any, Dict, Generator, List, Literal, Optional, Set, Tuple, Union
 
 from loguru import logger
 
 from nre_pipeline.common.base._base_processor import Processor
 from nre_pipeline.models._nlp_result import NLPResultItem
+from nre_pipeline.models._nlp_result_batch import NLPResultBatch, TResultSchema
 from nre_pipeline.models._batch import DocumentBatch
-from nre_pipeline.models._nlp_result_item import NLPResultFeature
 
 from quickumls import QuickUMLS
 
+from nre_pipeline.processor.quickumls_processor._candidate_cache import (
+    DEFAULT_MAX_ENTRIES,
+    CandidateCache,
+    candidate_namespace,
+)
+from nre_pipeline.processor.quickumls_processor._sentence_memo import (
+    DEFAULT_MAX_ENTRIES as DEFAULT_SENTENCE_CACHE_SIZE,
+    SentenceMemo,
+    TMatchGroups,
+)
+from nre_pipeline.processor.quickumls_processor._text_windows import (
+    DEFAULT_OVERLAP_CHARS,
+    match_in_windows,
+)
 from nre_pipeline.processor.quickumls_processor.config.config_loader import (
     get_quickumls_config,
 )
@@ -28,29 +45,395 @@ def _semantic_types_in_config_to_set(
     return set(semantic_types)
 
 
+# Matchers loaded in this process by processors with share_matcher, keyed
+# by QuickUMLS path and configuration
+_SHARED_MATCHERS: Dict[Tuple[str, str], QuickUMLS] = {}
+
+
 class QuickUMLSProcessor(Processor):
+    """
+    Match UMLS concepts in notes with QuickUMLS.
+
+    By default every worker loads its own matcher (simstring and cui/semtype
+    databases, spaCy pipeline and caches) when it starts, so the workers load
+    in parallel and the parent never holds them. Memory still grows with the
+    number of workers.
+
+    With ``share_matcher`` the matcher is loaded once, in the parent, when
+    the first processor is created, and every processor references it. The
+    workers forked from the parent then share its pages copy-on-write. The
+    cyclic garbage collector is paused while the matcher loads and its
+    objects are frozen afterwards (``gc.freeze``), so collections in the
+    workers do not write to, and copy, those pages. Sharing requires the
+    "fork" start method; otherwise each worker loads its own matcher.
+
+    Every worker caches the simstring candidates of the n-grams it looks up
+    (see :class:`CandidateCache`) and logs the hit, miss and eviction counts
+    when it exits. A warm cache file saved by earlier runs answers the
+    n-grams missing from memory; with ``ngram_cache_save`` every worker adds
+    its cached n-grams to that file when it exits.
+
+    With ``sentence_memo`` notes are matched sentence by sentence and the
+    matches of every sentence are cached (see :class:`SentenceMemo`), so
+    boilerplate sentences repeated across notes are matched once per worker.
+    Results can differ slightly from matching whole notes, as no match spans
+    two sentences. The last worker to exit logs the hit rate of the run.
+
+    Texts longer than ``chunk_chars`` (notes, or sentences in sentence mode)
+    are matched in overlapping windows of at most that length, cut at
+    sentence or word boundaries, so spaCy never parses a long OCR document
+    at once. Matches are rebased to the document and those found twice in
+    an overlap are kept once (see :func:`match_in_windows`). The windows of
+    a document run in the worker that took it, since a note is completed
+    in the manifest with its document batch.
+
+    Args:
+        share_matcher (bool | None, optional): Load one matcher in the parent
+            for all workers. Defaults to the QUICKUMLS_SHARE_MATCHER
+            environment variable.
+        ngram_cache_size (int | None, optional): N-grams cached per worker, 0 to
+            disable the cache. Defaults to the QUICKUMLS_NGRAM_CACHE_SIZE
+            environment variable.
+        ngram_cache_path (str | None, optional): The warm cache file. Defaults
+            to the QUICKUMLS_NGRAM_CACHE_PATH environment variable.
+        ngram_cache_save (bool | None, optional): Save the cached n-grams to
+            the warm cache file on exit. Defaults to the
+            QUICKUMLS_NGRAM_CACHE_SAVE environment variable.
+        sentence_memo (bool | None, optional): Match and cache notes sentence
+            by sentence. Defaults to the QUICKUMLS_SENTENCE_MEMO environment
+            variable.
+        sentence_cache_size (int | None, optional): Sentences cached per
+            worker. Defaults to the QUICKUMLS_SENTENCE_CACHE_SIZE environment
+            variable.
+        sentence_memo_counts (Any, optional): The manager dict collecting the
+            hits and misses of all workers; set by :meth:`create`.
+        chunk_chars (int | None, optional): The length above which texts are
+            matched in windows, 0 to match every text whole. Defaults to the
+            QUICKUMLS_CHUNK_CHARS environment variable.
+        chunk_overlap_chars (int | None, optional): The overlap between
+            windows; at least four times the longest match. Defaults to the
+            QUICKUMLS_CHUNK_OVERLAP_CHARS environment variable.
+    """
 
     def __init__(
         self,
         *args,
+        share_matcher: bool | None = None,
+        ngram_cache_size: int | None = None,
+        ngram_cache_path: str | None = None,
+        ngram_cache_save: bool | None = None,
+        sentence_memo: bool | None = None,
+        sentence_cache_size: int | None = None,
+        sentence_memo_counts=None,
+        chunk_chars: int | None = None,
+        chunk_overlap_chars: int | None = None,
         **config,
     ) -> None:
         super().__init__(*args, **config)
-        self._matcher: QuickUMLS = self._create_matcher()
+        self._ngram_cache_size: int = self._get_ngram_cache_size(ngram_cache_size)
+        self._ngram_cache_path: str | None = self._get_ngram_cache_path(
+            ngram_cache_path
+        )
+        self._ngram_cache_save: bool = self._get_ngram_cache_save(ngram_cache_save)
+        self._candidate_cache: CandidateCache | None = None
+        self._sentence_memo_enabled: bool = self._get_sentence_memo(sentence_memo)
+        self._sentence_cache_size: int = self._get_sentence_cache_size(
+            sentence_cache_size
+        )
+        self._sentence_memo_counts = sentence_memo_counts
+        self._sentence_memo: SentenceMemo | None = None
+        self._chunk_chars: int = self._get_chunk_chars(chunk_chars)
+        self._chunk_overlap_chars: int = self._get_chunk_overlap_chars(
+            chunk_overlap_chars
+        )
+        # Validated in the parent so a bad setup fails before any worker starts
+        self._quickumls_path: Path = self._init_quickumls_path()
+        quickumls_config: Dict[str, Any] | None = get_quickumls_config(
+            self.processor_config
+        )
+        if quickumls_config is None:
+            raise ValueError("QuickUMLS configuration could not be loaded.")
+        self._quickumls_config: Dict[str, Any] = quickumls_config
+        self._matcher: QuickUMLS | None = None
+        if self._get_share_matcher(share_matcher):
+            self._matcher = self._shared_matcher()
+
+    def _get_share_matcher(self, share_matcher: bool | None = None) -> bool:
+        """Get whether the workers share one matcher loaded in the parent.
+
+        Args:
+            share_matcher (bool | None, optional): The desired setting. Defaults
+                to the QUICKUMLS_SHARE_MATCHER environment variable.
+
+        Returns:
+            bool: True if the matcher is shared copy-on-write.
+        """
+        if share_matcher is None:
+            share_matcher = os.getenv("QUICKUMLS_SHARE_MATCHER", "false").lower() in (
+                "true",
+                "1",
+                "yes",
+            )
+        if share_matcher and multiprocessing.get_start_method() != "fork":
+            logger.warning(
+                "Sharing the QuickUMLS matcher requires the fork start method; each worker loads its own."
+            )
+            return False
+        return share_matcher
+
+    def _get_ngram_cache_size(self, ngram_cache_size: int | None = None) -> int:
+        """Get the number of n-grams each worker caches.
+
+        Args:
+            ngram_cache_size (int | None, optional): The desired size. Defaults
+                to the QUICKUMLS_NGRAM_CACHE_SIZE environment variable.
+
+        Returns:
+            int: The cache size; 0 disables the cache.
+        """
+        if ngram_cache_size is None:
+            ngram_cache_size = int(
+                os.getenv("QUICKUMLS_NGRAM_CACHE_SIZE", str(DEFAULT_MAX_ENTRIES))
+            )
+        if ngram_cache_size < 0:
+            raise ValueError("ngram_cache_size must not be negative")
+        return ngram_cache_size
+
+    def _get_ngram_cache_path(self, ngram_cache_path: str | None = None) -> str | None:
+        """Get the warm n-gram cache file, if any.
+
+        Args:
+            ngram_cache_path (str | None, optional): The desired path. Defaults
+                to the QUICKUMLS_NGRAM_CACHE_PATH environment variable.
+
+        Returns:
+            str | None: The path, or None for no warm cache.
+        """
+        if ngram_cache_path is None:
+            ngram_cache_path = os.getenv("QUICKUMLS_NGRAM_CACHE_PATH", None)
+        return ngram_cache_path or None
+
+    def _get_ngram_cache_save(self, ngram_cache_save: bool | None = None) -> bool:
+        """Get whether workers save their cached n-grams on exit.
+
+        Args:
+            ngram_cache_save (bool | None, optional): The desired setting.
+                Defaults to the QUICKUMLS_NGRAM_CACHE_SAVE environment variable.
+
+        Returns:
+            bool: True if the warm cache file is extended on exit.
+        """
+        if ngram_cache_save is None:
+            ngram_cache_save = os.getenv(
+                "QUICKUMLS_NGRAM_CACHE_SAVE", "false"
+            ).lower() in ("true", "1", "yes")
+        if ngram_cache_save and self._ngram_cache_path is None:
+            logger.warning(
+                "QUICKUMLS_NGRAM_CACHE_SAVE needs QUICKUMLS_NGRAM_CACHE_PATH; the n-gram cache is not saved."
+            )
+            return False
+        return ngram_cache_save
+
+    def _get_sentence_memo(self, sentence_memo: bool | None = None) -> bool:
+        """Get whether notes are matched and cached sentence by sentence.
+
+        Args:
+            sentence_memo (bool | None, optional): The desired setting. Defaults
+                to the QUICKUMLS_SENTENCE_MEMO environment variable.
+
+        Returns:
+            bool: True for sentence mode.
+        """
+        if sentence_memo is None:
+            sentence_memo = os.getenv("QUICKUMLS_SENTENCE_MEMO", "false").lower() in (
+                "true",
+                "1",
+                "yes",
+            )
+        return sentence_memo
+
+    def _get_sentence_cache_size(self, sentence_cache_size: int | None = None) -> int:
+        """Get the number of sentences each worker caches.
+
+        Args:
+            sentence_cache_size (int | None, optional): The desired size.
+                Defaults to the QUICKUMLS_SENTENCE_CACHE_SIZE environment
+                variable.
+
+        Raises:
+            ValueError: If the size is not positive.
+
+        Returns:
+            int: The cache size.
+        """
+        if sentence_cache_size is None:
+            sentence_cache_size = int(
+                os.getenv(
+                    "QUICKUMLS_SENTENCE_CACHE_SIZE", str(DEFAULT_SENTENCE_CACHE_SIZE)
+                )
+            )
+        if sentence_cache_size < 1:
+            raise ValueError("sentence_cache_size must be a positive integer")
+        return sentence_cache_size
+
+    def _get_chunk_chars(self, chunk_chars: int | None = None) -> int:
+        """Get the length above which texts are matched in windows.
+
+        Args:
+            chunk_chars (int | None, optional): The desired length. Defaults to
+                the QUICKUMLS_CHUNK_CHARS environment variable.
+
+        Raises:
+            ValueError: If the length is negative.
+
+        Returns:
+            int: The window length; 0 matches every text whole.
+        """
+        if chunk_chars is None:
+            chunk_chars = int(os.getenv("QUICKUMLS_CHUNK_CHARS", 0) or 0)
+        if chunk_chars < 0:
+            raise ValueError("chunk_chars must be 0 or a positive integer")
+        return chunk_chars
+
+    def _get_chunk_overlap_chars(self, chunk_overlap_chars: int | None = None) -> int:
+        """Get the overlap between consecutive windows.
+
+        Args:
+            chunk_overlap_chars (int | None, optional): The desired overlap.
+                Defaults to the QUICKUMLS_CHUNK_OVERLAP_CHARS environment
+                variable.
+
+        Raises:
+            ValueError: If windows are on and the overlap is not positive or
+                more than a quarter of the window length.
+
+        Returns:
+            int: The overlap.
+        """
+        if chunk_overlap_chars is None:
+            chunk_overlap_chars = int(
+                os.getenv("QUICKUMLS_CHUNK_OVERLAP_CHARS", str(DEFAULT_OVERLAP_CHARS))
+            )
+        if self._chunk_chars and not 0 < 4 * chunk_overlap_chars <= self._chunk_chars:
+            raise ValueError(
+                "chunk_overlap_chars must be positive and at most a quarter of chunk_chars"
+            )
+        return chunk_overlap_chars
+
+    @classmethod
+    def create(cls, manager, **config):
+        # Hits and misses of all workers, for the hit rate of the run
+        config.setdefault(
+            "sentence_memo_counts",
+            manager.dict(
+                {"hits": 0, "misses": 0, "workers": int(config.get("num_workers", 0))}
+            ),
+        )
+        return super().create(manager, **config)
+
+    def _shared_matcher(self) -> QuickUMLS:
+        """Get the matcher shared by the processors created in this process."""
+        key = (str(self._quickumls_path), repr(sorted(self._quickumls_config.items())))
+        matcher = _SHARED_MATCHERS.get(key)
+        if matcher is not None:
+            return matcher
+        gc_enabled = gc.isenabled()
+        # No collections while loading, so the matcher is allocated without holes
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            matcher = self._create_matcher()
+            logger.info(
+                "Loaded the shared QuickUMLS matcher in {:.1f}s",
+                time.perf_counter() - start,
+            )
+        finally:
+            # Move everything allocated so far out of reach of the collector
+            gc.freeze()
+            if gc_enabled:
+                gc.enable()
+        _SHARED_MATCHERS[key] = matcher
+        return matcher
+
+    def _get_matcher(self) -> QuickUMLS:
+        if self._matcher is None:
+            self._matcher = self._create_matcher()
+        return self._matcher
+
+    def _on_worker_start(self) -> None:
+        # A shared matcher was loaded by the parent; nothing to load
+        if self._matcher is None:
+            start = time.perf_counter()
+            self._get_matcher()
+            logger.info(
+                "{} loaded its QuickUMLS matcher in {:.1f}s",
+                self.get_process_name(),
+                time.perf_counter() - start,
+            )
+        self._install_candidate_cache()
+        if self._sentence_memo_enabled:
+            self._sentence_memo = SentenceMemo(
+                self._match_text, max_entries=self._sentence_cache_size
+            )
+
+    def _install_candidate_cache(self) -> None:
+        """Put this worker's candidate cache in front of the matcher's simstring reader.
+
+        Assigning ``ss_db`` in the worker leaves a shared matcher untouched in
+        the parent and in the other workers.
+        """
+        matcher = self._get_matcher()
+        if self._ngram_cache_size == 0:
+            return
+        if not hasattr(matcher, "ss_db"):
+            logger.warning(
+                "This QuickUMLS version has no simstring reader to cache; n-gram caching is off."
+            )
+            return
+        self._candidate_cache = CandidateCache(
+            matcher.ss_db,
+            candidate_namespace(matcher.similarity_name, matcher.threshold),
+            max_entries=self._ngram_cache_size,
+            warm_path=self._ngram_cache_path,
+        )
+        matcher.ss_db = self._candidate_cache
+
+    def _on_worker_exit(self) -> None:
+        self._report_sentence_memo()
+        cache = self._candidate_cache
+        if cache is None:
+            return
+        stats = cache.stats()
+        lookups = stats["hits"] + stats["warm_hits"] + stats["misses"]
+        logger.info(
+            "{} n-gram cache: {} lookups, {} hits, {} warm hits, {} misses ({:.1%} hit rate), {} evictions",
+            self.get_process_name(),
+            lookups,
+            stats["hits"],
+            stats["warm_hits"],
+            stats["misses"],
+            (stats["hits"] + stats["warm_hits"]) / lookups if lookups else 0.0,
+            stats["evictions"],
+        )
+        cache.close()
+        if self._ngram_cache_save and self._ngram_cache_path is not None:
+            saved = cache.save(self._ngram_cache_path)
+            logger.info(
+                "{} saved {} n-grams to {}",
+                self.get_process_name(),
+                saved,
+                self._ngram_cache_path,
+            )
 
     def _create_matcher(self) -> QuickUMLS:
         """
         Create and return a new QuickUMLS matcher for this processor instance.
         """
         try:
-            quickumls_path: Path = self._init_quickumls_path()
+            quickumls_path: Path = self._quickumls_path
             logger.info(f"Initializing QuickUMLS matcher at {quickumls_path}")
 
-            quickumls_config: Dict[str, Any] | None = get_quickumls_config(
-                self.processor_config
-            )
-            if quickumls_config is None:
-                raise ValueError("QuickUMLS configuration could not be loaded.")
+            quickumls_config: Dict[str, Any] = self._quickumls_config
 
             try:
                 matcher = QuickUMLS(quickumls_path, **quickumls_config)
@@ -69,38 +452,86 @@ class QuickUMLSProcessor(Processor):
             raise
         return matcher
 
+    def _report_sentence_memo(self) -> None:
+        """Add this worker's sentence hits to the run's; the last worker logs them."""
+        memo = self._sentence_memo
+        counts = self._sentence_memo_counts
+        if memo is None or counts is None:
+            return
+        with self._processor_lock:
+            hits = counts["hits"] + memo.hits
+            misses = counts["misses"] + memo.misses
+            workers_left = counts["workers"] - 1
+            counts.update(hits=hits, misses=misses, workers=workers_left)
+        logger.debug(
+            "{} sentence cache: {} hits, {} misses",
+            self.get_process_name(),
+            memo.hits,
+            memo.misses,
+        )
+        if workers_left == 0:
+            logger.info(
+                "Sentence cache: {} sentences, {} hits ({:.1%} hit rate)",
+                hits + misses,
+                hits,
+                hits / (hits + misses) if hits + misses else 0.0,
+            )
+
+    def _match(self, text: str) -> TMatchGroups:
+        if self._sentence_memo is not None:
+            return self._sentence_memo.match(text)
+        return self._match_text(text)
+
+    def _match_text(self, text: str) -> TMatchGroups:
+        matcher = self._get_matcher()
+        if self._chunk_chars and len(text) > self._chunk_chars:
+            return match_in_windows(
+                matcher.match, text, self._chunk_chars, self._chunk_overlap_chars
+            )
+        return matcher.match(text)
+
+    RESULT_SCHEMA: TResultSchema = (
+        ("ngram", str),
+        ("term", str),
+        ("cui", str),
+        ("similarity", float),
+        ("semtypes", set),
+        ("pos_start", int),
+        ("pos_end", int),
+        ("doc_length", int),
+    )
+
     def _call_processor(
         self, document_batch: DocumentBatch
-    ) -> Generator[NLPResultItem, Any, None]:
+    ) -> Generator[NLPResultItem | NLPResultBatch, Any, None]:
 
         total_found_in_batch = 0
+        result_batch = NLPResultBatch(self.RESULT_SCHEMA)
 
-        for doc in document_batch._documents:
+        for doc in document_batch:
             try:
                 # Extract UMLS concepts using QuickUMLS
                 # logger.debug(f"Processing document: {doc.note_id}")
                 doc_length = len(doc.text)
-                umls_matches = self._matcher.match(doc.text)
+                umls_matches = self._match(doc.text)
 
                 if len(umls_matches) > 0:
                     total_found_in_batch += len(umls_matches)
 
-                match_count = 0
                 for match_group in umls_matches:
                     for match in match_group:
-                        match_count += 1
-                        result_items: List[NLPResultFeature] = [
-                            NLPResultFeature("ngram", match["ngram"]),
-                            NLPResultFeature("term", match["term"]),
-                            NLPResultFeature("cui", match["cui"]),
-                            NLPResultFeature("similarity", match["similarity"]),
-                            NLPResultFeature("semtypes", match["semtypes"]),
-                            NLPResultFeature("pos_start", match["start"]),
-                            NLPResultFeature("pos_end", match["end"]),
-                            NLPResultFeature("doc_length", doc_length),
-                        ]
-                        yield NLPResultItem(
-                            note_id=doc.note_id, result_features=result_items
+                        result_batch.append_row(
+                            doc.note_id,
+                            (
+                                match["ngram"],
+                                match["term"],
+                                match["cui"],
+                                match["similarity"],
+                                match["semtypes"],
+                                match["start"],
+                                match["end"],
+                                doc_length,
+                            ),
                         )
             except Exception as e:
                 logger.error(
@@ -108,6 +539,12 @@ class QuickUMLSProcessor(Processor):
                 )
                 yield NLPResultItem(note_id=doc.note_id, result_features=[])
 
+            if self._result_batch_size and len(result_batch) >= self._result_batch_size:
+                yield result_batch
+                result_batch = NLPResultBatch(self.RESULT_SCHEMA)
+
+        yield result_batch
+
     @classmethod
     def _init_quickumls_path(cls) -> Path:
         """Initialize and validate QuickUMLS path."""
@@ -0,0 +1,119 @@
+"""
+Sentence-level memoization of QuickUMLS matches.
+
+Templated notes repeat whole boilerplate sentences ("Patient denies chest
+pain.", section headers, attestations). In sentence mode a note is split
+into sentences, each sentence is matched on its own, and the match list of
+every sentence is cached by the fingerprint of its text. A sentence seen
+before is not matched again; its cached matches are copied with their
+offsets moved to where the sentence sits in the note.
+"""
+
+import re
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from nre_pipeline.manifest import text_fingerprint
+
+TMatchGroups = List[List[Dict[str, Any]]]
+
+DEFAULT_MAX_ENTRIES = 100_000
+
+# A sentence ends after terminal punctuation followed by whitespace, or at a
+# line break (templated notes put one field or statement per line)
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\s*\n\s*")
+
+
+def split_sentences(text: str) -> Iterator[Tuple[int, int]]:
+    """Yield the ``(start, end)`` character range of every sentence of a text.
+
+    Leading and trailing whitespace is left out of the ranges and blank
+    sentences are skipped. Abbreviations ("Dr.") end a sentence too; both
+    halves are then matched and cached separately.
+
+    Args:
+        text (str): The note text.
+
+    Yields:
+        Iterator[Tuple[int, int]]: The sentence ranges, in text order.
+    """
+    start = len(text) - len(text.lstrip())
+    for boundary in SENTENCE_BOUNDARY.finditer(text):
+        if boundary.start() > start:
+            yield start, boundary.start()
+        start = boundary.end()
+    end = len(text.rstrip())
+    if end > start:
+        yield start, end
+
+
+def rebase_matches(match_groups: TMatchGroups, offset: int) -> TMatchGroups:
+    """Copy match groups with their offsets moved by ``offset`` characters."""
+    return [
+        [
+            {**match, "start": match["start"] + offset, "end": match["end"] + offset}
+            for match in match_group
+        ]
+        for match_group in match_groups
+    ]
+
+
+class SentenceMemo:
+    """
+    Bounded LRU cache of the QuickUMLS matches of sentences.
+
+    Sentences are keyed by the 128-bit fingerprint of their exact text and
+    their matches are stored with offsets relative to the sentence. Matching
+    sentence by sentence differs slightly from matching the whole note: no
+    match spans two sentences, and spaCy parses each sentence without the
+    rest of the note.
+
+    Args:
+        match (Callable[[str], TMatchGroups]): Matches a text, e.g.
+            ``QuickUMLS.match``.
+        max_entries (int, optional): Sentences kept in memory. Defaults to
+            DEFAULT_MAX_ENTRIES.
+    """
+
+    def __init__(
+        self,
+        match: Callable[[str], TMatchGroups],
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self._match = match
+        self._max_entries: int = max_entries
+        self._entries: OrderedDict[bytes, TMatchGroups] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def match(self, text: str) -> TMatchGroups:
+        """Match a note sentence by sentence, reusing cached sentences.
+
+        Args:
+            text (str): The note text.
+
+        Returns:
+            TMatchGroups: The match groups of the note, in text order, with
+                offsets into ``text``.
+        """
+        match_groups: TMatchGroups = []
+        for start, end in split_sentences(text):
+            sentence = text[start:end]
+            fingerprint = text_fingerprint(sentence)
+            sentence_groups = self._entries.get(fingerprint)
+            if sentence_groups is not None:
+                self._entries.move_to_end(fingerprint)
+                self.hits += 1
+            else:
+                self.misses += 1
+                sentence_groups = self._match(sentence)
+                self._entries[fingerprint] = sentence_groups
+                if len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+            match_groups.extend(rebase_matches(sentence_groups, start))
+        return match_groups
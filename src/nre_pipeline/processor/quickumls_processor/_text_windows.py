@@ -0,0 +1,109 @@
+"""
+Overlapping windows over long documents for QuickUMLS.
+
+spaCy parses the whole text passed to ``QuickUMLS.match`` at once, so a
+single long OCR document holds a worker for a long time and grows its memory
+with the document. Such documents are matched window by window instead.
+
+Consecutive windows overlap, and every window owns the matches that start in
+its core: from the middle of its overlap with the previous window to the
+middle of its overlap with the next one. A match near a window edge is thus
+kept from the window that saw it whole, and a match found by two windows is
+kept once. This holds for matches no longer than a quarter of the overlap.
+"""
+
+import re
+from typing import Callable, Iterator, Tuple
+
+from nre_pipeline.processor.quickumls_processor._sentence_memo import (
+    SENTENCE_BOUNDARY,
+    TMatchGroups,
+    rebase_matches,
+)
+
+DEFAULT_OVERLAP_CHARS = 1000
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def _snap(text: str, lo: int, hi: int) -> int:
+    """Get the last sentence start in ``(lo, hi]``, else the last word start.
+
+    Returns ``hi`` if the range holds neither.
+    """
+    for boundary_pattern in (SENTENCE_BOUNDARY, WHITESPACE):
+        last = None
+        for boundary in boundary_pattern.finditer(text, lo, hi):
+            last = boundary
+        if last is not None and last.end() > lo:
+            return last.end()
+    return hi
+
+
+def split_windows(
+    text: str, window_chars: int, overlap_chars: int = DEFAULT_OVERLAP_CHARS
+) -> Iterator[Tuple[int, int, int, int]]:
+    """Yield the windows of a text.
+
+    Windows end at a sentence boundary in their second half, or else at a
+    whitespace, and the next window starts at such a boundary within the
+    last ``overlap_chars`` of the window.
+
+    Args:
+        text (str): The document text.
+        window_chars (int): The maximum window length.
+        overlap_chars (int, optional): The maximum overlap between two
+            windows. Defaults to DEFAULT_OVERLAP_CHARS.
+
+    Raises:
+        ValueError: If the overlap is more than a quarter of the window.
+
+    Yields:
+        Iterator[Tuple[int, int, int, int]]: The ``(start, end, core_start,
+            core_end)`` character range of every window and of the part of it
+            whose matches it owns, in text order.
+    """
+    # Keeps every core non-empty and every window past its predecessor
+    if not 0 < 4 * overlap_chars <= window_chars:
+        raise ValueError(
+            "overlap_chars must be positive and at most a quarter of window_chars"
+        )
+    start, core_start = 0, 0
+    while start + window_chars < len(text):
+        end = _snap(text, start + window_chars // 2, start + window_chars)
+        next_start = _snap(text, end - overlap_chars, end - overlap_chars // 2)
+        core_end = (next_start + end) // 2
+        yield start, end, core_start, core_end
+        start, core_start = next_start, core_end
+    yield start, len(text), core_start, len(text)
+
+
+def match_in_windows(
+    match: Callable[[str], TMatchGroups],
+    text: str,
+    window_chars: int,
+    overlap_chars: int = DEFAULT_OVERLAP_CHARS,
+) -> TMatchGroups:
+    """Match a long text window by window.
+
+    Args:
+        match (Callable[[str], TMatchGroups]): Matches a text, e.g.
+            ``QuickUMLS.match``.
+        text (str): The document text.
+        window_chars (int): The maximum window length.
+        overlap_chars (int, optional): The maximum overlap between two
+            windows. Defaults to DEFAULT_OVERLAP_CHARS.
+
+    Returns:
+        TMatchGroups: The match groups of the text, with offsets into
+            ``text``.
+    """
+    match_groups: TMatchGroups = []
+    for start, end, core_start, core_end in split_windows(
+        text, window_chars, overlap_chars
+    ):
+        for match_group in rebase_matches(match(text[start:end]), start):
+            # The matches of a group share their span
+            if match_group and core_start <= match_group[0]["start"] < core_end:
+                match_groups.append(match_group)
+    return match_groups
@@ -1,6 +1,31 @@
 import os
 from loguru import logger
 
+from ._transport import (
+    DEFAULT_QUEUE_TRANSPORT,
+    ManagerQueueTransport,
+    NativeQueueTransport,
+    QueueTransport,
+    SynchronousPutQueue,
+    TQueueTransportName,
+    create_queue,
+    get_queue_transport,
+)
+from ._sharded import ShardedQueue, shard_for_note
+
+__all__ = [
+    "DEFAULT_QUEUE_TRANSPORT",
+    "ManagerQueueTransport",
+    "NativeQueueTransport",
+    "QueueTransport",
+    "ShardedQueue",
+    "SynchronousPutQueue",
+    "TQueueTransportName",
+    "create_queue",
+    "get_queue_transport",
+    "shard_for_note",
+]
+
 
 def _get_outqueue_max_docbatch_count():
     outqueue_max_docbatch_count = int(os.getenv("OUTQUEUE_MAX_DOCBATCH_COUNT", 1))
@@ -14,9 +39,9 @@ def _get_inqueue_max_docbatch_count():
     return inqueue_max_docbatch_count
 
 
-def _create_outqueue(manager):
-    return manager.Queue(maxsize=_get_outqueue_max_docbatch_count())
+def _create_outqueue(manager, transport=None):
+    return create_queue(manager, _get_outqueue_max_docbatch_count(), transport)
 
 
-def _create_inqueue(manager):
-    return manager.Queue(maxsize=_get_inqueue_max_docbatch_count())
+def _create_inqueue(manager, transport=None):
+    return create_queue(manager, _get_inqueue_max_docbatch_count(), transport)
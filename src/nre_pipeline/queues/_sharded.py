@@ -0,0 +1,129 @@
+"""
+Outqueue fan-out for sharded writers.
+
+A ``ShardedQueue`` wraps one queue per writer shard behind the ``put``
+interface processors already use. Results are routed by a stable hash of
+``note_id`` so every row of a note lands in the same shard, and the
+QUEUE_EMPTY sentinel is broadcast to every shard so each writer sees the end
+of every producer.
+"""
+
+import queue
+import zlib
+from typing import Any, Dict, List
+
+from nre_pipeline.common.base._consts import QUEUE_EMPTY
+from nre_pipeline.manifest import TDuplicateNote, TManifestEntry
+from nre_pipeline.models._nlp_result import NLPResultItem
+from nre_pipeline.models._nlp_result_batch import NLPResultBatch
+
+
+def shard_for_note(note_id: str | int, num_shards: int) -> int:
+    """Get the shard a note is routed to.
+
+    crc32 is used instead of ``hash`` because string hashes are randomized
+    per process.
+
+    Args:
+        note_id (str | int): The note id.
+        num_shards (int): The number of shards.
+
+    Returns:
+        int: The shard index in ``[0, num_shards)``.
+    """
+    return zlib.crc32(str(note_id).encode("utf-8")) % num_shards
+
+
+class ShardedQueue:
+    """Route results to one queue per writer shard.
+
+    Args:
+        queues (List[queue.Queue]): One queue per shard.
+        num_producers (int): The number of processes that will put the
+            QUEUE_EMPTY sentinel; each shard writer stops after receiving
+            that many sentinels.
+    """
+
+    def __init__(self, queues: List[queue.Queue], num_producers: int) -> None:
+        if not queues:
+            raise ValueError("ShardedQueue needs at least one queue")
+        self._queues: List[queue.Queue] = queues
+        self._num_producers: int = num_producers
+
+    @property
+    def num_shards(self) -> int:
+        return len(self._queues)
+
+    @property
+    def num_producers(self) -> int:
+        return self._num_producers
+
+    @property
+    def shards(self) -> List[queue.Queue]:
+        return self._queues
+
+    def put(self, item: Any, block: bool = True, timeout: float | None = None) -> None:
+        if item == QUEUE_EMPTY:
+            for shard in self._queues:
+                shard.put(item, block, timeout)
+        elif isinstance(item, NLPResultBatch):
+            for shard_index, shard_batch in self._partition(item).items():
+                self._queues[shard_index].put(shard_batch, block, timeout)
+        elif isinstance(item, NLPResultItem):
+            self._queues[shard_for_note(item.note_id, self.num_shards)].put(
+                item, block, timeout
+            )
+        else:
+            raise TypeError(f"Cannot route {type(item).__name__} to a writer shard")
+
+    def _partition(self, batch: NLPResultBatch) -> Dict[int, NLPResultBatch]:
+        if self.num_shards == 1:
+            return {0: batch}
+        note_shards: Dict[str | int, int] = {}
+
+        def _shard_of(note_id: str | int) -> int:
+            shard_index = note_shards.get(note_id)
+            if shard_index is None:
+                shard_index = note_shards[note_id] = shard_for_note(
+                    note_id, self.num_shards
+                )
+            return shard_index
+
+        shard_rows: Dict[int, List[int]] = {}
+        for row, note_id in enumerate(batch.note_ids):
+            shard_rows.setdefault(_shard_of(note_id), []).append(row)
+        shard_completed: Dict[int, List[TManifestEntry]] = {}
+        for entry in batch.completed:
+            shard_completed.setdefault(_shard_of(entry[0]), []).append(entry)
+
+        # A duplicate goes to the shard holding its canonical note's rows
+        shard_duplicates: Dict[int, List[TDuplicateNote]] = {}
+        for duplicate in batch.duplicates:
+            shard_duplicates.setdefault(_shard_of(duplicate[1]), []).append(duplicate)
+
+        if len(shard_rows) == 1 and (set(shard_completed) | set(shard_duplicates)) <= set(
+            shard_rows
+        ):
+            # Every row belongs to one shard; no need to copy the columns
+            return {next(iter(shard_rows)): batch}
+        shard_batches: Dict[int, NLPResultBatch] = {
+            shard_index: batch.select(rows) for shard_index, rows in shard_rows.items()
+        }
+        for shard_index in set(shard_completed) | set(shard_duplicates):
+            if shard_index not in shard_batches:
+                # Completions of notes without rows in this batch
+                shard_batches[shard_index] = NLPResultBatch(batch.schema)
+        for shard_index, completed in shard_completed.items():
+            shard_batches[shard_index].completed = completed
+        for shard_index, duplicates in shard_duplicates.items():
+            shard_batches[shard_index].duplicates = duplicates
+        return shard_batches
+
+    def __len__(self) -> int:
+        return self.num_shards
+
+    def __getitem__(self, shard_index: int) -> queue.Queue:
+        return self._queues[shard_index]
+
+    def __repr__(self) -> str:
+        return f"ShardedQueue(num_shards={self.num_shards}, num_producers={self.num_producers})"
@@ -0,0 +1,158 @@
+"""
+Queue transports used to connect the reader, processors and writer.
+
+The ``manager`` transport builds every queue through the ``SyncManager``
+server process, so each item is pickled into the manager and pickled again
+on the way out.  The ``native`` transport (the default) builds plain
+``multiprocessing.Queue`` objects, which move items over an OS pipe directly
+between the producing and consuming processes.
+"""
+
+import multiprocessing
+import os
+import queue
+from abc import ABC, abstractmethod
+from multiprocessing.queues import Queue as _MultiprocessingQueue
+from multiprocessing.reduction import ForkingPickler
+from typing import Any, Dict, Literal, Type, TypeAlias
+
+from loguru import logger
+
+TQueueTransportName: TypeAlias = Literal["native", "manager"]
+
+DEFAULT_QUEUE_TRANSPORT: TQueueTransportName = "native"
+
+
+class QueueTransport(ABC):
+    """Factory for the queues shared between pipeline processes."""
+
+    name: TQueueTransportName
+
+    @abstractmethod
+    def create_queue(self, maxsize: int) -> queue.Queue:
+        """Create a bounded queue usable across processes.
+
+        Args:
+            maxsize (int): The maximum number of items held by the queue.
+
+        Returns:
+            queue.Queue: A queue exposing the ``put``/``get`` interface.
+        """
+        raise NotImplementedError("Must implement create_queue method.")
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(name={self.name})"
+
+
+class ManagerQueueTransport(QueueTransport):
+    """Queues proxied through a ``multiprocessing.Manager`` server process."""
+
+    name: TQueueTransportName = "manager"
+
+    def __init__(self, manager) -> None:
+        if manager is None:
+            raise ValueError("A manager is required for the manager queue transport")
+        self._manager = manager
+
+    def create_queue(self, maxsize: int) -> queue.Queue:
+        return self._manager.Queue(maxsize)
+
+
+class SynchronousPutQueue(_MultiprocessingQueue):
+    """A ``multiprocessing.Queue`` whose ``put`` writes the item to the pipe.
+
+    ``multiprocessing.Queue.put`` hands items to a feeder thread, so a
+    process terminated between puts can take unsent items with it, or leave
+    the queue's write lock held or half an item in the pipe. Here the caller
+    writes each item before ``put`` returns, so a process terminated outside
+    ``put`` leaves the queue intact.
+    """
+
+    def put(self, obj: Any, block: bool = True, timeout: float | None = None) -> None:
+        if self._closed:  # type: ignore[attr-defined]
+            raise ValueError(f"Queue {self!r} is closed")
+        if not self._sem.acquire(block, timeout):  # type: ignore[attr-defined]
+            raise queue.Full
+        payload = ForkingPickler.dumps(obj)
+        if self._wlock is None:  # type: ignore[attr-defined]
+            # Writes to a message oriented win32 pipe are atomic
+            self._writer.send_bytes(payload)  # type: ignore[attr-defined]
+        else:
+            with self._wlock:  # type: ignore[attr-defined]
+                self._writer.send_bytes(payload)  # type: ignore[attr-defined]
+
+
+class NativeQueueTransport(QueueTransport):
+    """Pipe-backed ``multiprocessing.Queue`` objects with no proxy process.
+
+    Args:
+        synchronous_put (bool, optional): Build SynchronousPutQueue objects,
+            for producers that may be terminated. Defaults to False.
+    """
+
+    name: TQueueTransportName = "native"
+
+    def __init__(self, manager=None, context=None, synchronous_put: bool = False) -> None:
+        self._context = context or multiprocessing.get_context()
+        self._synchronous_put: bool = synchronous_put
+
+    @property
+    def context(self):
+        return self._context
+
+    def create_queue(self, maxsize: int) -> queue.Queue:
+        if self._synchronous_put:
+            return SynchronousPutQueue(maxsize, ctx=self._context)  # type: ignore[return-value]
+        return self._context.Queue(maxsize)
+
+
+_TRANSPORTS: Dict[str, Type[QueueTransport]] = {
+    "native": NativeQueueTransport,
+    "manager": ManagerQueueTransport,
+}
+
+
+def get_queue_transport(
+    manager, transport: QueueTransport | TQueueTransportName | None = None
+) -> QueueTransport:
+    """Resolve the queue transport to use.
+
+    Args:
+        manager: The ``multiprocessing.Manager`` used by the pipeline.
+        transport (QueueTransport | str | None, optional): A transport instance,
+            a transport name, or None to use the ``QUEUE_TRANSPORT``
+            environment variable. Defaults to None.
+
+    Raises:
+        ValueError: If the transport name is unknown.
+
+    Returns:
+        QueueTransport: The resolved transport.
+    """
+    if isinstance(transport, QueueTransport):
+        return transport
+
+    transport_name: str = (
+        transport or os.getenv("QUEUE_TRANSPORT", "") or DEFAULT_QUEUE_TRANSPORT
+    ).lower()
+    transport_type = _TRANSPORTS.get(transport_name)
+    if transport_type is None:
+        raise ValueError(
+            f"Unknown queue transport '{transport_name}'; expected one of {list(_TRANSPORTS)}"
+        )
+    logger.debug("Using {} queue transport", transport_name)
+    return transport_type(manager)
+
+
+def create_queue(manager, maxsize: int, transport: Any = None) -> queue.Queue:
+    """Create a queue with the resolved transport.
+
+    Args:
+        manager: The ``multiprocessing.Manager`` used by the pipeline.
+        maxsize (int): The maximum number of items held by the queue.
+        transport (QueueTransport | str | None, optional): See ``get_queue_transport``.
+
+    Returns:
+        queue.Queue: The created queue.
+    """
+    return get_queue_transport(manager, transport).create_queue(maxsize)
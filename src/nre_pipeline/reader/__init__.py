@@ -3,5 +3,17 @@ Reader module for NRE Pipeline.
 """
 
 from ._filesystem_reader import FileSystemReader, CorpusReader
+from ._archive_reader import ArchiveReader
+from ._sql_reader import SQLReader
+from ._tabular_reader import CsvReader, JsonlReader, ParquetReader, TabularReader
 
-__all__ = ["FileSystemReader", "CorpusReader"]
+__all__ = [
+    "ArchiveReader",
+    "CsvReader",
+    "FileSystemReader",
+    "CorpusReader",
+    "JsonlReader",
+    "ParquetReader",
+    "SQLReader",
+    "TabularReader",
+]
@@ -0,0 +1,447 @@
+"""
+ArchiveReader class for streaming notes out of tar, zip, gzip and zstd files.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import os
+import queue
+import tarfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Generator, Iterator, List, Tuple
+
+from loguru import logger
+
+from nre_pipeline.common.base._base_reader import CorpusReader
+from nre_pipeline.models import Document
+from nre_pipeline.models._batch import DocumentBatch
+from nre_pipeline.reader._directory_scanner import DirectoryScanner
+from nre_pipeline.reader._path_filter import PathFilter
+
+# (suffix, kind) pairs, longest suffixes first
+ARCHIVE_SUFFIXES: Tuple[Tuple[str, str], ...] = (
+    (".tar.gz", "tar"),
+    (".tar.bz2", "tar"),
+    (".tar.xz", "tar"),
+    (".tar.zst", "tar.zst"),
+    (".tgz", "tar"),
+    (".tbz2", "tar"),
+    (".txz", "tar"),
+    (".tzst", "tar.zst"),
+    (".tar", "tar"),
+    (".zip", "zip"),
+    (".gz", "gz"),
+    (".zst", "zst"),
+)
+JSONL_SUFFIX = ".jsonl"
+# Documents buffered between the archive threads and the batch builder
+ARCHIVE_QUEUE_DOCS = 4096
+
+_ARCHIVE_DONE = object()
+
+
+def archive_kind(path: str) -> str | None:
+    """Get how an archive is read from its file name.
+
+    Args:
+        path (str): The archive path.
+
+    Returns:
+        str | None: "tar", "tar.zst", "zip", "gz" or "zst"; None if the file
+            is not a supported archive.
+    """
+    lower = path.lower()
+    for suffix, kind in ARCHIVE_SUFFIXES:
+        if lower.endswith(suffix):
+            return kind
+    return None
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("zstd archives require the zstandard package") from e
+    return zstandard
+
+
+@dataclass
+class ArchiveMember:
+    """A file read out of an archive, before it is decoded into a Document."""
+
+    archive_path: str
+    name: str
+    mtime_ns: int | None
+    size: int
+    data: bytes = b""
+
+
+class ArchiveReader(CorpusReader):
+    """
+    Stream notes out of archives without extracting them.
+
+    Every file member of a tar (optionally gzip, bzip2, xz or zstd
+    compressed) or zip archive becomes one Document, as does a single
+    gzip or zstd compressed file. Members are read sequentially from the
+    archive stream; nothing is written to disk. Like FileSystemReader the
+    note id is the member's file name without its extension, the text is
+    decoded as UTF-8 ignoring errors, and the metadata holds ``path``
+    (``<archive>!<member>``), ``archive``, ``member``, ``mtime_ns`` and
+    ``size``, so ``resume=True`` skips members completed by an earlier run.
+
+    JSONL members (``*.jsonl`` inside an archive, or ``*.jsonl.gz`` /
+    ``*.jsonl.zst``) hold one note per line; ``note_id_field`` and
+    ``text_field`` name the keys to read and the line number is added to the
+    metadata. JSONL members are read whatever ``allowed_extensions`` says.
+
+    With ``archive_workers > 1`` several archives are read at once by a
+    thread pool and their documents are interleaved, so the document order
+    is not deterministic. With ``num_shards > 1`` the archives are dealt out
+    to the reader shards round-robin.
+
+    Args:
+        input_paths (List[str | Path] | Path | str): Archives, or directories
+            searched recursively for archives.
+        allowed_extensions (List[str] | None, optional): Extensions of the
+            members to read. Defaults to every member.
+        archive_workers (int | None, optional): Archives read at once.
+            Defaults to the READER_ARCHIVE_WORKERS environment variable.
+        note_id_field (str, optional): The JSONL key of the note id.
+        text_field (str, optional): The JSONL key of the note text.
+    """
+
+    def __init__(
+        self,
+        input_paths: List[str | Path] | Path | str,
+        allowed_extensions: List[str] | None = None,
+        archive_workers: int | None = None,
+        note_id_field: str = "note_id",
+        text_field: str = "text",
+        **config,
+    ) -> None:
+        super().__init__(**config)
+        self._input_paths: List[str] = self._normalize_input_paths(input_paths)
+        self._extensions: List[str] | None = allowed_extensions
+        self._path_filter: PathFilter = PathFilter(allowed_extensions)
+        self._archive_workers: int = self._get_archive_workers(archive_workers)
+        self._note_id_field: str = note_id_field
+        self._text_field: str = text_field
+
+        self._debug_log("ArchiveReader loaded")
+
+    def get_process_name(self):
+        return f"ArchiveReader"
+
+    def _get_archive_workers(self, archive_workers: int | None = None) -> int:
+        """Get the number of archives read at once.
+
+        Args:
+            archive_workers (int | None, optional): The desired thread count.
+                Defaults to the READER_ARCHIVE_WORKERS environment variable, then 1.
+
+        Raises:
+            ValueError: If the thread count is less than 1.
+
+        Returns:
+            int: The thread count.
+        """
+        if archive_workers is None:
+            archive_workers = int(os.getenv("READER_ARCHIVE_WORKERS", 1) or 1)
+        if archive_workers < 1:
+            raise ValueError("archive_workers must be at least 1")
+        return archive_workers
+
+    def _normalize_input_paths(self, input_paths) -> List[str]:
+        """Normalize input paths to a list of absolute path strings.
+
+        Args:
+            input_paths (Union[str, Path, List[Union[str, Path]]]): The input paths to normalize.
+
+        Raises:
+            ValueError: If any path does not exist.
+
+        Returns:
+            List[str]: The normalized paths.
+        """
+        if isinstance(input_paths, (str, Path)):
+            input_paths = [input_paths]
+        paths: List[str] = [os.path.abspath(p) for p in input_paths]
+        for p in paths:
+            if not os.path.exists(p):
+                raise ValueError(f"Path does not exist: {p}")
+        return paths
+
+    def _archives(self) -> List[str]:
+        """List the archives of this reader's shard, in a deterministic order.
+
+        Returns:
+            List[str]: The archive paths.
+        """
+        archives: List[str] = []
+        for p in self._input_paths:
+            if os.path.isdir(p):
+                archives.extend(
+                    sorted(
+                        DirectoryScanner(
+                            [p], accept_name=lambda name: archive_kind(name) is not None
+                        )
+                    )
+                )
+            elif archive_kind(p) is not None:
+                archives.append(p)
+            else:
+                logger.warning("Skipping {}: not a supported archive", p)
+        return archives[self._shard_index :: self._num_shards]
+
+    def make_doc(self, source: ArchiveMember) -> Document:
+        """Create a Document from an archive member.
+
+        Args:
+            source (ArchiveMember): The member read from an archive.
+
+        Returns:
+            Document: The created Document object.
+        """
+        return Document(
+            note_id=self._get_note_id(source.name),
+            text=source.data.decode("utf-8", errors="ignore"),
+            valid=True,
+            metadata=self._member_metadata(source),
+        )
+
+    def _get_note_id(self, member_name: str) -> str:
+        """Get the note ID from a member name (the file name without its extension).
+
+        Args:
+            member_name (str): The member name.
+
+        Returns:
+            str: The ID of the note.
+        """
+        return os.path.splitext(os.path.basename(member_name))[0]
+
+    @staticmethod
+    def _member_metadata(member: ArchiveMember) -> dict[str, Any]:
+        return {
+            "path": f"{member.archive_path}!{member.name}",
+            "archive": member.archive_path,
+            "member": member.name,
+            "mtime_ns": member.mtime_ns,
+            "size": member.size,
+        }
+
+    def _iter(self) -> Generator[DocumentBatch, Any, None]:
+        """
+        Return an iterator that yields the documents of every archive in batches.
+
+        Yields:
+            DocumentBatch: Each batch of Document objects
+        """
+        archives = self._archives()
+        logger.info("Reading {} archive(s)", len(archives))
+        if self._resume:
+            # Load once here rather than racing in the archive threads
+            self._completed_index()
+
+        documents: Iterator[Document] = (
+            self._iter_archives_parallel(archives)
+            if self._archive_workers > 1 and len(archives) > 1
+            else (doc for archive in archives for doc in self._read_archive(archive))
+        )
+        total_documents = 0
+        batch_builder = self._new_batch_builder()
+        for document in documents:
+            for batch in batch_builder.add(document):
+                total_documents += len(batch)
+                yield batch
+        for batch in batch_builder.flush():
+            total_documents += len(batch)
+            yield batch
+
+        logger.info("Total Documents Read: {}", total_documents)
+
+    def _iter_archives_parallel(self, archives: List[str]) -> Iterator[Document]:
+        results: queue.Queue = queue.Queue(maxsize=ARCHIVE_QUEUE_DOCS)
+        stop = threading.Event()
+
+        def _put(item) -> bool:
+            # Give up once the consumer has stopped iterating
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def _read(archive_path: str) -> None:
+            try:
+                for document in self._read_archive(archive_path):
+                    if not _put(document):
+                        return
+            finally:
+                _put(_ARCHIVE_DONE)
+
+        with ThreadPoolExecutor(
+            self._archive_workers, thread_name_prefix="nre-archive"
+        ) as pool:
+            for archive_path in archives:
+                pool.submit(_read, archive_path)
+            remaining = len(archives)
+            try:
+                while remaining:
+                    item = results.get()
+                    if item is _ARCHIVE_DONE:
+                        remaining -= 1
+                        continue
+                    yield item
+            finally:
+                stop.set()
+
+    def _read_archive(self, archive_path: str) -> Iterator[Document]:
+        """Yield the documents of one archive; a damaged archive is logged and skipped.
+
+        Args:
+            archive_path (str): The archive path.
+
+        Yields:
+            Document: The documents read so far.
+        """
+        kind = archive_kind(archive_path)
+        start = time.perf_counter()
+        count = 0
+        try:
+            if kind == "tar":
+                members = self._iter_tar(tarfile.open(archive_path, mode="r|*"), archive_path)
+            elif kind == "tar.zst":
+                members = self._iter_tar_zst(archive_path)
+            elif kind == "zip":
+                members = self._iter_zip(archive_path)
+            else:
+                members = self._iter_compressed_file(archive_path, kind)
+            for member, fh in members:
+                for document in self._member_documents(member, fh):
+                    count += 1
+                    yield document
+        except (OSError, EOFError, tarfile.TarError, zipfile.BadZipFile) as e:
+            logger.error("Error reading archive {}: {}", archive_path, e)
+        self._debug_log(
+            f"Read {count} documents from {archive_path} in {time.perf_counter() - start:.2f}s"
+        )
+
+    def _accepts_member(self, name: str, mtime_ns: int | None, size: int) -> bool:
+        """Apply the extension filter and the resume check before a member is read."""
+        if name.lower().endswith(JSONL_SUFFIX):
+            # Each line is a note; resume is checked per line
+            return True
+        if not self._path_filter.accepts_name(os.path.basename(name)):
+            return False
+        return not self._is_completed(self._get_note_id(name), mtime_ns, size)
+
+    def _iter_tar(
+        self, tar: tarfile.TarFile, archive_path: str
+    ) -> Iterator[Tuple[ArchiveMember, IO[bytes]]]:
+        with tar:
+            # Stream mode reads the members in order without seeking; each
+            # member stream is only valid until the next member is requested
+            for info in tar:
+                if not info.isfile():
+                    continue
+                mtime_ns = int(info.mtime * 1_000_000_000)
+                if not self._accepts_member(info.name, mtime_ns, info.size):
+                    continue
+                fh = tar.extractfile(info)
+                if fh is None:
+                    continue
+                yield ArchiveMember(archive_path, info.name, mtime_ns, info.size), fh
+
+    def _iter_tar_zst(self, archive_path: str) -> Iterator[Tuple[ArchiveMember, IO[bytes]]]:
+        zstandard = _import_zstandard()
+        with open(archive_path, "rb") as raw:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw)
+            yield from self._iter_tar(
+                tarfile.open(fileobj=stream, mode="r|"), archive_path
+            )
+
+    def _iter_zip(self, archive_path: str) -> Iterator[Tuple[ArchiveMember, IO[bytes]]]:
+        with zipfile.ZipFile(archive_path) as zf:
+            for info in zf.infolist():
+                if info.is_dir():
+                    continue
+                mtime_ns = int(time.mktime(info.date_time + (0, 0, -1)) * 1_000_000_000)
+                if not self._accepts_member(info.filename, mtime_ns, info.file_size):
+                    continue
+                with zf.open(info) as fh:
+                    yield ArchiveMember(
+                        archive_path, info.filename, mtime_ns, info.file_size
+                    ), fh
+
+    def _iter_compressed_file(
+        self, archive_path: str, kind: str | None
+    ) -> Iterator[Tuple[ArchiveMember, IO[bytes]]]:
+        # The single member is named after the archive without the compression suffix
+        name = os.path.basename(os.path.splitext(archive_path)[0])
+        stat = os.stat(archive_path)
+        if not self._accepts_member(name, stat.st_mtime_ns, stat.st_size):
+            return
+        fh: IO[bytes] = (
+            # The decompression reader has no readline; buffer it
+            io.BufferedReader(_import_zstandard().open(archive_path, "rb"))
+            if kind == "zst"
+            else gzip.open(archive_path, "rb")  # type: ignore[assignment]
+        )
+        with fh:
+            yield ArchiveMember(archive_path, name, stat.st_mtime_ns, stat.st_size), fh
+
+    def _member_documents(
+        self, member: ArchiveMember, fh: IO[bytes]
+    ) -> Iterator[Document]:
+        if member.name.lower().endswith(JSONL_SUFFIX):
+            # Stream JSONL line by line; it may hold millions of notes
+            yield from self._jsonl_documents(member, fh)
+            return
+        member.data = fh.read()
+        yield self.make_doc(member)
+
+    def _jsonl_documents(self, member: ArchiveMember, lines: IO[bytes]) -> Iterator[Document]:
+        """Yield one Document per JSONL line; bad lines are logged and skipped.
+
+        A null text gives an invalid, empty Document, as in TabularReader; a
+        text that is not a string makes the line bad.
+        """
+        metadata = self._member_metadata(member)
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                note_id = record[self._note_id_field]
+                text = record[self._text_field]
+                if text is not None and not isinstance(text, str):
+                    raise TypeError(
+                        f"{self._text_field} is not a string: {type(text).__name__}"
+                    )
+            except (ValueError, KeyError, TypeError) as e:
+                logger.error(
+                    "Skipping line {} of {}: {}", line_number, metadata["path"], e
+                )
+                continue
+            if self._is_completed(note_id, member.mtime_ns, member.size):
+                continue
+            yield Document(
+                note_id=note_id,
+                text=text or "",
+                valid=text is not None,
+                metadata={**metadata, "line": line_number},
+            )
+
+    def __repr__(self) -> str:
+        return f"ArchiveReader(input_paths={self._input_paths}, archive_workers={self._archive_workers})"
@@ -0,0 +1,135 @@
+"""
+Recursive file listing with ``os.scandir`` and an optional thread pool.
+"""
+
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterator, List, Sequence, Tuple, cast
+
+from loguru import logger
+
+TDirectoryListing = Tuple[List[str], List[str]]
+
+
+class DirectoryScanner:
+    """
+    Yield the file paths below one or more root directories.
+
+    Directories are listed with ``os.scandir`` and filtered on ``DirEntry``
+    names, so no ``Path`` object or extra ``stat`` call is made per file.
+    Files are yielded in a fixed order: the roots in the order given, and
+    within a directory its files sorted by name, then each subdirectory in
+    name order. With ``num_workers > 1`` the directories next in that order
+    are listed ahead by a thread pool, which hides per-directory latency on
+    network mounts without changing the order. Like ``os.walk``, symbolic
+    links to directories are not followed and unreadable directories are
+    skipped. Directories rejected by ``accept_directory`` are pruned without
+    being listed.
+
+    Args:
+        roots (Sequence[str]): The directories to scan.
+        num_workers (int, optional): Directory listing threads. Defaults to 1.
+        accept_name (Callable[[str], bool] | None, optional): Filter on the
+            file name. Defaults to accepting every file.
+        accept_directory (Callable[[str], bool] | None, optional): Filter on
+            the directory path, roots included. Defaults to scanning every
+            directory.
+        max_queued_directories (int, optional): Directories listed ahead of
+            the consumer. Defaults to 256.
+    """
+
+    def __init__(
+        self,
+        roots: Sequence[str],
+        num_workers: int = 1,
+        accept_name: Callable[[str], bool] | None = None,
+        accept_directory: Callable[[str], bool] | None = None,
+        max_queued_directories: int = 256,
+    ) -> None:
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+        self._num_workers: int = num_workers
+        self._accept_name: Callable[[str], bool] | None = accept_name
+        self._accept_directory: Callable[[str], bool] | None = accept_directory
+        self._roots: List[str] = [
+            os.fspath(root)
+            for root in roots
+            if accept_directory is None or accept_directory(os.fspath(root))
+        ]
+        self._max_queued_directories: int = max_queued_directories
+
+    def __iter__(self) -> Iterator[str]:
+        if self._num_workers == 1:
+            return self._iter_serial()
+        return self._iter_parallel()
+
+    def _scan_directory(self, path: str) -> TDirectoryListing:
+        """List one directory.
+
+        Returns:
+            Tuple[List[str], List[str]]: The accepted file paths and the
+                subdirectory paths.
+        """
+        files: List[str] = []
+        directories: List[str] = []
+        accept_name = self._accept_name
+        accept_directory = self._accept_directory
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        if not entry.is_symlink() and (
+                            accept_directory is None or accept_directory(entry.path)
+                        ):
+                            directories.append(entry.path)
+                    elif accept_name is None or accept_name(entry.name):
+                        files.append(entry.path)
+        except OSError as e:
+            logger.warning("Skipping unreadable directory {}: {}", path, e)
+        # scandir returns entries in file system order
+        files.sort()
+        directories.sort()
+        return files, directories
+
+    def _iter_serial(self) -> Iterator[str]:
+        stack: List[str] = list(reversed(self._roots))
+        while stack:
+            files, directories = self._scan_directory(stack.pop())
+            yield from files
+            stack.extend(reversed(directories))
+
+    def _iter_parallel(self) -> Iterator[str]:
+        # The directories still to yield, next last, each with its listing
+        # once that is submitted to the pool
+        stack: List[Tuple[str, Future[TDirectoryListing] | None]] = [
+            (root, None) for root in reversed(self._roots)
+        ]
+        listed_ahead = 0
+        with ThreadPoolExecutor(
+            self._num_workers, thread_name_prefix="nre-scan"
+        ) as pool:
+            try:
+                while stack:
+                    # List the next directories in yield order ahead; the one
+                    # on top is always among them
+                    for index in range(len(stack) - 1, -1, -1):
+                        if listed_ahead >= self._max_queued_directories:
+                            break
+                        path, listing = stack[index]
+                        if listing is None:
+                            stack[index] = (path, pool.submit(self._scan_directory, path))
+                            listed_ahead += 1
+                    path, listing = stack.pop()
+                    listed_ahead -= 1
+                    files, directories = cast(Future, listing).result()
+                    yield from files
+                    stack.extend((directory, None) for directory in reversed(directories))
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def __repr__(self) -> str:
+        return f"DirectoryScanner(roots={self._roots}, num_workers={self._num_workers})"
@@ -4,23 +4,59 @@ FileSystemReader class for recursively iterating over files in a directory.
 
 from __future__ import annotations
 
+import mmap
 import os
 from pathlib import Path
-from typing import Any, Generator, List, Union
+from typing import Any, Generator, Iterable, Iterator, List, Set, Union
 
 from loguru import logger
 
-from nre_pipeline.models import Document
-from nre_pipeline.models._batch import DocumentBatch, DocumentBatchBuilder
+from nre_pipeline.models import Document, MappedDocument
+from nre_pipeline.models._batch import DocumentBatch
 from nre_pipeline.common.base._base_reader import CorpusReader
+from nre_pipeline.reader._directory_scanner import DirectoryScanner
+from nre_pipeline.reader._mapped_splitter import MappedFileSplitter
+from nre_pipeline.reader._path_filter import PathFilter
+from nre_pipeline.reader._prefetch import ReadLatencyStats, ReadPrefetcher
 from loguru import logger
 
 
+# How files are split between reader shards
+PARTITIONS = ("hash", "directory")
+
+
 class FileSystemReader(CorpusReader):
     """
     A class that provides recursive iteration over files in a filesystem directory.
 
     Inherits from CorpusReader to provide concrete implementation of file iteration.
+    Each Document's metadata holds the file ``path``, ``mtime_ns`` and ``size``;
+    with ``resume=True`` files whose note id, mtime and size are in the
+    processed-note manifest are skipped before being read.
+
+    Directories are listed with ``os.scandir`` by ``scan_workers`` threads
+    and files are prefetched by ``read_workers`` threads, with an estimated
+    ``prefetch_estimated_bytes`` read ahead of the batch builder (reads in
+    flight count as the mean file size so far); documents still reach the
+    batch builder in the order the scanner yields their paths.
+    Read latency statistics are logged once the input is exhausted.
+
+    With ``num_shards > 1`` (see ``CorpusReader.create_readers``) the files
+    are partitioned between readers. The ``hash`` partition assigns each file
+    by a hash of its path: the shards are balanced, but every reader lists
+    the whole tree. The ``directory`` partition deals the subdirectories of
+    the input paths out round-robin (files directly in an input path are
+    hashed) and each reader only lists its own directories.
+
+    With a ``split_delimiter`` or ``split_pattern``, files of at least
+    ``split_min_bytes`` (e.g. concatenated notes or OCR dumps) are memory
+    mapped and split into one document per note (see MappedFileSplitter).
+    The documents are MappedDocument slices of the mapping, decoded only
+    when their text is used or their batch is queued, so the whole decoded
+    file is never held. Their note id is the captured ``note_id`` or
+    ``<file note id>_<n>``, and their metadata adds the byte ``offset`` of
+    the note in the file. Unlike whole files, their text is not
+    newline-translated.
 
     Attributes:
         path (List[Path]): The root paths to iterate from
@@ -33,14 +69,39 @@ class FileSystemReader(CorpusReader):
         input_paths: List[str | Path] | Path | str,
         allowed_extensions: List[str] | None = None,
         excluded_paths: List[str | Path] | None = None,
+        scan_workers: int | None = None,
+        read_workers: int | None = None,
+        prefetch_estimated_bytes: int | None = None,
+        partition: str | None = None,
+        split_delimiter: str | None = None,
+        split_pattern: str | None = None,
+        split_min_bytes: int | None = None,
         **config,
     ) -> None:
         super().__init__(**config)
+        self._scan_workers: int = self._get_worker_count(
+            scan_workers, "READER_SCAN_WORKERS"
+        )
+        self._read_workers: int = self._get_worker_count(
+            read_workers, "READER_READ_WORKERS"
+        )
+        self._prefetch_estimated_bytes: int = self._get_prefetch_estimated_bytes(
+            prefetch_estimated_bytes
+        )
+        self._read_stats: ReadLatencyStats = ReadLatencyStats()
+        self._partition: str = self._get_partition(partition)
+        # Subdirectories of the roots listed by this reader (directory partition)
+        self._shard_directories: Set[str] | None = None
+        self._splitter: MappedFileSplitter | None = self._get_splitter(
+            split_delimiter, split_pattern
+        )
+        self._split_min_bytes: int = self._get_split_min_bytes(split_min_bytes)
 
         ################################################################
         # Path initialization and validation
         ################################################################
         self._path: List[Path] = self._normalize_input_paths(input_paths)
+        self._root_paths: Set[str] = {os.path.abspath(p) for p in self._path}
 
         ################################################################
         # Accepted Extensions
@@ -52,11 +113,34 @@ class FileSystemReader(CorpusReader):
         ################################################################
         self._exclude: List[Path] = self._normalize_excluded_paths(excluded_paths)
 
+        # Extensions and exclusions compiled once; no syscalls per file
+        self._path_filter: PathFilter = PathFilter(self._extensions, self._exclude)
+
         self._debug_log("FileSystemReader loaded")
 
     def get_process_name(self):
         return f"FileSystemReader"
 
+    def _get_worker_count(self, workers: int | None, env_var: str) -> int:
+        """Get the size of a reader thread pool.
+
+        Args:
+            workers (int | None): The desired thread count. Defaults to the
+                ``env_var`` environment variable, then to 1.
+            env_var (str): The environment variable holding the default.
+
+        Raises:
+            ValueError: If the thread count is less than 1.
+
+        Returns:
+            int: The thread count.
+        """
+        if workers is None:
+            workers = int(os.getenv(env_var, 1) or 1)
+        if workers < 1:
+            raise ValueError(f"{env_var} must be at least 1")
+        return workers
+
     def make_doc(self, source: Path | str) -> Document:
         """Create a Document from a file path.
 
@@ -74,11 +158,114 @@ class FileSystemReader(CorpusReader):
         note_id: str = self._get_note_id(source_path)
         return self._read_document(source_path, note_id)
 
+    def _get_partition(self, partition: str | None = None) -> str:
+        """Get how the files are partitioned between reader shards.
+
+        Args:
+            partition (str | None, optional): "hash" or "directory". Defaults to
+                the READER_PARTITION environment variable, then "hash".
+
+        Raises:
+            ValueError: If the partition is not supported.
+
+        Returns:
+            str: The partition.
+        """
+        if partition is None:
+            partition = os.getenv("READER_PARTITION", "hash") or "hash"
+        partition = partition.lower()
+        if partition not in PARTITIONS:
+            raise ValueError(f"partition must be one of {PARTITIONS}, got {partition}")
+        return partition
+
+    def _get_prefetch_estimated_bytes(
+        self, prefetch_estimated_bytes: int | None = None
+    ) -> int:
+        """Get the estimated bytes to read ahead of the batch builder.
+
+        Files are not stat'ed before they are read, so a read in flight counts
+        as the mean size of the files read so far; files much larger than the
+        mean can overshoot the estimate.
+
+        Args:
+            prefetch_estimated_bytes (int | None, optional): The desired
+                estimate in bytes. Defaults to the READER_PREFETCH_ESTIMATED_MB
+                environment variable.
+
+        Raises:
+            ValueError: If the estimate is not positive.
+
+        Returns:
+            int: The estimate in bytes.
+        """
+        if prefetch_estimated_bytes is None:
+            prefetch_estimated_bytes = (
+                int(os.getenv("READER_PREFETCH_ESTIMATED_MB", 64) or 64) * 1024 * 1024
+            )
+        if prefetch_estimated_bytes <= 0:
+            raise ValueError("prefetch_estimated_bytes must be a positive integer")
+        return prefetch_estimated_bytes
+
+    def _get_splitter(
+        self, split_delimiter: str | None = None, split_pattern: str | None = None
+    ) -> MappedFileSplitter | None:
+        """Get the splitter of large files into documents.
+
+        Args:
+            split_delimiter (str | None, optional): The literal separator between
+                notes. Defaults to the READER_SPLIT_DELIMITER environment variable.
+            split_pattern (str | None, optional): The regular expression between
+                notes. Defaults to the READER_SPLIT_PATTERN environment variable.
+
+        Raises:
+            ValueError: If both a delimiter and a pattern are set.
+
+        Returns:
+            MappedFileSplitter | None: The splitter, or None to read every file
+                as one document.
+        """
+        if split_delimiter is None and split_pattern is None:
+            split_delimiter = os.getenv("READER_SPLIT_DELIMITER", None) or None
+            split_pattern = os.getenv("READER_SPLIT_PATTERN", None) or None
+        if split_delimiter is None and split_pattern is None:
+            return None
+        if split_delimiter is not None and split_pattern is not None:
+            raise ValueError("Set either split_delimiter or split_pattern, not both")
+        return MappedFileSplitter(split_delimiter, split_pattern)
+
+    def _get_split_min_bytes(self, split_min_bytes: int | None = None) -> int:
+        """Get the size from which files are memory mapped and split.
+
+        Args:
+            split_min_bytes (int | None, optional): The desired size in bytes.
+                Defaults to the READER_SPLIT_MIN_MB environment variable.
+
+        Raises:
+            ValueError: If the size is negative.
+
+        Returns:
+            int: The size in bytes; 0 splits every file.
+        """
+        if split_min_bytes is None:
+            split_min_bytes = int(os.getenv("READER_SPLIT_MIN_MB", 64) or 0) * 1024 * 1024
+        if split_min_bytes < 0:
+            raise ValueError("split_min_bytes must not be negative")
+        return split_min_bytes
+
+    @property
+    def read_stats(self) -> ReadLatencyStats:
+        """Latency statistics of the reads done by this reader's ``_iter``."""
+        return self._read_stats
+
+    def _read_file(self, file_path: str) -> Document:
+        """Read a scanned file without the validation done by ``make_doc``."""
+        return self._read_document(file_path, self._get_note_id(file_path))
+
     def _read_document(self, source_path, note_id) -> Document:
         """Reads a document from the filesystem.
 
         Args:
-            source_path (Path): The path to the source file.
+            source_path (Path | str): The path to the source file.
             note_id (str): The ID of the note.
 
         Returns:
@@ -90,20 +277,63 @@ class FileSystemReader(CorpusReader):
             with open(
                 source_path, "r", encoding="utf-8", errors="ignore", buffering=8192
             ) as f:
+                stat = os.fstat(f.fileno())
+                metadata = {
+                    "path": str(source_path),
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                }
+                if self._is_split_file(stat.st_size):
+                    # The mapping outlives the file handle; _iter splits it
+                    buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    return MappedDocument(
+                        note_id, buffer, 0, stat.st_size, metadata=metadata
+                    )
                 text = f.read()
         except Exception as e:
             logger.error(f"Error reading file {source_path}: {e}")
             text = ""  # Return empty string rather than failing
             valid_document = False
+            metadata = {"path": str(source_path)}
 
         document: Document = Document(
             note_id=note_id,
             text=text,
             valid=valid_document,
-            metadata={"path": str(source_path)},
+            metadata=metadata,
         )
         return document
 
+    def _is_split_file(self, size: int) -> bool:
+        return self._splitter is not None and 0 < size and size >= self._split_min_bytes
+
+    def _split_documents(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Replace every mapped file by the documents it holds.
+
+        Args:
+            documents (Iterable[Document]): The documents read, one per file.
+
+        Yields:
+            Iterator[Document]: The documents, with mapped files split.
+        """
+        for document in documents:
+            if not isinstance(document, MappedDocument) or self._splitter is None:
+                yield document
+                continue
+            count = 0
+            for start, end, note_id in self._splitter.split(document.buffer):
+                metadata = {**document.metadata, "offset": start}
+                split_note_id = note_id or f"{document.note_id}_{count}"
+                count += 1
+                if self._is_completed(
+                    split_note_id, metadata.get("mtime_ns"), metadata.get("size")
+                ):
+                    continue
+                yield MappedDocument(
+                    split_note_id, document.buffer, start, end, metadata=metadata
+                )
+            logger.debug("Split {} into {} documents", document.metadata["path"], count)
+
     def _normalize_source(self, source) -> Path:
         """Normalize the source input to a Path object.
 
@@ -123,16 +353,16 @@ class FileSystemReader(CorpusReader):
         source_path = Path(source)
         return source_path
 
-    def _get_note_id(self, source_path: Path) -> str:
+    def _get_note_id(self, source_path: Path | str) -> str:
         """Get the note ID from the source path.
 
         Args:
-            source_path (Path): The path to the source file.
+            source_path (Path | str): The path to the source file.
 
         Returns:
-            str: The ID of the note.
+            str: The ID of the note (the file name without its extension).
         """
-        return source_path.stem
+        return os.path.splitext(os.path.basename(source_path))[0]
 
     def _normalize_excluded_paths(self, excluded_paths) -> List[Path]:
         """Normalize excluded paths to a list of Path objects.
@@ -184,40 +414,134 @@ class FileSystemReader(CorpusReader):
         Yields:
             DocumentBatch: Each batch of Document objects
         """
-        files = self._files_to_process_iter()
-        filtered_files = (self.make_doc(f) for f in files if not self._is_excluded(f))
-        iteration_number = 0
+        files: Iterable[str] = self._files_to_process_iter()
+        if self._path_filter.filters_paths:
+            files = filter(self._path_filter.accepts_path, files)
+        if self._num_shards > 1:
+            files = filter(self._in_file_shard, files)
+        if self._resume:
+            files = (f for f in files if not self._is_completed_file(f))
+        filtered_files = self._split_documents(self._read_files(files))
         total_documents = 0
-        batch_size = self._doc_batch_size
 
-        batch_builder = DocumentBatchBuilder(batch_size)
+        batch_builder = self._new_batch_builder()
         for ff in filtered_files:
-            iteration_number += 1
-            batch: Union[DocumentBatch, None] = batch_builder.add_document(ff)
-            if batch is not None:
+            for batch in batch_builder.add(ff):
                 total_documents += len(batch)
                 yield batch
-                batch_builder = DocumentBatchBuilder(batch_size)
 
-        if batch_builder.has_docs():
-            batch = batch_builder.build()
+        for batch in batch_builder.flush():
             total_documents += len(batch)
             yield batch
 
         logger.info("Total Documents Read: {}", total_documents)
+        logger.info("Read latency: {}", self._read_stats)
+
+    def _read_files(self, files: Iterable[str]) -> Iterator[Document]:
+        """Prefetch files on ``read_workers`` threads, yielding them in input order.
+
+        Args:
+            files (Iterable[str]): The file paths to read.
+
+        Returns:
+            Iterator[Document]: One document per file.
+        """
+        prefetcher: ReadPrefetcher[str] = ReadPrefetcher(
+            self._read_file, self._read_workers, self._prefetch_estimated_bytes
+        )
+        self._read_stats = prefetcher.stats
+        return prefetcher(files)
+
+    def _is_completed_file(self, file_path: Path | str) -> bool:
+        """Check whether a file was completed by an earlier run (``resume=True`` only).
 
-    def _files_to_process_iter(self) -> Generator[Path, Any, None]:
+        Args:
+            file_path (Path | str): The file path to check.
+
+        Returns:
+            bool: True if the file should be skipped.
+        """
+        if not self._resume:
+            return False
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            # Let make_doc report the unreadable file
+            return False
+        return self._is_completed(
+            self._get_note_id(file_path), stat.st_mtime_ns, stat.st_size
+        )
+
+    def _files_to_process_iter(self) -> Iterator[str]:
         """Yield files to process from the input paths.
 
+        Files are listed by a DirectoryScanner with ``scan_workers`` threads;
+        the extension filter is applied to each name and excluded directories
+        are pruned without being listed. Excluded files and patterns are
+        checked by the caller.
+
         Yields:
-            Generator[Path, Any, None]: The file paths to process.
+            Iterator[str]: The absolute file paths to process.
         """
-        for p in self._path:
-            for root, _, files in os.walk(p):
-                for f in files:
-                    yield Path(root) / f
+        roots = [os.path.abspath(p) for p in self._path]
+        accept_directory = self._path_filter.accepts_directory
+        if self._num_shards > 1 and self._partition == "directory":
+            self._shard_directories = self._list_shard_directories(roots)
+            accept_directory = self._accepts_shard_directory
+        return iter(
+            DirectoryScanner(
+                roots,
+                num_workers=self._scan_workers,
+                accept_name=self._path_filter.accepts_name,
+                accept_directory=accept_directory,
+            )
+        )
+
+    def _list_shard_directories(self, roots: List[str]) -> Set[str]:
+        """Deal the subdirectories of the roots out to the shards, round-robin.
 
-    def _is_excluded(self, file_path: Path) -> bool:
+        Every reader lists the roots in the same sorted order, so the shards
+        agree on the assignment without talking to each other.
+
+        Args:
+            roots (List[str]): The absolute root paths.
+
+        Returns:
+            Set[str]: The subdirectories listed by this reader.
+        """
+        directories: List[str] = []
+        for root in roots:
+            try:
+                with os.scandir(root) as entries:
+                    directories.extend(
+                        sorted(
+                            entry.path
+                            for entry in entries
+                            if entry.is_dir(follow_symlinks=False)
+                        )
+                    )
+            except OSError as e:
+                logger.warning("Cannot list {}: {}", root, e)
+        return set(directories[self._shard_index :: self._num_shards])
+
+    def _accepts_shard_directory(self, directory: str) -> bool:
+        if not self._path_filter.accepts_directory(directory):
+            return False
+        if self._is_root_child(directory):
+            return directory in (self._shard_directories or ())
+        return True
+
+    def _is_root_child(self, file_path: str) -> bool:
+        return os.path.dirname(file_path) in self._root_paths
+
+    def _in_file_shard(self, file_path: str) -> bool:
+        """Check whether a listed file belongs to this reader's shard."""
+        if self._partition == "directory" and not self._is_root_child(file_path):
+            # Already chosen by its directory
+            return True
+        return self._in_shard(file_path)
+
+    def _is_excluded(self, file_path: Path | str) -> bool:
         """
         Check if a file path should be excluded from iteration.
 
@@ -227,36 +551,7 @@ class FileSystemReader(CorpusReader):
         Returns:
             bool: True if the file should be excluded, False otherwise
         """
-        # Extension filtering: if self._extensions is not None, only allow files with allowed extensions
-        if self._extensions is not None and len(self._extensions) > 0:
-            if file_path.suffix.lower() not in {
-                ext.lower() if ext.startswith(".") else "." + ext.lower()
-                for ext in self._extensions
-            }:
-                return True
-
-        for exclude_path in self._exclude:
-            # Check if the file path matches the exclude pattern
-            try:
-                # Try exact match first
-                if file_path.samefile(exclude_path):
-                    return True
-            except (OSError, FileNotFoundError):
-                # If files don't exist, fall back to string/pattern matching
-                pass
-
-            # Check if it's a subdirectory of an excluded directory
-            try:
-                if exclude_path.is_dir() and file_path.is_relative_to(exclude_path):
-                    return True
-            except (OSError, ValueError):
-                pass
-
-            # Check pattern matching (glob-style)
-            if file_path.match(str(exclude_path)):
-                return True
-
-        return False
+        return self._path_filter.is_excluded(file_path)
 
 
 ########################################################
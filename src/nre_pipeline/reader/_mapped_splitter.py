@@ -0,0 +1,122 @@
+"""
+Split memory-mapped note files into logical documents for FileSystemReader.
+"""
+
+import mmap
+import re
+from typing import Iterator, Pattern, Tuple
+
+# Named group of a split pattern holding the id of the note that follows
+NOTE_ID_GROUP = "note_id"
+
+
+class MappedFileSplitter:
+    """
+    Find the documents of a large file without reading it into memory.
+
+    Documents are separated either by a literal ``delimiter`` or by the
+    matches of a ``pattern`` (a regular expression over the raw bytes,
+    compiled with ``re.MULTILINE``). When the pattern has a ``note_id``
+    group, the text it captures names the document that follows the match;
+    other documents are numbered. The delimiter and pattern must be ASCII
+    (or at least whole UTF-8 characters), so a split never lands inside a
+    multi-byte character. Empty or whitespace-only documents are skipped.
+
+    The delimiter accepts backslash escapes such as ``\\f`` or ``\\n`` (as
+    does any regular expression), so both can be set from environment
+    variables.
+
+    Args:
+        delimiter (str | None, optional): The literal document separator.
+        pattern (str | None, optional): The separator regular expression.
+
+    Raises:
+        ValueError: If neither or both of delimiter and pattern are given.
+    """
+
+    def __init__(self, delimiter: str | None = None, pattern: str | None = None) -> None:
+        if (delimiter is None) == (pattern is None):
+            raise ValueError("Exactly one of delimiter and pattern must be given")
+        self._delimiter: bytes | None = None
+        self._pattern: Pattern[bytes] | None = None
+        if delimiter is not None:
+            self._delimiter = _unescape(delimiter).encode("utf-8")
+            if not self._delimiter:
+                raise ValueError("The split delimiter must not be empty")
+        else:
+            self._pattern = re.compile((pattern or "").encode("utf-8"), re.MULTILINE)
+
+    def split(self, buffer: mmap.mmap) -> Iterator[Tuple[int, int, str | None]]:
+        """Yield the ``(start, end, note_id)`` byte range of every document.
+
+        ``note_id`` is None unless the pattern captured one. The mapping is
+        scanned in place; only the matched separators are copied.
+
+        Args:
+            buffer (mmap.mmap): The mapped file.
+
+        Yields:
+            Iterator[Tuple[int, int, str | None]]: The document byte ranges, in
+                file order.
+        """
+        ranges = (
+            self._split_on_delimiter(buffer)
+            if self._delimiter is not None
+            else self._split_on_pattern(buffer)
+        )
+        for start, end, note_id in ranges:
+            if _is_blank(buffer, start, end):
+                continue
+            yield start, end, note_id
+
+    def _split_on_delimiter(self, buffer: mmap.mmap) -> Iterator[Tuple[int, int, None]]:
+        delimiter: bytes = self._delimiter or b""
+        start = 0
+        while True:
+            end = buffer.find(delimiter, start)
+            if end < 0:
+                yield start, len(buffer), None
+                return
+            yield start, end, None
+            start = end + len(delimiter)
+
+    def _split_on_pattern(
+        self, buffer: mmap.mmap
+    ) -> Iterator[Tuple[int, int, str | None]]:
+        assert self._pattern is not None
+        has_note_id: bool = NOTE_ID_GROUP in self._pattern.groupindex
+        start, note_id = 0, None
+        for match in self._pattern.finditer(buffer):  # type: ignore[arg-type]
+            if match.end() == match.start():
+                # An empty match separates nothing
+                continue
+            yield start, match.start(), note_id
+            start = match.end()
+            note_id = (
+                match.group(NOTE_ID_GROUP).decode("utf-8", "ignore").strip()
+                if has_note_id and match.group(NOTE_ID_GROUP) is not None
+                else None
+            ) or None
+        yield start, len(buffer), note_id
+
+    def __repr__(self) -> str:
+        if self._delimiter is not None:
+            return f"MappedFileSplitter(delimiter={self._delimiter!r})"
+        return f"MappedFileSplitter(pattern={self._pattern.pattern!r})"  # type: ignore[union-attr]
+
+
+def _unescape(value: str) -> str:
+    # Non-Latin-1 characters survive as \uXXXX escapes
+    return value.encode("latin-1", "backslashreplace").decode("unicode_escape")
+
+
+def _is_blank(buffer: mmap.mmap, start: int, end: int, probe_bytes: int = 4096) -> bool:
+    """Check whether a byte range holds only whitespace.
+
+    Only the first ``probe_bytes`` are copied unless they are all whitespace.
+    """
+    if start >= end:
+        return True
+    if not buffer[start : min(end, start + probe_bytes)].isspace():
+        return False
+    return end - start <= probe_bytes or buffer[start:end].isspace()
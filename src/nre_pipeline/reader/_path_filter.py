@@ -0,0 +1,205 @@
+"""
+Extension and exclusion filters for FileSystemReader, compiled once.
+"""
+
+import os
+import re
+from pathlib import PurePath
+from typing import Dict, FrozenSet, Iterable, List, Pattern
+
+
+def _glob_component_to_regex(component: str) -> str:
+    """Translate one glob path component to a regex that never crosses a separator."""
+    out: List[str] = []
+    i, n = 0, len(component)
+    while i < n:
+        c = component[i]
+        i += 1
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = i
+            if j < n and component[j] == "!":
+                j += 1
+            if j < n and component[j] == "]":
+                j += 1
+            while j < n and component[j] != "]":
+                j += 1
+            if j >= n:
+                out.append(re.escape(c))
+                continue
+            stuff = component[i:j].replace("\\", "\\\\")
+            i = j + 1
+            if stuff.startswith("!"):
+                stuff = "^/" + stuff[1:]
+            elif stuff.startswith("^"):
+                stuff = "\\" + stuff
+            out.append(f"[{stuff}]")
+        else:
+            out.append(re.escape(c))
+    return "".join(out)
+
+
+def glob_to_regex(pattern: str) -> str:
+    """Translate a glob with ``PurePath.match`` semantics to a regex.
+
+    A relative pattern matches the trailing path components (``*.md``
+    matches any Markdown file, ``drafts/*.txt`` any text file directly in a
+    ``drafts`` directory); an absolute pattern must match the whole path.
+
+    Args:
+        pattern (str): The glob pattern.
+
+    Returns:
+        str: A regex to ``search`` a ``/``-separated path with.
+    """
+    pure = PurePath(pattern)
+    parts = pure.parts
+    if pure.anchor:
+        parts = parts[1:]
+        prefix = "^/"
+    else:
+        prefix = "(?:^|/)"
+    return prefix + "/".join(_glob_component_to_regex(part) for part in parts) + "$"
+
+
+class DirectoryTrie:
+    """Prefix trie over path components, answering "is this path inside an
+    excluded directory" without touching the filesystem."""
+
+    def __init__(self, directories: Iterable[str] = ()) -> None:
+        self._root: Dict[str, dict] = {}
+        for directory in directories:
+            self.add(directory)
+
+    @staticmethod
+    def _components(path: str) -> List[str]:
+        return [part for part in path.split(os.sep) if part]
+
+    def add(self, directory: str) -> None:
+        node = self._root
+        for part in self._components(directory):
+            node = node.setdefault(part, {})
+        # An empty dict marks the end of an excluded directory
+        node[""] = {}
+
+    def covers(self, path: str) -> bool:
+        """Return True if ``path`` is an excluded directory or inside one."""
+        node = self._root
+        if "" in node:
+            return True
+        for part in self._components(path):
+            child = node.get(part)
+            if child is None:
+                return False
+            if "" in child:
+                return True
+            node = child
+        return False
+
+    def __bool__(self) -> bool:
+        return bool(self._root)
+
+
+class PathFilter:
+    """
+    Decide which files FileSystemReader reads, with no syscalls per file.
+
+    Everything is compiled once at construction:
+
+    - the allowed extensions into a frozenset of lower-case suffixes;
+    - excluded entries that are existing directories into a DirectoryTrie,
+      which the directory scanner uses to prune whole subtrees;
+    - excluded entries that are existing files into a set of absolute paths;
+    - every excluded entry, as a glob pattern, into one alternation regex.
+
+    Paths are compared after ``os.path.abspath``; symbolic links and hard
+    links are not resolved.
+
+    Args:
+        allowed_extensions (Iterable[str] | None, optional): Extensions to read,
+            with or without the leading dot. Defaults to every extension.
+        excluded_paths (Iterable[str | os.PathLike] | None, optional): Files,
+            directories or glob patterns to skip.
+    """
+
+    def __init__(
+        self,
+        allowed_extensions: Iterable[str] | None = None,
+        excluded_paths: Iterable[str | os.PathLike] | None = None,
+    ) -> None:
+        # None (or no extensions) reads every file
+        self._suffixes: FrozenSet[str] | None = None
+        if allowed_extensions:
+            self._suffixes = frozenset(
+                ext.lower() if ext.startswith(".") else "." + ext.lower()
+                for ext in allowed_extensions
+            )
+
+        excluded: List[str] = [os.fspath(p) for p in (excluded_paths or [])]
+        self._excluded_directories = DirectoryTrie(
+            os.path.abspath(p) for p in excluded if os.path.isdir(p)
+        )
+        self._excluded_files: FrozenSet[str] = frozenset(
+            os.path.abspath(p) for p in excluded if os.path.isfile(p)
+        )
+        self._excluded_pattern: Pattern[str] | None = (
+            re.compile(
+                "|".join(f"(?:{glob_to_regex(p)})" for p in excluded),
+                re.IGNORECASE if os.name == "nt" else 0,
+            )
+            if excluded
+            else None
+        )
+
+    @property
+    def filters_paths(self) -> bool:
+        """True if ``accepts_path`` can reject a file whose name was accepted."""
+        return bool(self._excluded_files) or self._excluded_pattern is not None
+
+    def accepts_name(self, file_name: str) -> bool:
+        """Check a file name against the allowed extensions."""
+        if self._suffixes is None:
+            return True
+        dot = file_name.rfind(".")
+        # A leading dot (e.g. ".txt") is a hidden file name, not a suffix
+        return dot > 0 and file_name[dot:].lower() in self._suffixes
+
+    def accepts_directory(self, directory: str) -> bool:
+        """Check that an absolute directory path is not excluded."""
+        return not self._excluded_directories.covers(directory)
+
+    def accepts_path(self, file_path: str) -> bool:
+        """Check an absolute file path against the excluded files and patterns."""
+        if file_path in self._excluded_files:
+            return False
+        if self._excluded_pattern is not None:
+            search_path = file_path if os.sep == "/" else file_path.replace(os.sep, "/")
+            if self._excluded_pattern.search(search_path):
+                return False
+        return True
+
+    def is_excluded(self, file_path: str | os.PathLike) -> bool:
+        """Apply every filter to a single file path.
+
+        Args:
+            file_path (str | os.PathLike): The file path to check.
+
+        Returns:
+            bool: True if the file should not be read.
+        """
+        path = os.path.abspath(file_path)
+        return not (
+            self.accepts_name(os.path.basename(path))
+            and self.accepts_directory(os.path.dirname(path))
+            and self.accepts_path(path)
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"PathFilter(suffixes={sorted(self._suffixes) if self._suffixes else None}, "
+            f"excluded_files={len(self._excluded_files)}, "
+            f"excluded_directories={bool(self._excluded_directories)})"
+        )
@@ -0,0 +1,370 @@
+"""
+SQLReader class for paging notes out of a database over a DB-API connection.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, Generator, Iterator, List, Tuple
+
+from loguru import logger
+
+from nre_pipeline.common.base._base_reader import CorpusReader
+from nre_pipeline.models import Document
+from nre_pipeline.models._batch import DocumentBatch
+
+# Name of the cursor on drivers with named (server-side) cursors
+SERVER_CURSOR_NAME = "nre_sql_reader"
+
+# Driver modules whose connection.cursor(name=...) opens a server-side cursor
+SERVER_CURSOR_DRIVERS = ("psycopg2", "psycopg")
+
+# Bind parameter placeholders by DB-API paramstyle
+_PLACEHOLDERS: Dict[str, Callable[[int], str]] = {
+    "qmark": lambda i: "?",
+    "format": lambda i: "%s",
+    "pyformat": lambda i: "%s",
+    "numeric": lambda i: f":{i + 1}",
+    "named": lambda i: f":p{i}",
+}
+
+
+def _driver_name(connection) -> str:
+    """Get the name of the DB-API module a connection comes from."""
+    return type(connection).__module__.split(".")[0]
+
+
+def _driver_paramstyle(connection) -> str:
+    """Get the paramstyle of the DB-API module a connection comes from."""
+    module = sys.modules.get(_driver_name(connection))
+    return getattr(module, "paramstyle", "qmark")
+
+
+class SQLReader(CorpusReader):
+    """
+    Read notes from a database table with keyset pagination.
+
+    Each page is ``SELECT ... WHERE note_id > <last id of the previous page>
+    ORDER BY note_id LIMIT page_size``, so every page is an index range scan
+    however deep into the table it is, where ``OFFSET`` re-scans every row
+    before the page. ``note_id_column`` must therefore be unique and indexed.
+    Rows are pulled ``fetch_size`` at a time; with ``server_side_cursor``
+    (the default for psycopg2 and psycopg) from a named cursor that keeps
+    the page on the server. sqlite3 cursors already step through the result
+    without materializing it.
+
+    With ``num_shards > 1`` each reader reads a disjoint note id range: integer
+    ids split the ``[MIN, MAX]`` range evenly, other ids are split at
+    quantiles found on the index. Every shard must use the same table and
+    ``where`` clause.
+
+    The table, column names and ``where`` clause are inserted into the SQL
+    as given, not escaped. Pages use ``LIMIT``; override ``_page_query`` for
+    databases without it. The connection is opened by calling ``connect`` in
+    the reader process, so it must be picklable (a module-level function or
+    ``functools.partial(sqlite3.connect, path)``). Database rows have no
+    mtime or size, so ``resume=True`` skips notes by note id alone.
+
+    Args:
+        connect (Callable[[], Any]): Opens a DB-API connection.
+        table (str): The table or view holding the notes.
+        note_id_column (str, optional): The column of the note id.
+        text_column (str, optional): The column of the note text.
+        metadata_columns (List[str] | Dict[str, str] | None, optional): The
+            columns copied into the metadata.
+        where (str | None, optional): A filter on the rows, without parameters.
+        page_size (int | None, optional): Rows per page. Defaults to the
+            READER_SQL_PAGE_SIZE environment variable, then 10000.
+        fetch_size (int, optional): Rows fetched from the cursor at a time.
+        paramstyle (str | None, optional): The driver's DB-API paramstyle.
+            Defaults to the ``paramstyle`` of the connection's module.
+        server_side_cursor (bool | None, optional): Open pages with
+            ``connection.cursor(name=...)``. Defaults to True for psycopg2 and
+            psycopg connections, False otherwise.
+        shard_index (int | None, optional): The id range read by this reader.
+            Defaults to the READER_SHARD_INDEX environment variable, then 0.
+        num_shards (int | None, optional): The number of id ranges. Defaults
+            to the READER_NUM_SHARDS environment variable, then 1.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        table: str,
+        note_id_column: str = "note_id",
+        text_column: str = "text",
+        metadata_columns: List[str] | Dict[str, str] | None = None,
+        where: str | None = None,
+        page_size: int | None = None,
+        fetch_size: int = 1000,
+        paramstyle: str | None = None,
+        server_side_cursor: bool | None = None,
+        **config,
+    ) -> None:
+        super().__init__(**config)
+        self._connect: Callable[[], Any] = connect
+        self._table: str = table
+        self._note_id_column: str = note_id_column
+        self._text_column: str = text_column
+        if isinstance(metadata_columns, dict):
+            self._metadata_columns: Dict[str, str] = dict(metadata_columns)
+        else:
+            self._metadata_columns = {c: c for c in metadata_columns or []}
+        # The note id is selected first; the keyset continues from it
+        self._columns: List[str] = list(
+            dict.fromkeys([note_id_column, text_column, *self._metadata_columns])
+        )
+        self._text_index: int = self._columns.index(text_column)
+        self._metadata_indexes: List[Tuple[str, int]] = [
+            (key, self._columns.index(column))
+            for column, key in self._metadata_columns.items()
+        ]
+        self._where: str | None = where
+        self._page_size: int = self._get_page_size(page_size)
+        if fetch_size < 1:
+            raise ValueError("fetch_size must be at least 1")
+        self._fetch_size: int = fetch_size
+        if paramstyle is not None and paramstyle not in _PLACEHOLDERS:
+            raise ValueError(f"Unsupported paramstyle: {paramstyle}")
+        self._paramstyle: str | None = paramstyle
+        self._server_side_cursor: bool | None = server_side_cursor
+
+        self._debug_log("SQLReader loaded")
+
+    def get_process_name(self):
+        return f"SQLReader"
+
+    def _get_page_size(self, page_size: int | None = None) -> int:
+        """Get the number of rows per page.
+
+        Args:
+            page_size (int | None, optional): The desired page size. Defaults to
+                the READER_SQL_PAGE_SIZE environment variable, then 10000.
+
+        Raises:
+            ValueError: If the page size is less than 1.
+
+        Returns:
+            int: The page size.
+        """
+        if page_size is None:
+            page_size = int(os.getenv("READER_SQL_PAGE_SIZE", 10000) or 10000)
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        return page_size
+
+    @property
+    def columns(self) -> List[str]:
+        """The columns selected from each row."""
+        return self._columns
+
+    def _placeholder(self, index: int) -> str:
+        return _PLACEHOLDERS[self._paramstyle or "qmark"](index)
+
+    def _bind(self, values: List[Any]) -> Tuple[Any, ...] | Dict[str, Any]:
+        if self._paramstyle == "named":
+            return {f"p{i}": value for i, value in enumerate(values)}
+        return tuple(values)
+
+    def _conditions(self, lower: Any, upper: Any) -> Tuple[List[str], List[Any]]:
+        """Build the filter of the rows with ``lower < note_id <= upper``.
+
+        Args:
+            lower (Any): The exclusive lower bound, or None for no bound.
+            upper (Any): The inclusive upper bound, or None for no bound.
+
+        Returns:
+            Tuple[List[str], List[Any]]: The conditions and their parameters.
+        """
+        conditions: List[str] = [f"({self._where})"] if self._where else []
+        params: List[Any] = []
+        if lower is not None:
+            conditions.append(f"{self._note_id_column} > {self._placeholder(len(params))}")
+            params.append(lower)
+        if upper is not None:
+            conditions.append(f"{self._note_id_column} <= {self._placeholder(len(params))}")
+            params.append(upper)
+        return conditions, params
+
+    def _page_query(self, lower: Any, upper: Any) -> Tuple[str, List[Any]]:
+        """Build the query of the page after ``lower``, up to ``upper``.
+
+        Args:
+            lower (Any): The last note id of the previous page, or None.
+            upper (Any): The inclusive upper bound of the shard, or None.
+
+        Returns:
+            Tuple[str, List[Any]]: The query and its parameters.
+        """
+        conditions, params = self._conditions(lower, upper)
+        query = f"SELECT {', '.join(self.columns)} FROM {self._table}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY {self._note_id_column} LIMIT {self._page_size}"
+        return query, params
+
+    def _cursor(self, connection):
+        """Open the cursor of a page, server-side with ``server_side_cursor``."""
+        if self._server_side_cursor:
+            cursor = connection.cursor(name=SERVER_CURSOR_NAME)
+        else:
+            cursor = connection.cursor()
+        cursor.arraysize = self._fetch_size
+        return cursor
+
+    def _fetch_value(self, connection, query: str, params: List[Any]) -> Any:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(query, self._bind(params))
+            row = cursor.fetchone()
+            return row[0] if row else None
+        finally:
+            cursor.close()
+
+    def _shard_bounds(self, connection) -> Tuple[Any, Any]:
+        """Get the note id range ``(lower, upper]`` of this reader's shard.
+
+        Args:
+            connection: The open connection.
+
+        Returns:
+            Tuple[Any, Any]: The exclusive lower and inclusive upper bound;
+                None where the range is open.
+        """
+        if self._num_shards == 1:
+            return None, None
+        conditions, params = self._conditions(None, None)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        column, table = self._note_id_column, self._table
+        low = self._fetch_value(connection, f"SELECT MIN({column}) FROM {table}{where}", params)
+        high = self._fetch_value(connection, f"SELECT MAX({column}) FROM {table}{where}", params)
+        if low is None:
+            return None, None
+
+        shards = range(self._shard_index, self._shard_index + 2)
+        if isinstance(low, int) and isinstance(high, int):
+            bounds = [low - 1 + (high - low + 1) * k // self._num_shards for k in shards]
+        else:
+            count = self._fetch_value(
+                connection, f"SELECT COUNT(*) FROM {table}{where}", params
+            )
+            bounds = [
+                self._fetch_value(
+                    connection,
+                    f"SELECT {column} FROM {table}{where} ORDER BY {column} "
+                    f"LIMIT 1 OFFSET {max(count * k // self._num_shards - 1, 0)}",
+                    params,
+                )
+                for k in shards
+            ]
+        # Open ends below the first shard and above the last
+        lower = None if self._shard_index == 0 else bounds[0]
+        upper = None if self._shard_index == self._num_shards - 1 else bounds[1]
+        return lower, upper
+
+    def make_doc(self, source: Tuple[Any, ...]) -> Document:
+        """Create a Document from a row selected in ``columns`` order.
+
+        Args:
+            source (Tuple[Any, ...]): The row.
+
+        Returns:
+            Document: The created Document object; invalid if the text is null.
+        """
+        metadata: Dict[str, Any] = {"source": self._table}
+        for key, index in self._metadata_indexes:
+            metadata[key] = source[index]
+        text = source[self._text_index]
+        if text is None:
+            return Document(note_id=source[0], text="", valid=False, metadata=metadata)
+        return Document(
+            note_id=source[0],
+            text=text if isinstance(text, str) else str(text),
+            valid=True,
+            metadata=metadata,
+        )
+
+    def _iter_rows(self, connection, lower: Any, upper: Any) -> Iterator[Tuple[Any, ...]]:
+        """Yield the rows with ``lower < note_id <= upper`` in note id order, page by page.
+
+        Args:
+            connection: The open connection.
+            lower (Any): The exclusive lower bound, or None.
+            upper (Any): The inclusive upper bound, or None.
+
+        Yields:
+            Tuple[Any, ...]: Each row, in ``columns`` order
+        """
+        pages = 0
+        query_seconds = 0.0
+        while True:
+            query, params = self._page_query(lower, upper)
+            cursor = self._cursor(connection)
+            rows_in_page = 0
+            try:
+                start = time.perf_counter()
+                cursor.execute(query, self._bind(params))
+                rows = cursor.fetchmany(self._fetch_size)
+                query_seconds += time.perf_counter() - start
+                while rows:
+                    for row in rows:
+                        yield row
+                    rows_in_page += len(rows)
+                    lower = rows[-1][0]
+                    rows = cursor.fetchmany(self._fetch_size)
+            finally:
+                cursor.close()
+            pages += 1
+            if rows_in_page < self._page_size:
+                break
+        self._debug_log(
+            f"Read {pages} pages, {query_seconds:.2f}s waiting for their first rows"
+        )
+
+    def _iter(self) -> Generator[DocumentBatch, Any, None]:
+        """
+        Return an iterator that yields the notes of this reader's id range in batches.
+
+        Yields:
+            DocumentBatch: Each batch of Document objects
+        """
+        # Opened here so the connection belongs to the reader process
+        connection = self._connect()
+        if self._paramstyle is None:
+            self._paramstyle = _driver_paramstyle(connection)
+        if self._server_side_cursor is None:
+            self._server_side_cursor = _driver_name(connection) in SERVER_CURSOR_DRIVERS
+        try:
+            lower, upper = self._shard_bounds(connection)
+            logger.info(
+                "Shard {}/{}: {} < {} <= {}",
+                self._shard_index + 1,
+                self._num_shards,
+                lower,
+                self._note_id_column,
+                upper,
+            )
+            total_documents = 0
+            batch_builder = self._new_batch_builder()
+            for row in self._iter_rows(connection, lower, upper):
+                document = self.make_doc(row)
+                if self._is_completed(document.note_id, None, None):
+                    continue
+                for batch in batch_builder.add(document):
+                    total_documents += len(batch)
+                    yield batch
+            for batch in batch_builder.flush():
+                total_documents += len(batch)
+                yield batch
+        finally:
+            connection.close()
+
+        logger.info("Total Documents Read: {}", total_documents)
+
+    def __repr__(self) -> str:
+        return (
+            f"SQLReader(table={self._table}, columns={self.columns}, "
+            f"page_size={self._page_size}, shard={self._shard_index}/{self._num_shards})"
+        )
@@ -0,0 +1,536 @@
+"""
+Readers for notes exported as tables: JSONL, CSV and Parquet files.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+from abc import abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any, Dict, Generator, Iterator, List, Mapping, Sequence, Tuple
+
+from loguru import logger
+
+from nre_pipeline.common.base._base_reader import CorpusReader
+from nre_pipeline.models import Document
+from nre_pipeline.models._batch import DocumentBatch
+from nre_pipeline.reader._directory_scanner import DirectoryScanner
+
+# Bytes of lines read per call while streaming a text file
+READ_CHUNK_BYTES = 1024 * 1024
+
+
+def _import_pyarrow_parquet():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet input requires the pyarrow package") from e
+    return pq
+
+
+def shard_byte_ranges(
+    sizes: Sequence[int], shard_index: int, num_shards: int
+) -> List[Tuple[int, int, int]]:
+    """Get the byte ranges of the input files read by one shard.
+
+    The files are laid end to end and the total is cut into ``num_shards``
+    contiguous ranges of equal size, so one large file is split between
+    shards and many small files are spread over them.
+
+    Args:
+        sizes (Sequence[int]): The file sizes, in the order all shards agree on.
+        shard_index (int): The shard, in ``[0, num_shards)``.
+        num_shards (int): The number of shards.
+
+    Returns:
+        List[Tuple[int, int, int]]: ``(file_index, start, end)`` for each file
+            the shard reads, with ``[start, end)`` relative to the file.
+    """
+    total = sum(sizes)
+    low = total * shard_index // num_shards
+    high = total * (shard_index + 1) // num_shards
+    ranges: List[Tuple[int, int, int]] = []
+    file_start = 0
+    for file_index, size in enumerate(sizes):
+        file_end = file_start + size
+        start, end = max(low, file_start), min(high, file_end)
+        if start < end:
+            ranges.append((file_index, start - file_start, end - file_start))
+        file_start = file_end
+    return ranges
+
+
+@dataclass
+class TabularRow:
+    """One row of a table, before it is mapped onto a Document."""
+
+    values: Mapping[str, Any]
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class TabularReader(CorpusReader):
+    """
+    Abstract base class for readers of notes stored one per table row.
+
+    Columns are mapped onto the Document: ``note_id_column`` and
+    ``text_column`` give the note id and text, and ``metadata_columns``
+    (a list of column names, or a dict of column name to metadata key) are
+    copied into the metadata. The metadata also holds the file ``path``,
+    its ``mtime_ns`` and ``size`` and the row's position in the file, so
+    ``resume=True`` skips rows completed by an earlier run of the same file.
+    Rows without a note id are logged and skipped; a row with a null text
+    becomes an invalid Document.
+
+    Files are streamed in chunks, never loaded whole. With ``num_shards > 1``
+    the input is cut into byte ranges (see ``shard_byte_ranges``) and this
+    reader only reads the rows that start in range ``shard_index``, so
+    several reader processes can share one large file. Every shard must be
+    given the same input paths.
+
+    Args:
+        input_paths (List[str | Path] | Path | str): Files, or directories
+            searched recursively for files with the reader's suffixes.
+        note_id_column (str, optional): The column of the note id.
+        text_column (str, optional): The column of the note text.
+        metadata_columns (List[str] | Dict[str, str] | None, optional): The
+            columns copied into the metadata.
+        shard_index (int | None, optional): The byte range read by this reader.
+            Defaults to the READER_SHARD_INDEX environment variable, then 0.
+        num_shards (int | None, optional): The number of byte ranges. Defaults
+            to the READER_NUM_SHARDS environment variable, then 1.
+    """
+
+    SUFFIXES: Tuple[str, ...] = ()
+
+    def __init__(
+        self,
+        input_paths: List[str | Path] | Path | str,
+        note_id_column: str = "note_id",
+        text_column: str = "text",
+        metadata_columns: List[str] | Dict[str, str] | None = None,
+        **config,
+    ) -> None:
+        super().__init__(**config)
+        self._input_paths: List[str] = self._normalize_input_paths(input_paths)
+        self._note_id_column: str = note_id_column
+        self._text_column: str = text_column
+        self._metadata_columns: Dict[str, str] = self._normalize_metadata_columns(
+            metadata_columns
+        )
+
+        self._debug_log(f"{self.get_process_name()} loaded")
+
+    def get_process_name(self):
+        return type(self).__name__
+
+    @property
+    def columns(self) -> List[str]:
+        """The columns read from each row."""
+        return list(
+            dict.fromkeys(
+                [self._note_id_column, self._text_column, *self._metadata_columns]
+            )
+        )
+
+    def _normalize_input_paths(self, input_paths) -> List[str]:
+        """Normalize input paths to a list of absolute path strings.
+
+        Args:
+            input_paths (Union[str, Path, List[Union[str, Path]]]): The input paths to normalize.
+
+        Raises:
+            ValueError: If any path does not exist.
+
+        Returns:
+            List[str]: The normalized paths.
+        """
+        if isinstance(input_paths, (str, Path)):
+            input_paths = [input_paths]
+        paths: List[str] = [os.path.abspath(p) for p in input_paths]
+        for p in paths:
+            if not os.path.exists(p):
+                raise ValueError(f"Path does not exist: {p}")
+        return paths
+
+    @staticmethod
+    def _normalize_metadata_columns(
+        metadata_columns: List[str] | Dict[str, str] | None,
+    ) -> Dict[str, str]:
+        if metadata_columns is None:
+            return {}
+        if isinstance(metadata_columns, dict):
+            return dict(metadata_columns)
+        return {column: column for column in metadata_columns}
+
+    def _accepts_name(self, name: str) -> bool:
+        return name.lower().endswith(self.SUFFIXES)
+
+    def _files(self) -> List[str]:
+        """List the input files in the order every shard agrees on.
+
+        Returns:
+            List[str]: The file paths.
+        """
+        files: List[str] = []
+        for p in self._input_paths:
+            if os.path.isdir(p):
+                # Sorted: the shards must lay the files out identically
+                files.extend(sorted(DirectoryScanner([p], accept_name=self._accepts_name)))
+            else:
+                files.append(p)
+        return files
+
+    def make_doc(self, source: TabularRow) -> Document:
+        """Map a table row onto a Document.
+
+        Args:
+            source (TabularRow): The row values and the metadata of its position.
+
+        Raises:
+            KeyError: If the row has no note id.
+
+        Returns:
+            Document: The created Document object.
+        """
+        values = source.values
+        note_id = values[self._note_id_column]
+        if note_id is None:
+            raise KeyError(self._note_id_column)
+        metadata = dict(source.metadata)
+        for column, key in self._metadata_columns.items():
+            metadata[key] = values.get(column)
+        text = values.get(self._text_column)
+        if text is None:
+            return Document(note_id=note_id, text="", valid=False, metadata=metadata)
+        return Document(
+            note_id=note_id,
+            text=text if isinstance(text, str) else str(text),
+            valid=True,
+            metadata=metadata,
+        )
+
+    def _row_documents(self, rows: Iterator[TabularRow]) -> Iterator[Document]:
+        """Map rows onto Documents, skipping bad rows and rows completed earlier."""
+        for row in rows:
+            try:
+                document = self.make_doc(row)
+            except KeyError as e:
+                logger.error("Skipping row {}: missing {}", row.metadata, e)
+                continue
+            metadata = document.metadata
+            if self._is_completed(
+                document.note_id, metadata["mtime_ns"], metadata["size"]
+            ):
+                continue
+            yield document
+
+    def _iter(self) -> Generator[DocumentBatch, Any, None]:
+        """
+        Return an iterator that yields the rows of this reader's shard in batches.
+
+        Yields:
+            DocumentBatch: Each batch of Document objects
+        """
+        files = self._files()
+        stats = [os.stat(f) for f in files]
+        ranges = shard_byte_ranges(
+            [stat.st_size for stat in stats], self._shard_index, self._num_shards
+        )
+        logger.info(
+            "Shard {}/{}: {} bytes of {} file(s)",
+            self._shard_index + 1,
+            self._num_shards,
+            sum(end - start for _, start, end in ranges),
+            len(ranges),
+        )
+
+        total_documents = 0
+        batch_builder = self._new_batch_builder()
+        for file_index, start, end in ranges:
+            stat = stats[file_index]
+            file_metadata = {
+                "path": files[file_index],
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+            }
+            try:
+                for document in self._row_documents(
+                    self._read_range(files[file_index], start, end, file_metadata)
+                ):
+                    for batch in batch_builder.add(document):
+                        total_documents += len(batch)
+                        yield batch
+            except (OSError, ValueError, csv.Error) as e:
+                logger.error("Error reading {}: {}", files[file_index], e)
+        for batch in batch_builder.flush():
+            total_documents += len(batch)
+            yield batch
+
+        logger.info("Total Documents Read: {}", total_documents)
+
+    @abstractmethod
+    def _read_range(
+        self, path: str, start: int, end: int, file_metadata: Dict[str, Any]
+    ) -> Iterator[TabularRow]:
+        """
+        Yield the rows of a file that start in the byte range ``[start, end)``.
+
+        Args:
+            path (str): The file path.
+            start (int): The first byte of the range.
+            end (int): The byte after the range.
+            file_metadata (Dict[str, Any]): The metadata shared by every row of the file.
+
+        Yields:
+            TabularRow: Each row, with its position added to the metadata
+        """
+        raise NotImplementedError("Subclasses must implement _read_range.")
+
+    @staticmethod
+    def _seek_line_start(fh: IO[bytes], start: int, data_start: int = 0) -> int:
+        """Move to the first line starting at or after ``start``.
+
+        A line belongs to the shard its first byte falls in, so the partial
+        line at the start of a range is left to the previous shard.
+
+        Args:
+            fh (IO[bytes]): The file, opened in binary mode.
+            start (int): The first byte of the range.
+            data_start (int, optional): The offset of the first data line.
+
+        Returns:
+            int: The offset of the first line to read.
+        """
+        if start <= data_start:
+            fh.seek(data_start)
+            return data_start
+        fh.seek(start - 1)
+        return start - 1 + len(fh.readline())
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(input_paths={self._input_paths}, "
+            f"columns={self.columns}, shard={self._shard_index}/{self._num_shards})"
+        )
+
+
+class JsonlReader(TabularReader):
+    """
+    Read notes from JSON Lines files, one JSON object per line.
+
+    The row position in the metadata is the byte ``offset`` of the line.
+    Lines that are not valid JSON objects are logged and skipped. Compressed
+    JSONL cannot be cut into byte ranges; read it with ArchiveReader.
+    """
+
+    SUFFIXES = (".jsonl", ".ndjson")
+
+    def _read_range(
+        self, path: str, start: int, end: int, file_metadata: Dict[str, Any]
+    ) -> Iterator[TabularRow]:
+        with open(path, "rb") as fh:
+            offset = self._seek_line_start(fh, start)
+            while offset < end:
+                lines = fh.readlines(READ_CHUNK_BYTES)
+                if not lines:
+                    break
+                for line in lines:
+                    if offset >= end:
+                        return
+                    line_offset = offset
+                    offset += len(line)
+                    if not line.strip():
+                        continue
+                    try:
+                        values = json.loads(line)
+                    except ValueError as e:
+                        logger.error(
+                            "Skipping line at byte {} of {}: {}", line_offset, path, e
+                        )
+                        continue
+                    if not isinstance(values, dict):
+                        logger.error(
+                            "Skipping line at byte {} of {}: not a JSON object",
+                            line_offset,
+                            path,
+                        )
+                        continue
+                    yield TabularRow(values, {**file_metadata, "offset": line_offset})
+
+
+class _CsvRecordLines:
+    """
+    Feed the lines of a byte range to ``csv.reader``.
+
+    Quoted fields may span lines, so the range end is only checked when a
+    new record starts: a record starting in the range is read to its end.
+    """
+
+    def __init__(
+        self, fh: IO[bytes], offset: int, end: int, encoding: str
+    ) -> None:
+        self._fh = fh
+        self._end = end
+        self._encoding = encoding
+        self.offset: int = offset
+        self.record_offset: int = offset
+        self.at_record_start: bool = True
+
+    def __iter__(self) -> "_CsvRecordLines":
+        return self
+
+    def __next__(self) -> str:
+        if self.at_record_start:
+            if self.offset >= self._end:
+                raise StopIteration
+            self.record_offset = self.offset
+            self.at_record_start = False
+        line = self._fh.readline()
+        if not line:
+            raise StopIteration
+        self.offset += len(line)
+        return line.decode(self._encoding, errors="ignore")
+
+
+class CsvReader(TabularReader):
+    """
+    Read notes from CSV files with a header row.
+
+    The row position in the metadata is the byte ``offset`` of the record.
+    Quoted fields may hold line breaks, but byte-range shards can only find
+    record boundaries at line starts: with ``num_shards > 1`` the note texts
+    must not contain raw line breaks.
+
+    Args:
+        delimiter (str, optional): The field delimiter.
+        encoding (str, optional): The file encoding; undecodable bytes are dropped.
+    """
+
+    SUFFIXES = (".csv", ".tsv")
+
+    def __init__(self, *args, delimiter: str = ",", encoding: str = "utf-8", **config):
+        super().__init__(*args, **config)
+        self._delimiter: str = delimiter
+        self._encoding: str = encoding
+
+    def _read_header(self, fh: IO[bytes]) -> Tuple[List[str], int]:
+        lines = _CsvRecordLines(fh, 0, 1, self._encoding)
+        header = next(csv.reader(lines, delimiter=self._delimiter), None)
+        if header is None:
+            return [], lines.offset
+        if header[0].startswith("\ufeff"):
+            header[0] = header[0][1:]
+        missing = [c for c in self.columns if c not in header]
+        if missing:
+            raise ValueError(f"missing columns {missing}")
+        return header, lines.offset
+
+    def _read_range(
+        self, path: str, start: int, end: int, file_metadata: Dict[str, Any]
+    ) -> Iterator[TabularRow]:
+        with open(path, "rb") as fh:
+            header, data_start = self._read_header(fh)
+            if not header:
+                return
+            # Only the mapped columns are copied out of each record
+            indexes = [(column, header.index(column)) for column in self.columns]
+            lines = _CsvRecordLines(
+                fh, self._seek_line_start(fh, start, data_start), end, self._encoding
+            )
+            for record in csv.reader(lines, delimiter=self._delimiter):
+                lines.at_record_start = True
+                if not record:
+                    continue
+                metadata = {**file_metadata, "offset": lines.record_offset}
+                try:
+                    values = {column: record[index] for column, index in indexes}
+                except IndexError:
+                    logger.error("Skipping short record {}", metadata)
+                    continue
+                yield TabularRow(values, metadata)
+
+
+class ParquetReader(TabularReader):
+    """
+    Read notes from Parquet files.
+
+    Only the mapped columns are read, ``chunk_rows`` rows at a time. A
+    shard reads the row groups that start in its byte range, so a file
+    written as a single row group is not split. The row position in the
+    metadata is the ``row`` number in the file. Requires pyarrow.
+
+    Args:
+        chunk_rows (int | None, optional): Rows decoded at a time. Defaults to
+            the READER_CHUNK_ROWS environment variable, then 10000.
+    """
+
+    SUFFIXES = (".parquet",)
+
+    def __init__(self, *args, chunk_rows: int | None = None, **config):
+        super().__init__(*args, **config)
+        self._chunk_rows: int = self._get_chunk_rows(chunk_rows)
+
+    def _get_chunk_rows(self, chunk_rows: int | None = None) -> int:
+        """Get the number of rows decoded at a time.
+
+        Args:
+            chunk_rows (int | None, optional): The desired row count. Defaults
+                to the READER_CHUNK_ROWS environment variable, then 10000.
+
+        Raises:
+            ValueError: If the row count is less than 1.
+
+        Returns:
+            int: The row count.
+        """
+        if chunk_rows is None:
+            chunk_rows = int(os.getenv("READER_CHUNK_ROWS", 10000) or 10000)
+        if chunk_rows < 1:
+            raise ValueError("chunk_rows must be at least 1")
+        return chunk_rows
+
+    @staticmethod
+    def _row_group_offset(row_group) -> int:
+        offsets = []
+        for i in range(row_group.num_columns):
+            column = row_group.column(i)
+            offsets.append(column.data_page_offset)
+            if column.has_dictionary_page and column.dictionary_page_offset:
+                offsets.append(column.dictionary_page_offset)
+        return min(offsets)
+
+    def _read_range(
+        self, path: str, start: int, end: int, file_metadata: Dict[str, Any]
+    ) -> Iterator[TabularRow]:
+        pq = _import_pyarrow_parquet()
+        with pq.ParquetFile(path) as parquet_file:
+            missing = [c for c in self.columns if c not in parquet_file.schema_arrow.names]
+            if missing:
+                raise ValueError(f"missing columns {missing}")
+            file_meta = parquet_file.metadata
+            row_groups: List[int] = []
+            first_rows: List[int] = []
+            first_row = 0
+            for i in range(file_meta.num_row_groups):
+                row_group = file_meta.row_group(i)
+                if start <= self._row_group_offset(row_group) < end:
+                    row_groups.append(i)
+                    first_rows.append(first_row)
+                first_row += row_group.num_rows
+
+            columns = self.columns
+            for row_group, row in zip(row_groups, first_rows):
+                for chunk in parquet_file.iter_batches(
+                    batch_size=self._chunk_rows,
+                    row_groups=[row_group],
+                    columns=columns,
+                ):
+                    column_values = [chunk.column(c).to_pylist() for c in columns]
+                    for values in zip(*column_values):
+                        yield TabularRow(
+                            dict(zip(columns, values)), {**file_metadata, "row": row}
+                        )
+                        row += 1
@@ -3,6 +3,7 @@ from multiprocessing import Lock
 from typing import List, Union
 
 from nre_pipeline.models._nlp_result import NLPResultItem
+from nre_pipeline.models._nlp_result_batch import NLPResultBatch, as_result_batches
 from nre_pipeline.writer import database
 from nre_pipeline.common.base._base_writer import NLPResultWriter
 
@@ -14,6 +15,7 @@ class DBNLPResultWriter(NLPResultWriter, database.TransactionCallbackMixin):
 
     def __init__(self, *args, **kwargs) -> None:
         self._table_created = False
+        self._deferred_batches: List[NLPResultBatch] = []
         super().__init__(*args, **kwargs)
 
     @property
@@ -21,40 +23,65 @@ class DBNLPResultWriter(NLPResultWriter, database.TransactionCallbackMixin):
         return "nlp_results"
 
     @abstractmethod
-    def get_create_table_query(self, nlp_result: NLPResultItem) -> str:
+    def get_create_table_query(self, nlp_result: NLPResultBatch) -> str:
         """
-        Return the SQL query to create the results table for the given NLP result item.
+        Return the SQL query to create the results table for the given NLP result batch.
         """
         raise NotImplementedError()
 
     @abstractmethod
-    def _record(self, nlp_result: Union[NLPResultItem, List[NLPResultItem]]) -> None:
+    def _record(
+        self, nlp_result: Union[NLPResultItem, List[NLPResultItem], NLPResultBatch]
+    ) -> None:
         """
         Record one or more NLP result items in the database.
         """
         raise NotImplementedError()
 
-    def record(self, nlp_result: Union[NLPResultItem, List[NLPResultItem]]) -> None:
+    def record(
+        self, nlp_result: Union[NLPResultItem, List[NLPResultItem], NLPResultBatch]
+    ) -> None:
         """
         Record one or more NLP result items in the database.
         """
-        if isinstance(nlp_result, list):
-            return self.record_batch(nlp_result)
-        self._ensure_table(nlp_result)
-        with self._get_database_context() as context:
-            with context.start_transaction(self):
-                self._record(nlp_result)
+        for batch in as_result_batches(nlp_result):
+            self.record_batch(batch)
 
-    def record_batch(self, nlp_results: List[NLPResultItem]) -> None:
+    def record_batch(self, nlp_results: NLPResultBatch) -> None:
         """
         Batch record multiple NLP results for better performance.
+
+        Batches without any feature columns (e.g. notes that failed to
+        process) cannot define the table, so they are held back until a batch
+        with a schema has created it, or until ``_record_deferred_batches`` is
+        called at the end of the run.
         """
-        if not nlp_results:
+        if len(nlp_results) == 0:
             return
-        self._ensure_table(nlp_results[0])
+        if not nlp_results.schema and not self._table_created:
+            self._deferred_batches.append(nlp_results)
+            return
+        self._ensure_table(nlp_results)
         self._record_batch(nlp_results)
+        if self._deferred_batches:
+            self._record_deferred_batches()
+
+    def _record_deferred_batches(self) -> None:
+        """
+        Record the batches held back by ``record_batch``.
+        """
+        deferred, self._deferred_batches = self._deferred_batches, []
+        for batch in deferred:
+            self._ensure_table(batch)
+            self._record_batch(batch)
+
+    def _mark_committed(self) -> None:
+        # Rows held back until the table exists are not in the database yet
+        if self._deferred_batches:
+            return
+        super()._mark_committed()
 
-    def _ensure_table(self, nlp_result: NLPResultItem) -> None:
+    def _ensure_table(self, nlp_result: NLPResultBatch) -> None:
         """
         Ensure the results table exists in the database.
         """
@@ -73,9 +100,9 @@ class DBNLPResultWriter(NLPResultWriter, database.TransactionCallbackMixin):
         raise NotImplementedError()
 
     @abstractmethod
-    def _record_batch(self, nlp_results: List[NLPResultItem]) -> None:
+    def _record_batch(self, nlp_results: NLPResultBatch) -> None:
         """
-        Record a batch of NLP result items in the database.
+        Record a columnar batch of NLP results in the database.
         """
         raise NotImplementedError()
 
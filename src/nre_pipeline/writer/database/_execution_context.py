@@ -1,6 +1,6 @@
 from abc import abstractmethod
 from contextlib import contextmanager
-from typing import List, Self
+from typing import Iterable, List, Self
 
 
 class DatabaseExecutionContext:
@@ -63,7 +63,7 @@ class DatabaseExecutionContext:
         raise NotImplementedError("Must implement insert method.")
 
     @abstractmethod
-    def insert_batch(self, query: str, params_list: List[tuple]) -> None:
+    def insert_batch(self, query: str, params_list: Iterable[tuple]) -> None:
         raise NotImplementedError("Must implement insert_batch method.")
 
     @abstractmethod
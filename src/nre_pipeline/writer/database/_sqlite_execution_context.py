@@ -1,48 +1,164 @@
 import sqlite3
 from pathlib import Path
-from typing import List
+from typing import Any, Iterable, List, Sequence, Tuple
 
 from nre_pipeline.models._nlp_result import NLPResultItem
 from nre_pipeline.writer.database import DatabaseExecutionContext
 
+TPragmas = Sequence[Tuple[str, Any]]
+
+DEFAULT_PRAGMAS: TPragmas = (
+    ("journal_mode", "WAL"),  # Write-Ahead Logging for better concurrency
+    ("synchronous", "NORMAL"),  # Faster writes
+    ("cache_size", 10000),  # Larger cache
+    ("temp_store", "MEMORY"),  # Use memory for temp tables
+    ("mmap_size", 268435456),  # 256MB memory-mapped I/O
+)
+
+# Unsafe until the run finishes: no fsync, 1GB page cache and no other
+# connections. Only used while filling a staging table. The rollback journal
+# is kept in memory rather than disabled, since with journal_mode=OFF a
+# ROLLBACK TO SAVEPOINT leaves the rows of a failed batch in place.
+BULK_LOAD_PRAGMAS: TPragmas = (
+    ("journal_mode", "MEMORY"),
+    ("synchronous", "OFF"),
+    ("cache_size", -1048576),
+    ("temp_store", "MEMORY"),
+    ("mmap_size", 268435456),
+    ("locking_mode", "EXCLUSIVE"),
+)
+
 
 class SQLiteExecutionContext(DatabaseExecutionContext):
-    def __init__(self, db_path: str):
+    """SQLite execution context.
+
+    By default every ``with`` block opens a connection, applies the PRAGMAs
+    and commits and closes it on exit. A ``persistent`` context opens its
+    connection on the first ``__enter__`` and keeps it across blocks: each
+    transaction becomes a SAVEPOINT inside one long-running transaction that
+    is only made durable by ``commit``, and the connection stays open until
+    ``close``.
+
+    Args:
+        db_path (str): The path to the database file.
+        persistent (bool, optional): Keep the connection open between blocks.
+            Defaults to False.
+        pragmas (TPragmas | None, optional): The PRAGMAs applied when the
+            connection opens. Defaults to DEFAULT_PRAGMAS.
+    """
+
+    SAVEPOINT_NAME = "nlp_batch"
+
+    def __init__(
+        self,
+        db_path: str,
+        persistent: bool = False,
+        pragmas: TPragmas | None = None,
+    ):
         self._db_path = Path(db_path)
+        self._persistent = persistent
+        self._pragmas: TPragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self._conn: sqlite3.Connection | None = None
 
-    def __enter__(self):
+    @property
+    def is_open(self) -> bool:
+        return self._conn is not None
+
+    def _connect(self) -> None:
         # Ensure the parent directory exists
         self._db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._conn: sqlite3.Connection = sqlite3.connect(str(self._db_path))
+        self._conn = sqlite3.connect(str(self._db_path))
 
         # Optimize SQLite for performance
-        self._conn.execute(
-            "PRAGMA journal_mode=WAL"
-        )  # Write-Ahead Logging for better concurrency
-        self._conn.execute("PRAGMA synchronous=NORMAL")  # Faster writes
-        self._conn.execute("PRAGMA cache_size=10000")  # Larger cache
-        self._conn.execute("PRAGMA temp_store=MEMORY")  # Use memory for temp tables
-        self._conn.execute("PRAGMA mmap_size=268435456")  # 256MB memory-mapped I/O
+        self.set_pragmas(self._pragmas)
 
         self._cursor: sqlite3.Cursor = self._conn.cursor()
+
+    def __enter__(self):
+        if self._conn is None:
+            self._connect()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._persistent:
+            # Keep the connection and any pending rows until commit()/close()
+            return
         self.commit_transaction()
-        self._conn.close()
+        self.close()
 
     def _start_transaction(self):
         # Logic to start a database transaction
-        self._conn.execute("BEGIN")
+        if not self._persistent:
+            self._conn.execute("BEGIN")
+            return
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN")
+        self._conn.execute(f"SAVEPOINT {self.SAVEPOINT_NAME}")
 
     def commit_transaction(self):
         # Logic to commit a database transaction
+        if self._persistent:
+            # Release the batch savepoint; the rows become durable on commit()
+            if self._conn.in_transaction:
+                self._conn.execute(f"RELEASE SAVEPOINT {self.SAVEPOINT_NAME}")
+            return
         self._conn.commit()
 
     def rollback_transaction(self):
         # Logic to rollback a database transaction
+        if self._persistent:
+            # Only undo the current batch, keep the rows grouped before it
+            if self._conn.in_transaction:
+                self._conn.execute(f"ROLLBACK TO SAVEPOINT {self.SAVEPOINT_NAME}")
+                self._conn.execute(f"RELEASE SAVEPOINT {self.SAVEPOINT_NAME}")
+            return
         self._conn.rollback()
 
+    def commit(self) -> None:
+        """Commit every row written since the last commit."""
+        if self._conn is not None:
+            self._conn.commit()
+
+    def checkpoint(self, mode: str = "TRUNCATE") -> None:
+        """Checkpoint the WAL into the database file.
+
+        Args:
+            mode (str, optional): The wal_checkpoint mode. Defaults to "TRUNCATE".
+        """
+        if self._conn is not None:
+            self._conn.execute(f"PRAGMA wal_checkpoint({mode})")
+
+    def close(self) -> None:
+        """Commit pending rows and close the connection."""
+        if self._conn is None:
+            return
+        self._conn.commit()
+        self._conn.close()
+        self._conn = None
+
+    def set_pragmas(self, pragmas: TPragmas) -> None:
+        """Apply PRAGMAs to the open connection (outside of a transaction).
+
+        Args:
+            pragmas (TPragmas): The (name, value) pairs to apply.
+        """
+        for name, value in pragmas:
+            self._conn.execute(f"PRAGMA {name}={value}")
+
+    def table_columns(self, table_name: str, schema: str = "main") -> List[str]:
+        """Get the column names of a table, or an empty list if it does not exist."""
+        return [
+            row[1]
+            for row in self._conn.execute(f"PRAGMA {schema}.table_info({table_name})")
+        ]
+
+    def execute(self, query: str, params: tuple = ()) -> None:
+        self._cursor.execute(query, params)
+
+    def fetch_all(self, query: str, params: tuple = ()) -> List[tuple]:
+        self._cursor.execute(query, params)
+        return self._cursor.fetchall()
+
     def create_table(self, query: str) -> None:
         self._cursor.execute(query)
         self._conn.commit()
@@ -51,7 +167,7 @@ class SQLiteExecutionContext(DatabaseExecutionContext):
         self._cursor.execute(query, params)
         return self._cursor.lastrowid
 
-    def insert_batch(self, query: str, params_list: List[tuple]) -> None:
+    def insert_batch(self, query: str, params_list: Iterable[tuple]) -> None:
         """Execute batch insert for better performance."""
         self._cursor.executemany(query, params_list)
 
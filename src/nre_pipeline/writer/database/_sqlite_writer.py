@@ -1,10 +1,12 @@
 import json
 import os
-from typing import Any, Callable, Dict, List
+import time
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple, Type, Union
 
 from loguru import logger
 
 from nre_pipeline.models._nlp_result import NLPResultItem
+from nre_pipeline.models._nlp_result_batch import NLPResultBatch, as_result_batches
 from nre_pipeline.models._nlp_result_item import NLPResultFeature
 from nre_pipeline.common.base._base_writer import NLPResultWriter
 from nre_pipeline.writer.common import DBNLPResultWriter
@@ -12,12 +14,22 @@ from nre_pipeline.writer.database import (
     DatabaseExecutionContext,
     SQLiteExecutionContext,
 )
+from nre_pipeline.writer.database._sqlite_execution_context import (
+    BULK_LOAD_PRAGMAS,
+    DEFAULT_PRAGMAS,
+)
+
+# Columns indexed once a bulk load finishes (when present in the schema)
+BULK_LOAD_INDEX_COLUMNS = ("note_id", "cui")
 
 
 def convert_python_type_to_sqlite_type(item) -> str:
+    return sqlite_type_for(item.value_type)
+
+
+def sqlite_type_for(python_type: Type) -> str:
     import numpy as np
 
-    python_type = item.value_type
     if python_type in (int, np.int64, np.int32, np.int16, np.int8):
         return "INTEGER"
     elif python_type in (float, np.float64, np.float32, np.float16):
@@ -47,21 +59,142 @@ def serialize_item(item: NLPResultFeature) -> Any:
         return item.value
 
 
+def serialize_column(python_type: Type, column: Sequence[Any]) -> Sequence[Any]:
+    if python_type is set:
+        return [json.dumps(list(value)) for value in column]
+    elif python_type in (list, dict):
+        return [json.dumps(value) for value in column]
+    else:
+        return column
+
+
 class SQLiteNLPWriter(DBNLPResultWriter):
     """SQLite implementation of the NLP result writer.
 
+    The writer process keeps one connection open for the whole run. Every
+    batch is inserted inside a savepoint and the rows are committed in groups
+    of ``commit_every_rows`` or every ``commit_interval_seconds``, whichever
+    comes first. The WAL is checkpointed when writing completes.
+
+    In bulk load mode the rows go into an unindexed ``nlp_results_staging``
+    table on a connection with an in-memory journal and fsync disabled. When
+    writing completes the database is switched back to WAL, the ``note_id``
+    and ``cui`` indexes are built and the staging table replaces
+    ``nlp_results`` in a single transaction. A crash during the load leaves an incomplete
+    database, so the mode is meant for runs that can simply be restarted.
+
     Args:
-        DBNLPResultWriter (_type_): _description_
+        persistent_connection (bool, optional): Keep one connection open in
+            the writer process. If False, every batch opens, commits and
+            closes its own connection. Defaults to True.
+        commit_every_rows (int | None, optional): Rows to group into one
+            commit. Defaults to the SQLITE_COMMIT_EVERY_ROWS environment
+            variable.
+        commit_interval_seconds (float | None, optional): Maximum seconds
+            between commits. Defaults to the SQLITE_COMMIT_INTERVAL_SECONDS
+            environment variable.
+        bulk_load (bool | None, optional): Write through an unindexed staging
+            table with an in-memory journal. Defaults to the SQLITE_BULK_LOAD
+            environment variable.
     """
 
     def __init__(
         self,
         *args,
+        persistent_connection: bool = True,
+        commit_every_rows: int | None = None,
+        commit_interval_seconds: float | None = None,
+        bulk_load: bool | None = None,
         **kwargs,
     ):
-        self._cached_insert_query: str | None = None
+        self._cached_insert_queries: Dict[Tuple[str, ...], str] = {}
+        self._bulk_load: bool = self._get_bulk_load(bulk_load)
+        if self._bulk_load and not persistent_connection:
+            logger.warning("bulk_load requires a persistent connection; enabling it")
+            persistent_connection = True
+        self._persistent_connection: bool = persistent_connection
+        self._commit_every_rows: int = self._get_commit_every_rows(commit_every_rows)
+        self._commit_interval_seconds: float = self._get_commit_interval_seconds(
+            commit_interval_seconds
+        )
+        # Opened lazily so the connection belongs to the writer process
+        self._database_context: SQLiteExecutionContext | None = None
+        self._rows_since_commit: int = 0
+        self._last_commit_time: float = 0.0
+        self._rows_written: int = 0
+        self._write_seconds: float = 0.0
         super().__init__(*args, **kwargs)
 
+    def _get_bulk_load(self, bulk_load: bool | None = None) -> bool:
+        """Get whether results are bulk loaded through a staging table.
+
+        Args:
+            bulk_load (bool | None, optional): The desired setting. Defaults to
+                the SQLITE_BULK_LOAD environment variable.
+
+        Returns:
+            bool: True if bulk load mode is enabled.
+        """
+        if bulk_load is None:
+            bulk_load = os.getenv("SQLITE_BULK_LOAD", "false").lower() in (
+                "true",
+                "1",
+                "yes",
+            )
+        return bulk_load
+
+    @property
+    def table_name(self) -> str:
+        if self._bulk_load:
+            return f"{self.final_table_name}_staging"
+        return self.final_table_name
+
+    @property
+    def final_table_name(self) -> str:
+        return super().table_name
+
+    def _get_commit_every_rows(self, commit_every_rows: int | None = None) -> int:
+        """Get the number of rows grouped into one commit.
+
+        Args:
+            commit_every_rows (int | None, optional): The desired row count.
+                Defaults to the SQLITE_COMMIT_EVERY_ROWS environment variable.
+
+        Raises:
+            ValueError: If the row count is not positive.
+
+        Returns:
+            int: The number of rows per commit.
+        """
+        if commit_every_rows is None:
+            commit_every_rows = int(os.getenv("SQLITE_COMMIT_EVERY_ROWS", 100000) or 100000)
+        if commit_every_rows <= 0:
+            raise ValueError("commit_every_rows must be a positive integer")
+        return commit_every_rows
+
+    def _get_commit_interval_seconds(
+        self, commit_interval_seconds: float | None = None
+    ) -> float:
+        """Get the maximum number of seconds between commits.
+
+        Args:
+            commit_interval_seconds (float | None, optional): The desired interval.
+                Defaults to the SQLITE_COMMIT_INTERVAL_SECONDS environment variable.
+
+        Raises:
+            ValueError: If the interval is not positive.
+
+        Returns:
+            float: The commit interval in seconds.
+        """
+        if commit_interval_seconds is None:
+            commit_interval_seconds = float(
+                os.getenv("SQLITE_COMMIT_INTERVAL_SECONDS", 5) or 5
+            )
+        if commit_interval_seconds <= 0:
+            raise ValueError("commit_interval_seconds must be positive")
+        return commit_interval_seconds
+
     ##################################################################
     # ManagementMixin
     ##################################################################
@@ -69,8 +202,9 @@ class SQLiteNLPWriter(DBNLPResultWriter):
         """
         Closes the database connection.
         """
-        # currently the database runs a connection per request, so can just return
-        return
+        if self._database_context is not None:
+            self._database_context.close()
+            self._database_context = None
 
     def _delete(self):
         if os.path.exists(self._output_path):
@@ -84,82 +218,243 @@ class SQLiteNLPWriter(DBNLPResultWriter):
         return
 
     def _on_write_complete(self):
-        pass
+        self._record_deferred_batches()
+        start = time.perf_counter()
+        if self._database_context is not None:
+            self._database_context.commit()
+            if self._bulk_load:
+                self._finish_bulk_load(self._database_context)
+            self._database_context.checkpoint()
+        self._close()
+        self._write_seconds += time.perf_counter() - start
+        if self._rows_written:
+            logger.info(
+                "SQLite writer wrote {} rows in {:.2f}s of write time ({:.0f} rows/sec)",
+                self._rows_written,
+                self._write_seconds,
+                self._rows_written / max(self._write_seconds, 1e-9),
+            )
+
+    def _finish_bulk_load(self, context: SQLiteExecutionContext) -> None:
+        """Index the staging table and swap it in for the results table."""
+        if not self._table_created:
+            return
+        start = time.perf_counter()
+        staging_columns = context.table_columns(self.table_name)
+        # Make the swap itself crash safe again
+        context.set_pragmas(DEFAULT_PRAGMAS)
+        with context.start_transaction(self):
+            context.execute(f"DROP TABLE IF EXISTS {self.final_table_name}")
+            for column in BULK_LOAD_INDEX_COLUMNS:
+                if column in staging_columns:
+                    context.execute(
+                        f"CREATE INDEX idx_{self.final_table_name}_{column} "
+                        f"ON {self.table_name} ({column})"
+                    )
+            context.execute(
+                f"ALTER TABLE {self.table_name} RENAME TO {self.final_table_name}"
+            )
+        context.commit()
+        logger.info(
+            "Indexed and swapped in {} in {:.2f}s",
+            self.final_table_name,
+            time.perf_counter() - start,
+        )
+
+    def _copy_results(self, copies: Dict[str | int, List[str | int]]) -> int:
+        """Copy the canonical rows to the duplicate notes with one INSERT ... SELECT.
+
+        The duplicate references go into a temporary table joined against
+        the results table, so the table is scanned once.
+        """
+        table_name = self.final_table_name
+        context = SQLiteExecutionContext(self._output_path, persistent=True)
+        with context:
+            table_columns: List[str] = context.table_columns(table_name)
+            if not table_columns:
+                # No results were written
+                context.close()
+                return 0
+            columns = [
+                column for column in table_columns if column not in ("id", "note_id")
+            ]
+            context.execute(
+                "CREATE TEMP TABLE duplicate_notes (note_id, canonical_note_id)"
+            )
+            context.insert_batch(
+                "INSERT INTO duplicate_notes VALUES (?, ?)",
+                (
+                    (note_id, canonical_note_id)
+                    for canonical_note_id, note_ids in copies.items()
+                    for note_id in note_ids
+                ),
+            )
+            selected = "".join(f", r.{column}" for column in columns)
+            inserted = "".join(f", {column}" for column in columns)
+            rows_copied = context.update(
+                f"INSERT INTO {table_name} (note_id{inserted}) "
+                f"SELECT d.note_id{selected} FROM {table_name} AS r "
+                f"JOIN duplicate_notes AS d ON r.note_id = d.canonical_note_id "
+                f"ORDER BY r.id"
+            )
+            context.execute("DROP TABLE duplicate_notes")
+            context.commit()
+            context.checkpoint()
+        context.close()
+        return rows_copied or 0
 
     def _build_output_file_name(self) -> str:
         return f"results_{self._get_results_id()}.db"
 
-    def get_create_table_query(self, nlp_result: NLPResultItem) -> str:
-        note_id: str | int = nlp_result.note_id
-        additional_columns = ", ".join(
-            [
-                f"{item.key} {convert_python_type_to_sqlite_type(item)}"
-                for item in nlp_result.result_features
-            ]
-        )
+    def _merge_outputs(self, shard_paths: List[str], merged_path: str) -> None:
+        """Copy every shard's results table into one database.
 
+        Rows are appended shard by shard through ATTACH and INSERT ... SELECT,
+        keeping each shard's row order; the shard indexes are recreated once
+        all rows are in.
+        """
+        if os.path.exists(merged_path):
+            raise FileExistsError(f"File {merged_path} already exists.")
+        table_name = self.final_table_name
+        context = SQLiteExecutionContext(
+            merged_path, persistent=True, pragmas=BULK_LOAD_PRAGMAS
+        )
+        with context:
+            index_queries: List[str] = []
+            table_created = False
+            for shard_path in shard_paths:
+                context.execute("ATTACH DATABASE ? AS shard", (shard_path,))
+                create_table = context.fetch_all(
+                    "SELECT sql FROM shard.sqlite_master WHERE type = 'table' AND name = ?",
+                    (table_name,),
+                )
+                if create_table:
+                    if not table_created:
+                        context.execute(create_table[0][0])
+                        index_queries = [
+                            row[0]
+                            for row in context.fetch_all(
+                                "SELECT sql FROM shard.sqlite_master "
+                                "WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                                (table_name,),
+                            )
+                        ]
+                        table_created = True
+                    columns = ", ".join(
+                        column
+                        for column in context.table_columns(table_name, schema="shard")
+                        if column != "id"
+                    )
+                    context.execute(
+                        f"INSERT INTO main.{table_name} ({columns}) "
+                        f"SELECT {columns} FROM shard.{table_name} ORDER BY id"
+                    )
+                context.commit()
+                context.execute("DETACH DATABASE shard")
+
+            for index_query in index_queries:
+                context.execute(index_query)
+            context.commit()
+            context.set_pragmas(DEFAULT_PRAGMAS)
+            context.checkpoint()
+        context.close()
+
+    def get_create_table_query(self, nlp_result: NLPResultBatch) -> str:
+        note_id: str | int = nlp_result.note_ids[0]
         if isinstance(note_id, int):
             note_id_type = "INTEGER"
         else:
             note_id_type = "TEXT"
 
+        # Bulk loads use a plain rowid key, skipping the sqlite_sequence upkeep
+        primary_key = "INTEGER PRIMARY KEY"
+        if not self._bulk_load:
+            primary_key += " AUTOINCREMENT"
+
+        columns = [
+            f"id {primary_key}",
+            f"note_id {note_id_type}",
+            *[f"{key} {sqlite_type_for(value_type)}" for key, value_type in nlp_result.schema],
+        ]
+        columns_str = ",\n                ".join(columns)
+
         return f"""
             CREATE TABLE IF NOT EXISTS {self.table_name} (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                note_id {note_id_type},
-                {additional_columns}
+                {columns_str}
             )
         """
 
-    def _record(self, nlp_result: Any) -> None:
+    def _record(
+        self, nlp_result: Union[NLPResultItem, List[NLPResultItem], NLPResultBatch]
+    ) -> None:
         """
         Record one or more NLP result items in the database.
         """
-        if isinstance(nlp_result, list):
-            return self._record_batch(nlp_result)
-
-        self._ensure_table(nlp_result)
-        with self._get_database_context() as context:
-            with context.start_transaction(self):
-                query = self.get_insert_query(nlp_result)
-                insert_params = (
-                    nlp_result.note_id,
-                    *[serialize_item(item) for item in nlp_result.result_features],
-                )
-                context.insert(query, insert_params)
+        for batch in as_result_batches(nlp_result):
+            self.record_batch(batch)
 
-    def _record_batch(self, nlp_results: List[NLPResultItem]) -> None:
-        """Batch record multiple NLP results for better performance."""
-        if not nlp_results:
+    def _record_batch(self, nlp_results: NLPResultBatch) -> None:
+        """Batch record a columnar NLPResultBatch with a single executemany."""
+        if len(nlp_results) == 0:
             return
 
-        self._ensure_table(nlp_results[0])
+        start = time.perf_counter()
         with self._get_database_context() as context:
             with context.start_transaction(self):
-                query = self.get_insert_query(nlp_results[0])
-                batch_params = []
-                for nlp_result in nlp_results:
-                    insert_params = (
-                        nlp_result.note_id,
-                        *[serialize_item(item) for item in nlp_result.result_features],
-                    )
-                    batch_params.append(insert_params)
-                context.insert_batch(query, batch_params)
-
-    def get_insert_query(self, nlp_result) -> str:
-        if self._cached_insert_query is not None:
-            return self._cached_insert_query
-        additional_columns = [item.key for item in nlp_result.result_features]
-        additional_columns_str = ", ".join(additional_columns)
-        question_marks = ", ".join(["?"] * len(additional_columns))
-        query: str = (
-            f"INSERT INTO nlp_results (note_id, {additional_columns_str}) VALUES (?, {question_marks})"
-        )
-        self._cached_insert_query = query
+                context.insert_batch(
+                    self.get_insert_query(nlp_results),
+                    self._batch_params(nlp_results),
+                )
+        self._rows_written += len(nlp_results)
+        self._rows_since_commit += len(nlp_results)
+        self._maybe_commit()
+        self._write_seconds += time.perf_counter() - start
+
+    def _maybe_commit(self) -> None:
+        """Commit the grouped rows once the row count or interval is reached."""
+        if self._database_context is None:
+            # Without a persistent connection every batch commits on its own
+            self._mark_committed()
+            return
+        now = time.monotonic()
+        if (
+            self._rows_since_commit >= self._commit_every_rows
+            or now - self._last_commit_time >= self._commit_interval_seconds
+        ):
+            self._database_context.commit()
+            self._rows_since_commit = 0
+            self._last_commit_time = now
+            self._mark_committed()
+
+    def _batch_params(self, nlp_results: NLPResultBatch) -> Iterator[tuple]:
+        columns = [
+            serialize_column(value_type, column)
+            for (_, value_type), column in zip(nlp_results.schema, nlp_results.columns)
+        ]
+        return zip(nlp_results.note_ids, *columns)
+
+    def get_insert_query(self, nlp_result: NLPResultBatch) -> str:
+        keys: Tuple[str, ...] = nlp_result.keys
+        query = self._cached_insert_queries.get(keys)
+        if query is not None:
+            return query
+        columns_str = ", ".join(("note_id",) + keys)
+        question_marks = ", ".join(["?"] * (len(keys) + 1))
+        query = f"INSERT INTO {self.table_name} ({columns_str}) VALUES ({question_marks})"
+        self._cached_insert_queries[keys] = query
         return query
 
     def _get_database_context(self) -> DatabaseExecutionContext:
-        return SQLiteExecutionContext(self._output_path)
+        if not self._persistent_connection:
+            return SQLiteExecutionContext(self._output_path)
+        if self._database_context is None:
+            self._database_context = SQLiteExecutionContext(
+                self._output_path,
+                persistent=True,
+                pragmas=BULK_LOAD_PRAGMAS if self._bulk_load else DEFAULT_PRAGMAS,
+            )
+            self._last_commit_time = time.monotonic()
+        return self._database_context
 
     def on_transaction_begin(self, context: DatabaseExecutionContext) -> None:
         # logger.debug("Transaction started.")
@@ -1,45 +1,236 @@
+import csv
+import gzip
+import io
 import os
-from typing import Any, Dict, List, Union, cast
+import shutil
+from typing import Any, BinaryIO, Dict, Iterable, List, Literal, Tuple, Union
+from loguru import logger
 from nre_pipeline.common.base._base_writer import NLPResultWriter
 from nre_pipeline.models._nlp_result import NLPResultItem
+from nre_pipeline.models._nlp_result_batch import NLPResultBatch, as_result_batches
 
 
 DEFAULT_DELIMITER = "|"
+DEFAULT_ENCODING = "utf-8"
+# Rows are serialized into an in-memory buffer and written out in chunks
+WRITE_BUFFER_BYTES = 1024 * 1024
+
+TCSVCompression = Literal["none", "gzip", "zstd"]
+COMPRESSION_SUFFIXES: Dict[str, str] = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("zstd CSV compression requires the zstandard package") from e
+    return zstandard
 
 
 class CSVWriter(NLPResultWriter):
+    """Write NLP results to a pipe-delimited CSV file.
+
+    Rows are serialized in bulk with ``csv.writer`` (fields containing the
+    delimiter, quotes or newlines are double-quoted) into an in-memory buffer
+    that is flushed to the file in ``WRITE_BUFFER_BYTES`` chunks. The column
+    order of every result schema is computed once against the header.
+
+    Args:
+        compression (TCSVCompression | None, optional): Stream the output
+            through "gzip" or "zstd" (requires the zstandard package).
+            Defaults to the CSV_COMPRESSION environment variable.
+    """
 
     def __init__(
         self,
         *args,
+        compression: TCSVCompression | None = None,
         **kwargs,
     ) -> None:
+        # Needed by _build_output_file_name during NLPResultWriter.__init__
+        self._compression: TCSVCompression = self._get_compression(compression)
         super().__init__(*args, **kwargs)
         if os.path.exists(self.output_path):
             raise FileExistsError(f"File {self.output_path} already exists.")
-        self._output_fh = open(self.output_path, "w")
-        self._header_written = False
+        # Opened lazily so the file handle belongs to the writer process
+        self._output_fh: BinaryIO | None = None
+        self._text_buffer = io.StringIO()
+        self._csv_writer = csv.writer(
+            self._text_buffer, delimiter=DEFAULT_DELIMITER, lineterminator="\n"
+        )
+        self._header: Tuple[str, ...] | None = None
+        self._column_orders: Dict[Tuple[str, ...], Tuple[int | None, ...] | None] = {}
+        self._deferred_batches: List[NLPResultBatch] = []
 
-    def _record(self, nlp_result: Union[NLPResultItem, List[NLPResultItem]]) -> None:
+    def _get_compression(
+        self, compression: TCSVCompression | None = None
+    ) -> TCSVCompression:
+        """Get the streaming compression applied to the CSV file.
+
+        Args:
+            compression (TCSVCompression | None, optional): The desired compression.
+                Defaults to the CSV_COMPRESSION environment variable.
+
+        Raises:
+            ValueError: If the compression is not supported.
+
+        Returns:
+            TCSVCompression: "none", "gzip" or "zstd".
+        """
+        if compression is None:
+            compression = os.getenv("CSV_COMPRESSION", "none") or "none"  # type: ignore[assignment]
+        compression = compression.lower()  # type: ignore[assignment]
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(
+                f"Unsupported CSV compression '{compression}', expected one of {list(COMPRESSION_SUFFIXES)}"
+            )
+        return compression
+
+    def _open_output(self, output_path: str) -> BinaryIO:
+        if self._compression == "gzip":
+            return gzip.open(output_path, "wb", compresslevel=6)  # type: ignore[return-value]
+        if self._compression == "zstd":
+            zstandard = _import_zstandard()
+            # Closing the stream writer closes the file as well
+            return zstandard.ZstdCompressor().stream_writer(open(output_path, "wb"))  # type: ignore[return-value]
+        return open(output_path, "wb")
+
+    def _open_input(self, input_path: str) -> BinaryIO:
+        if self._compression == "gzip":
+            return gzip.open(input_path, "rb")  # type: ignore[return-value]
+        if self._compression == "zstd":
+            # The decompression reader has no readline; buffer it
+            return io.BufferedReader(_import_zstandard().open(input_path, "rb"))  # type: ignore[return-value]
+        return open(input_path, "rb")
+
+    @property
+    def _header_written(self) -> bool:
+        return self._header is not None
+
+    def _record(
+        self, nlp_result: Union[NLPResultItem, List[NLPResultItem], NLPResultBatch]
+    ) -> None:
         """Record one or more NLP result items in the CSV file.
 
         Args:
-            nlp_result (Union[NLPResultItem, List[NLPResultItem]]): NLP result item or list of items to record.
+            nlp_result (Union[NLPResultItem, List[NLPResultItem], NLPResultBatch]): NLP result item, list of items or result batch to record.
         """
-        if isinstance(nlp_result, List) is False:
-            nlp_result = [cast(NLPResultItem, nlp_result)]
-        for item in cast(List[NLPResultItem], nlp_result):
+        for batch in as_result_batches(nlp_result):
             if not self._header_written:
-                headers: List[str] = list(item.to_dict().keys())
-                headers.insert(0, "note_id")
-                self._output_fh.write(DEFAULT_DELIMITER.join(headers) + "\n")
-                self._header_written = True
-            values: List[str] = [str(value) for value in item.to_dict().values()]
-            values.insert(0, str(item.note_id))
-            row_val: str = DEFAULT_DELIMITER.join(
-                [v.replace(DEFAULT_DELIMITER, rf"\{DEFAULT_DELIMITER}") for v in values]
+                if not batch.schema:
+                    # Rows without features cannot define the header; hold
+                    # them until a batch with a schema arrives
+                    self._deferred_batches.append(batch)
+                    continue
+                self._write_header(batch.keys)
+                self._write_deferred_batches()
+            self._write_batch(batch)
+
+    def _write_header(self, keys: Iterable[str]) -> None:
+        self._header = tuple(keys)
+        self._csv_writer.writerow(("note_id", *self._header))
+
+    def _write_deferred_batches(self) -> None:
+        deferred, self._deferred_batches = self._deferred_batches, []
+        for batch in deferred:
+            self._write_batch(batch)
+
+    def _column_order(self, keys: Tuple[str, ...]) -> Tuple[int | None, ...] | None:
+        """Get the batch column feeding each header column, computed once per schema.
+
+        Returns:
+            Tuple[int | None, ...] | None: None when the batch matches the header,
+                otherwise the batch column index per header column (None if absent).
+        """
+        if keys in self._column_orders:
+            return self._column_orders[keys]
+        header: Tuple[str, ...] = self._header or ()
+        order: Tuple[int | None, ...] | None = None
+        if keys != header:
+            order = tuple(keys.index(key) if key in keys else None for key in header)
+            dropped = [key for key in keys if key not in header]
+            if dropped:
+                logger.warning(
+                    "Result columns {} are not in the CSV header and are dropped", dropped
+                )
+        self._column_orders[keys] = order
+        return order
+
+    def _write_batch(self, batch: NLPResultBatch) -> None:
+        order = self._column_order(batch.keys)
+        if order is None:
+            self._csv_writer.writerows(batch.rows())
+        else:
+            columns = [
+                batch.columns[index] if index is not None else None
+                for index in order
+            ]
+            self._csv_writer.writerows(
+                (
+                    note_id,
+                    *[column[row] if column is not None else "" for column in columns],
+                )
+                for row, note_id in enumerate(batch.note_ids)
             )
-            self._output_fh.write(row_val + "\n")
+        self._flush_buffer()
+
+    def _flush_buffer(self, force: bool = False) -> None:
+        if not force and self._text_buffer.tell() < WRITE_BUFFER_BYTES:
+            return
+        if self._output_fh is None:
+            self._output_fh = self._open_output(self.output_path)
+        self._write_buffer(self._output_fh)
+        if self._manifest is not None and not self._deferred_batches:
+            # Push the chunk to the OS before the manifest claims its notes
+            self._output_fh.flush()
+            self._mark_committed()
+
+    def _write_buffer(self, output_fh: BinaryIO) -> None:
+        output_fh.write(self._text_buffer.getvalue().encode(DEFAULT_ENCODING))
+        self._text_buffer.seek(0)
+        self._text_buffer.truncate()
+
+    def _copy_results(self, copies: Dict[str | int, List[str | int]]) -> int:
+        """Append a copy of the canonical rows for every duplicate note.
+
+        The file is read once; the copies go to a temporary file (a complete
+        gzip member or zstd frame when compressed) that is then appended to
+        the output, so the file is never read and written at once.
+        """
+        if not os.path.exists(self.output_path):
+            return 0
+        # Note ids are read back as text
+        duplicate_note_ids = {str(note_id): copy for note_id, copy in copies.items()}
+        copy_path = f"{self.output_path}.duplicates"
+        rows_copied = 0
+        try:
+            with self._open_input(self.output_path) as input_fh, self._open_output(
+                copy_path
+            ) as copy_fh:
+                rows = csv.reader(
+                    io.TextIOWrapper(input_fh, encoding=DEFAULT_ENCODING, newline=""),
+                    delimiter=DEFAULT_DELIMITER,
+                )
+                next(rows, None)  # header
+                for row in rows:
+                    note_ids = duplicate_note_ids.get(row[0]) if row else None
+                    if note_ids is None:
+                        continue
+                    for note_id in note_ids:
+                        row[0] = note_id
+                        self._csv_writer.writerow(row)
+                    rows_copied += len(note_ids)
+                    if self._text_buffer.tell() >= WRITE_BUFFER_BYTES:
+                        self._write_buffer(copy_fh)
+                self._write_buffer(copy_fh)
+            if rows_copied:
+                with open(self.output_path, "ab") as output_fh, open(
+                    copy_path, "rb"
+                ) as copy_fh:
+                    shutil.copyfileobj(copy_fh, output_fh, WRITE_BUFFER_BYTES)
+        finally:
+            super()._remove_output(copy_path)
+        return rows_copied
 
     def writer_details(self) -> Dict[str, Any]:
         return {"csv_path": self.output_path}
@@ -48,14 +239,57 @@ class CSVWriter(NLPResultWriter):
         return "csv"
 
     def _build_output_file_name(self) -> str:
-        return f"results_{self._get_results_id()}.csv"
+        suffix: str = COMPRESSION_SUFFIXES[self._compression]
+        return f"results_{self._get_results_id()}.csv{suffix}"
+
+    def _merge_outputs(self, shard_paths: List[str], merged_path: str) -> None:
+        """Concatenate the shard files, keeping only the first header."""
+        if os.path.exists(merged_path):
+            raise FileExistsError(f"File {merged_path} already exists.")
+        header: bytes | None = None
+        with self._open_output(merged_path) as merged_fh:
+            for shard_path in shard_paths:
+                with self._open_input(shard_path) as shard_fh:
+                    shard_header = shard_fh.readline()
+                    if not shard_header:
+                        # The shard received no results
+                        continue
+                    if header is None:
+                        header = shard_header
+                        merged_fh.write(header)
+                    elif shard_header != header:
+                        logger.warning(
+                            "Shard {} has a different header: {!r}",
+                            shard_path,
+                            shard_header,
+                        )
+                    shutil.copyfileobj(shard_fh, merged_fh, WRITE_BUFFER_BYTES)
+        self._write_notes(merged_path)
+
+    def _remove_output(self, output_path: str) -> None:
+        super()._remove_output(output_path)
+        super()._remove_output(f"{output_path}.notes.md")
+
+    def _write_notes(self, output_path: str) -> None:
+        with open(f"{output_path}.notes.md", "w") as notes_fh:
+            notes_fh.write("# Notes\n")
+            notes_fh.write("\n")
+            notes_fh.write(f"Delimiter Used: {DEFAULT_DELIMITER}\n")
+            notes_fh.write(
+                'Quoting: fields containing the delimiter, a double quote or a newline are wrapped in double quotes ("" escapes a quote)\n'
+            )
+            notes_fh.write(f"Encoding: {DEFAULT_ENCODING}\n")
+            notes_fh.write(f"Compression: {self._compression}\n")
 
     def _on_write_complete(self) -> None:
         """
         Close the output file handle and write notes about the CSV file.
         """
-        self._output_fh.close()
-        with open(f"{self.output_path}.notes.md", "w") as notes_fh:
-            notes_fh.write("# Notes\n")
-            notes_fh.write("\n")
-            notes_fh.write(f"Delimiter Used: {DEFAULT_DELIMITER}\n")
+        if self._deferred_batches:
+            if not self._header_written:
+                self._write_header([])
+            self._write_deferred_batches()
+        self._flush_buffer(force=True)
+        if self._output_fh is not None:
+            self._output_fh.close()
+        self._write_notes(self.output_path)
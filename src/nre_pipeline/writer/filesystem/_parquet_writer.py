@@ -0,0 +1,351 @@
+import json
+import numbers
+import os
+from array import array
+from itertools import chain
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Type, Union
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from loguru import logger
+
+from nre_pipeline.common.base._base_writer import NLPResultWriter
+from nre_pipeline.models._nlp_result import NLPResultItem
+from nre_pipeline.models._nlp_result_batch import (
+    NLPResultBatch,
+    TResultSchema,
+    as_result_batches,
+)
+
+# String columns stored as Arrow dictionaries (few distinct values, many rows)
+DICTIONARY_COLUMNS = ("cui", "semtypes")
+
+
+def arrow_type_for(key: str, python_type: Type) -> pa.DataType:
+    """Map a result feature's Python type to an Arrow type.
+
+    Args:
+        key (str): The feature key.
+        python_type (Type): The feature value type.
+
+    Raises:
+        ValueError: If the type is not supported.
+
+    Returns:
+        pa.DataType: The Arrow type of the column.
+    """
+    if python_type is bool:
+        return pa.bool_()
+    elif issubclass(python_type, numbers.Integral):
+        return pa.int64()
+    elif issubclass(python_type, numbers.Real):
+        return pa.float64()
+    elif python_type is str:
+        if key in DICTIONARY_COLUMNS:
+            return pa.dictionary(pa.int32(), pa.string())
+        return pa.string()
+    elif python_type in (set, list):
+        # Parquet dictionary-encodes the list values on disk
+        return pa.list_(pa.string())
+    elif python_type is dict:
+        return pa.string()
+    elif python_type is type(None):
+        return pa.null()
+    else:
+        raise ValueError(f"Unsupported Python type: {python_type}")
+
+
+def to_arrow_array(
+    values: Sequence[Any], python_type: Type, arrow_type: pa.DataType
+) -> pa.Array:
+    """Convert one buffered column to an Arrow array."""
+    if isinstance(values, array) and values.typecode in ("q", "d"):
+        # Zero-copy from the columnar NLPResultBatch storage
+        return pa.Array.from_buffers(
+            arrow_type, len(values), [None, pa.py_buffer(values)]
+        )
+    if python_type is set:
+        values = [sorted(value) if value is not None else None for value in values]
+    elif python_type is dict:
+        values = [json.dumps(value) if value is not None else None for value in values]
+    if pa.types.is_dictionary(arrow_type):
+        return pa.array(values, type=arrow_type.value_type).dictionary_encode()
+    return pa.array(values, type=arrow_type)
+
+
+class ParquetWriter(NLPResultWriter):
+    """Write NLP results to Parquet files.
+
+    Results are buffered per row group and written from the writer process,
+    so at most one row group is held in memory. The output is a directory of
+    ``part-NNNNN.parquet`` files; a new part is started once the current one
+    reaches ``max_file_bytes`` or when the result schema changes. Rows without
+    any features (e.g. notes that failed to process) are written with null
+    feature columns.
+
+    Args:
+        row_group_rows (int | None, optional): Rows per row group. Defaults to
+            the PARQUET_ROW_GROUP_ROWS environment variable.
+        max_file_bytes (int | None, optional): Size at which a part file is
+            rolled over. Defaults to the PARQUET_MAX_FILE_MB environment
+            variable.
+        compression (str, optional): Parquet compression codec. Defaults to
+            "zstd".
+    """
+
+    def __init__(
+        self,
+        *args,
+        row_group_rows: int | None = None,
+        max_file_bytes: int | None = None,
+        compression: str = "zstd",
+        **kwargs,
+    ) -> None:
+        self._row_group_rows: int = self._get_row_group_rows(row_group_rows)
+        self._max_file_bytes: int = self._get_max_file_bytes(max_file_bytes)
+        self._compression: str = compression
+        self._schema: TResultSchema | None = None
+        self._arrow_schema: pa.Schema | None = None
+        self._buffer: List[NLPResultBatch] = []
+        self._buffered_rows: int = 0
+        # Opened lazily so the file handles belong to the writer process
+        self._sink: pa.NativeFile | None = None
+        self._parquet_writer: pq.ParquetWriter | None = None
+        self._part_index: int = 0
+        super().__init__(*args, **kwargs)
+        if os.path.exists(self.output_path):
+            raise FileExistsError(f"Directory {self.output_path} already exists.")
+        Path(self.output_path).mkdir(parents=True)
+
+    def _get_row_group_rows(self, row_group_rows: int | None = None) -> int:
+        """Get the number of rows per Parquet row group.
+
+        Args:
+            row_group_rows (int | None, optional): The desired row count. Defaults
+                to the PARQUET_ROW_GROUP_ROWS environment variable.
+
+        Raises:
+            ValueError: If the row count is not positive.
+
+        Returns:
+            int: The number of rows per row group.
+        """
+        if row_group_rows is None:
+            row_group_rows = int(os.getenv("PARQUET_ROW_GROUP_ROWS", 100000) or 100000)
+        if row_group_rows <= 0:
+            raise ValueError("row_group_rows must be a positive integer")
+        return row_group_rows
+
+    def _get_max_file_bytes(self, max_file_bytes: int | None = None) -> int:
+        """Get the size at which a new part file is started.
+
+        Args:
+            max_file_bytes (int | None, optional): The desired size in bytes.
+                Defaults to the PARQUET_MAX_FILE_MB environment variable.
+
+        Raises:
+            ValueError: If the size is not positive.
+
+        Returns:
+            int: The maximum part file size in bytes.
+        """
+        if max_file_bytes is None:
+            max_file_bytes = (
+                int(os.getenv("PARQUET_MAX_FILE_MB", 512) or 512) * 1024 * 1024
+            )
+        if max_file_bytes <= 0:
+            raise ValueError("max_file_bytes must be a positive integer")
+        return max_file_bytes
+
+    def _record(
+        self, nlp_result: Union[NLPResultItem, List[NLPResultItem], NLPResultBatch]
+    ) -> None:
+        """Buffer one or more NLP results and write full row groups.
+
+        Args:
+            nlp_result (Union[NLPResultItem, List[NLPResultItem], NLPResultBatch]): NLP result item, list of items or result batch to record.
+        """
+        for batch in as_result_batches(nlp_result):
+            if len(batch) == 0:
+                continue
+            if batch.schema and batch.schema != self._schema:
+                if self._schema is not None:
+                    # A part file has a single schema; start a new one
+                    self._flush_row_group()
+                    self._close_part()
+                self._set_schema(batch.schema, batch.note_ids[0])
+            self._buffer.append(batch)
+            self._buffered_rows += len(batch)
+            if self._schema is not None and self._buffered_rows >= self._row_group_rows:
+                self._flush_row_group()
+
+    def _set_schema(self, schema: TResultSchema, note_id: str | int) -> None:
+        self._schema = schema
+        note_id_type = pa.int64() if isinstance(note_id, int) else pa.string()
+        self._arrow_schema = pa.schema(
+            [
+                pa.field("note_id", note_id_type),
+                *[
+                    pa.field(key, arrow_type_for(key, value_type))
+                    for key, value_type in schema
+                ],
+            ]
+        )
+
+    def _build_row_group(self) -> pa.Table:
+        schema: TResultSchema = self._schema or ()
+        arrow_schema: pa.Schema = self._arrow_schema
+        note_ids = list(chain.from_iterable(batch.note_ids for batch in self._buffer))
+        arrays = [pa.array(note_ids, type=arrow_schema.field("note_id").type)]
+        for index, (key, value_type) in enumerate(schema):
+            values = self._concat_column(
+                [
+                    (
+                        batch.columns[index]
+                        if batch.schema
+                        else [None] * len(batch)  # rows without features
+                    )
+                    for batch in self._buffer
+                ]
+            )
+            arrays.append(
+                to_arrow_array(values, value_type, arrow_schema.field(key).type)
+            )
+        return pa.Table.from_arrays(arrays, schema=arrow_schema)
+
+    @staticmethod
+    def _concat_column(columns: List[Sequence[Any]]) -> Sequence[Any]:
+        if len(columns) == 1:
+            return columns[0]
+        first = columns[0]
+        if isinstance(first, array) and all(
+            isinstance(column, array) and column.typecode == first.typecode
+            for column in columns
+        ):
+            values = array(first.typecode)
+            for column in columns:
+                values.extend(column)
+            return values
+        return list(chain.from_iterable(columns))
+
+    def _flush_row_group(self) -> None:
+        if not self._buffer:
+            return
+        if self._arrow_schema is None:
+            # Only rows without features so far; nothing defines the columns
+            self._set_schema((), self._buffer[0].note_ids[0])
+        table = self._build_row_group()
+        self._buffer = []
+        self._buffered_rows = 0
+
+        if self._parquet_writer is None:
+            self._open_part()
+        self._parquet_writer.write_table(table, row_group_size=table.num_rows)
+        if self._sink.tell() >= self._max_file_bytes:
+            self._close_part()
+
+    def _part_path(self, part_index: int) -> str:
+        return os.path.join(self.output_path, f"part-{part_index:05d}.parquet")
+
+    def _open_part(self) -> None:
+        self._sink = pa.OSFile(self._part_path(self._part_index), "wb")
+        self._parquet_writer = pq.ParquetWriter(
+            self._sink, self._arrow_schema, compression=self._compression
+        )
+        self._part_index += 1
+
+    def _close_part(self) -> None:
+        if self._parquet_writer is None:
+            return
+        self._parquet_writer.close()
+        self._sink.close()
+        self._parquet_writer = None
+        self._sink = None
+        # A part file is only readable once its footer is written
+        self._mark_committed()
+
+    def writer_details(self) -> Dict[str, Any]:
+        return {"parquet_path": self.output_path}
+
+    def _output_subfolder(self) -> str:
+        return "parquet"
+
+    def _build_output_file_name(self) -> str:
+        return f"results_{self._get_results_id()}"
+
+    def _merge_outputs(self, shard_paths: List[str], merged_path: str) -> None:
+        """Move every shard's part files into one directory, renumbering them.
+
+        The parts are self-contained Parquet files, so nothing is rewritten.
+        """
+        if os.path.exists(merged_path):
+            raise FileExistsError(f"Directory {merged_path} already exists.")
+        Path(merged_path).mkdir(parents=True)
+        part_index = 0
+        for shard_path in shard_paths:
+            for part_path in sorted(Path(shard_path).glob("part-*.parquet")):
+                os.replace(
+                    part_path,
+                    os.path.join(merged_path, f"part-{part_index:05d}.parquet"),
+                )
+                part_index += 1
+
+    def _copy_results(self, copies: Dict[str | int, List[str | int]]) -> int:
+        """Write the canonical rows under the duplicate note ids to new part files.
+
+        Each part is scanned one row group at a time; the copies of a part
+        go to one new part with the same schema.
+        """
+        rows_copied = 0
+        for part_index in range(self._part_index):
+            part = pq.ParquetFile(self._part_path(part_index))
+            note_id_field: pa.Field = part.schema_arrow.field("note_id")
+            canonical_note_ids = pa.array(list(copies), type=note_id_field.type)
+            copy_writer: pq.ParquetWriter | None = None
+            try:
+                for batch in part.iter_batches(batch_size=self._row_group_rows):
+                    matches = pc.indices_nonzero(
+                        pc.is_in(batch.column("note_id"), value_set=canonical_note_ids)
+                    )
+                    if len(matches) == 0:
+                        continue
+                    rows: List[int] = []
+                    note_ids: List[str | int] = []
+                    for row, canonical_note_id in zip(
+                        matches.to_pylist(),
+                        batch.column("note_id").take(matches).to_pylist(),
+                    ):
+                        for note_id in copies[canonical_note_id]:
+                            rows.append(row)
+                            note_ids.append(note_id)
+                    table = pa.Table.from_batches([batch.take(pa.array(rows))])
+                    table = table.set_column(
+                        table.schema.get_field_index("note_id"),
+                        note_id_field,
+                        pa.array(note_ids, type=note_id_field.type),
+                    )
+                    if copy_writer is None:
+                        copy_writer = pq.ParquetWriter(
+                            self._part_path(self._part_index),
+                            part.schema_arrow,
+                            compression=self._compression,
+                        )
+                        self._part_index += 1
+                    copy_writer.write_table(table)
+                    rows_copied += table.num_rows
+            finally:
+                if copy_writer is not None:
+                    copy_writer.close()
+        return rows_copied
+
+    def _on_write_complete(self) -> None:
+        """
+        Write the buffered rows and close the current part file.
+        """
+        self._flush_row_group()
+        self._close_part()
+        logger.info(
+            "Parquet writer wrote {} part file(s) to {}", self._part_index, self.output_path
+        )
@@ -0,0 +1,106 @@
+"""
+Micro-benchmark of CSVWriter against the former per-item writer loop
+(``to_dict`` twice per row, ``str``/``replace`` per value and one
+``write`` per line), using synthetic QuickUMLS-shaped result batches.
+
+    python tests/manual/test_csv_writer_benchmark.py [num_rows] [batch_size]
+"""
+
+import os
+
+os.environ.setdefault("NUMBER_DOCS_TO_WRITE_BEFORE_YIELD", "1000")
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from loguru import logger
+from nre_pipeline.common import setup_logging
+from nre_pipeline.models._nlp_result import NLPResultItem
+from nre_pipeline.models._nlp_result_batch import NLPResultBatch
+from nre_pipeline.writer.filesystem._csv_writer import DEFAULT_DELIMITER, CSVWriter
+from test_sqlite_writer_benchmark import LocalValue, build_batches
+
+
+def legacy_write(output_path: Path, items: List[NLPResultItem]) -> None:
+    """The CSVWriter._record loop before the bulk rewrite."""
+    with open(output_path, "w") as output_fh:
+        header_written = False
+        for item in items:
+            if not header_written:
+                headers: List[str] = list(item.to_dict().keys())
+                headers.insert(0, "note_id")
+                output_fh.write(DEFAULT_DELIMITER.join(headers) + "\n")
+                header_written = True
+            values: List[str] = [str(value) for value in item.to_dict().values()]
+            values.insert(0, str(item.note_id))
+            row_val: str = DEFAULT_DELIMITER.join(
+                [v.replace(DEFAULT_DELIMITER, rf"\{DEFAULT_DELIMITER}") for v in values]
+            )
+            output_fh.write(row_val + "\n")
+
+
+def run_csv_writer(output_root: Path, batches: List[NLPResultBatch], compression):
+    writer = CSVWriter(
+        outqueue=None,
+        total_written=LocalValue(),
+        process_counter=LocalValue(),
+        output_path=str(output_root),
+        compression=compression,
+    )
+    for batch in batches:
+        writer.record(batch)
+    writer._on_write_complete()
+    return writer.output_path
+
+
+def report(label: str, num_rows: int, elapsed: float, output_path) -> None:
+    logger.info(
+        "{:>10}: {} rows in {:.2f}s ({:.0f} rows/sec, {:.1f}MB)",
+        label,
+        num_rows,
+        elapsed,
+        num_rows / elapsed,
+        os.path.getsize(output_path) / 1024 / 1024,
+    )
+
+
+if __name__ == "__main__":
+    setup_logging(verbose=False)
+
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    batches = build_batches(num_rows, batch_size)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The legacy loop consumed row-oriented items; build them up front and
+        # report that cost separately
+        start = time.perf_counter()
+        items = [item for batch in batches for item in batch]
+        logger.info(
+            "building NLPResultItem rows for the legacy loop: {:.2f}s",
+            time.perf_counter() - start,
+        )
+        legacy_path = Path(tmp) / "legacy.csv"
+        start = time.perf_counter()
+        legacy_write(legacy_path, items)
+        report("legacy", num_rows, time.perf_counter() - start, legacy_path)
+
+        compressions = ["none", "gzip"]
+        try:
+            import zstandard  # noqa: F401
+
+            compressions.append("zstd")
+        except ImportError:
+            logger.info("zstandard is not installed; skipping zstd")
+
+        for compression in compressions:
+            output_root = Path(tmp) / compression
+            output_root.mkdir()
+            start = time.perf_counter()
+            output_path = run_csv_writer(output_root, batches, compression)
+            report(compression, num_rows, time.perf_counter() - start, output_path)
+
+    logger.complete()
@@ -0,0 +1,117 @@
+"""
+Compare document batching modes on a corpus with heavy-tailed note lengths.
+
+    python tests/manual/test_document_batching_benchmark.py [num_workers]
+
+Batches from each DocumentBatchBuilder mode are processed by a process pool
+with a CPU cost proportional to note length (a stand-in for QuickUMLS).
+For each mode the script reports docs/sec, the per-batch latency (p50, p95,
+max) and the tail: the wall time beyond a perfectly balanced run, i.e. how
+long workers sat idle waiting for the last batches.
+"""
+
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+from loguru import logger
+from nre_pipeline.common import setup_logging
+from nre_pipeline.models import Document
+from nre_pipeline.models._batch import DocumentBatch, DocumentBatchBuilder
+
+NUM_DOCS = 20000
+BATCH_SIZE = 100
+WORDS = ["patient", "denies", "chest", "pain", "fever", "history", "of", "the"]
+# name -> (max_batch_chars, sort_window)
+MODES: Dict[str, Tuple[int | None, int]] = {
+    "count": (None, 0),
+    "chars": (300000, 0),
+    "sort": (None, 2000),
+    "chars+sort": (300000, 2000),
+}
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def build_corpus(num_docs: int) -> List[Document]:
+    """Notes with log-normal lengths: mostly short, a few very long."""
+    rng = random.Random(0)
+    documents = []
+    for idx in range(num_docs):
+        num_words = max(5, int(rng.lognormvariate(5.5, 1.2)))
+        text = " ".join(rng.choice(WORDS) for _ in range(num_words))
+        documents.append(Document(note_id=f"note_{idx:08d}", text=text, valid=True))
+    return documents
+
+
+def process_batch(batch: DocumentBatch) -> float:
+    start = time.perf_counter()
+    for document in batch:
+        for _ in range(5):
+            WORD_PATTERN.findall(document.text)
+    return time.perf_counter() - start
+
+
+def build_batches(
+    documents: List[Document], max_batch_chars: int | None, sort_window: int
+) -> List[DocumentBatch]:
+    builder = DocumentBatchBuilder(
+        BATCH_SIZE, max_batch_chars=max_batch_chars, sort_window=sort_window
+    )
+    batches: List[DocumentBatch] = []
+    for document in documents:
+        batches.extend(builder.add(document))
+    batches.extend(builder.flush())
+    return batches
+
+
+def run_mode(
+    documents: List[Document], max_batch_chars: int | None, sort_window: int, num_workers: int
+) -> Dict[str, float]:
+    batches = build_batches(documents, max_batch_chars, sort_window)
+    with ProcessPoolExecutor(num_workers) as pool:
+        # Warm the workers up so process start-up is not measured
+        list(pool.map(process_batch, batches[:num_workers]))
+        start = time.perf_counter()
+        batch_seconds = list(pool.map(process_batch, batches))
+        elapsed = time.perf_counter() - start
+    batch_seconds.sort()
+    return {
+        "batches": len(batches),
+        "docs_per_sec": len(documents) / elapsed,
+        "p50_ms": 1000 * statistics.median(batch_seconds),
+        "p95_ms": 1000 * batch_seconds[int(0.95 * (len(batch_seconds) - 1))],
+        "max_ms": 1000 * batch_seconds[-1],
+        "tail_seconds": elapsed - sum(batch_seconds) / num_workers,
+    }
+
+
+if __name__ == "__main__":
+    setup_logging(verbose=False)
+    num_workers = int(sys.argv[1]) if len(sys.argv) > 1 else min(8, os.cpu_count() or 1)
+
+    documents = build_corpus(NUM_DOCS)
+    logger.info(
+        "{} notes, {} characters, {} workers",
+        len(documents),
+        sum(len(d.text) for d in documents),
+        num_workers,
+    )
+    for name, (max_batch_chars, sort_window) in MODES.items():
+        stats = run_mode(documents, max_batch_chars, sort_window, num_workers)
+        logger.info(
+            "{:<10} {:>4} batches {:>8.0f} docs/sec  batch p50 {:>7.1f}ms p95 {:>7.1f}ms max {:>7.1f}ms  tail {:.2f}s",
+            name,
+            stats["batches"],
+            stats["docs_per_sec"],
+            stats["p50_ms"],
+            stats["p95_ms"],
+            stats["max_ms"],
+            stats["tail_seconds"],
+        )
+
+    logger.complete()
@@ -0,0 +1,101 @@
+"""
+Split a large concatenated note file with FileSystemReader and compare peak
+memory with reading the file as one document.
+
+    python tests/manual/test_mapped_splitting_benchmark.py [file_mb]
+
+Builds one file of ``file_mb`` MB (200 by default) of synthetic notes, each
+preceded by a ``=== NOTE <id> ===`` header line, then in fresh processes:
+
+- reads it as one document (the behaviour without a split setting);
+- memory maps it and splits it on the header pattern, checking that every
+  note comes back with its id and text.
+"""
+
+import os
+
+os.environ.setdefault("DOCUMENT_BATCH_SIZE", "1000")
+os.environ.setdefault("INQUEUE_MAX_DOCBATCH_COUNT", "10")
+
+import pickle
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+from pathlib import Path
+from typing import Dict, Tuple
+
+from loguru import logger
+from nre_pipeline.common import setup_logging
+from nre_pipeline.reader import FileSystemReader
+
+WORDS = ["patient", "denies", "chest", "pain", "fever", "history", "of", "the", "é"]
+HEADER_PATTERN = r"^=== NOTE (?P<note_id>\d+) ===\n"
+
+
+def build_concatenated_file(path: Path, size_mb: int) -> Dict[str, str]:
+    """Write notes until the file reaches ``size_mb``; return a sample of them."""
+    rng = random.Random(0)
+    sample: Dict[str, str] = {}
+    target = size_mb * 1024 * 1024
+    with open(path, "w", encoding="utf-8") as fh:
+        note_index = 0
+        while fh.tell() < target:
+            text = " ".join(rng.choices(WORDS, k=rng.randint(100, 2000))) + "\n"
+            fh.write(f"=== NOTE {note_index} ===\n{text}")
+            if note_index % 997 == 0:
+                sample[str(note_index)] = text
+            note_index += 1
+    return sample
+
+
+def read_file(input_path: str, split: bool) -> Tuple[int, Dict[str, str], float, float]:
+    setup_logging(verbose=False)
+    config = {"split_pattern": HEADER_PATTERN, "split_min_bytes": 1} if split else {}
+    start = time.perf_counter()
+    documents = 0
+    texts: Dict[str, str] = {}
+    with Manager() as mgr:
+        reader = FileSystemReader.create(
+            manager=mgr, input_paths=input_path, allowed_extensions=[".txt"], **config
+        )
+        # Iterate in this process and pickle every batch like the inqueue would
+        for batch in reader._iter():
+            for document in pickle.loads(pickle.dumps(batch)):
+                documents += 1
+                if document.note_id in ("0", "997", "1994"):
+                    texts[str(document.note_id)] = document.text
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return documents, texts, time.perf_counter() - start, peak_mb
+
+
+if __name__ == "__main__":
+    setup_logging(verbose=False)
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = Path(tmp) / "input"
+        input_path.mkdir()
+        sample = build_concatenated_file(input_path / "ocr_dump.txt", size_mb)
+
+        for split in (False, True):
+            # A fresh process per mode, so the peak RSS is its own
+            with ProcessPoolExecutor(1) as pool:
+                documents, texts, elapsed, peak_mb = pool.submit(
+                    read_file, str(input_path), split
+                ).result()
+            logger.info(
+                "{}: {} document(s) in {:.2f}s, peak RSS {:.0f}MB",
+                "mmap split" if split else "whole file",
+                documents,
+                elapsed,
+                peak_mb,
+            )
+            if split:
+                for note_id, text in texts.items():
+                    assert text == sample[note_id], f"note {note_id} differs"
+
+    logger.complete()
@@ -0,0 +1,118 @@
+"""
+Run the NoOp pipeline with several reader processes sharing the inqueue and
+compare with a single reader.
+
+    python tests/manual/test_multiple_readers.py [num_readers] [input_path]
+
+Without an input path a synthetic corpus is generated. Reads are slowed
+down by a fixed latency per file, like a network mount, so reading is the
+bottleneck. For each partition the script checks that every note reached
+the writer exactly once.
+"""
+
+import os
+
+os.environ.setdefault("DOCUMENT_BATCH_SIZE", "100")
+os.environ.setdefault("INQUEUE_MAX_DOCBATCH_COUNT", "10")
+os.environ.setdefault("OUTQUEUE_MAX_DOCBATCH_COUNT", "1000")
+os.environ.setdefault("NUMBER_DOCS_TO_WRITE_BEFORE_YIELD", "1000")
+
+import csv
+import sys
+import tempfile
+import time
+from collections import Counter
+from multiprocessing import Manager, freeze_support
+from pathlib import Path
+
+from loguru import logger
+from nre_pipeline.common import setup_logging
+from nre_pipeline.processor.noop_processor import NoOpProcessor
+from nre_pipeline.writer.filesystem._csv_writer import DEFAULT_DELIMITER, CSVWriter
+from test_reader_scan_benchmark import SlowStorageReader
+from test_result_batching_benchmark import build_synthetic_corpus
+
+NUM_SYNTHETIC_DOCS = 4000
+NUM_WORKERS = 4
+
+
+def run_pipeline(num_readers: int, partition: str, input_path: Path, output_path: Path):
+    with Manager() as mgr:
+        readers, inqueue, reader_counter = SlowStorageReader.create_readers(
+            mgr,
+            num_readers=num_readers,
+            input_paths=input_path,
+            allowed_extensions=[".txt"],
+            partition=partition,
+        )
+        processors, outqueue, process_counter = NoOpProcessor.create(
+            mgr,
+            num_workers=NUM_WORKERS,
+            inqueue=inqueue,
+            num_readers=num_readers,
+        )
+        writer = CSVWriter.create(
+            mgr,
+            outqueue=outqueue,
+            process_counter=process_counter,
+            output_path=str(output_path),
+        )
+
+        start = time.perf_counter()
+        for r in readers:
+            r.start()
+        for p in processors:
+            p.start()
+        writer.start()
+
+        for r in readers:
+            r.join()
+        for p in processors:
+            p.join()
+        writer.join()
+        elapsed = time.perf_counter() - start
+        assert reader_counter.get() == 0
+        return readers[0].total_documents_read.get(), elapsed, writer.output_path
+
+
+def count_notes(csv_path: str) -> Counter:
+    with open(csv_path, newline="") as fh:
+        rows = csv.DictReader(fh, delimiter=DEFAULT_DELIMITER)
+        return Counter(row["note_id"] for row in rows)
+
+
+if __name__ == "__main__":
+    freeze_support()
+    setup_logging(verbose=False)
+    num_readers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if len(sys.argv) > 2:
+            input_path = Path(sys.argv[2])
+        else:
+            input_path = Path(tmp) / "input"
+            build_synthetic_corpus(input_path, NUM_SYNTHETIC_DOCS)
+
+        expected = None
+        for readers, partition in ((1, "hash"), (num_readers, "hash"), (num_readers, "directory")):
+            output_path = Path(tmp) / f"output_{readers}_{partition}"
+            output_path.mkdir()
+            total_read, elapsed, csv_path = run_pipeline(
+                readers, partition, input_path, output_path
+            )
+            notes = count_notes(csv_path)
+            if expected is None:
+                expected = set(notes)
+            assert set(notes) == expected, "a note was lost or added"
+            assert max(notes.values()) == 1, "a note was read twice"
+            logger.info(
+                "{} reader(s), {} partition: {} notes read, {} written in {:.2f}s ({:.0f} docs/sec)",
+                readers,
+                partition,
+                total_read,
+                len(notes),
+                elapsed,
+                total_read / elapsed,
+            )
+
+    logger.complete()
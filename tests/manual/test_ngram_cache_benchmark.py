@@ -0,0 +1,104 @@
+"""
+Compare QuickUMLS throughput without the n-gram candidate cache, with a cold
+cache, and with a warm cache file saved by the cold run, and check that all
+three write the same results.
+
+    python tests/manual/test_ngram_cache_benchmark.py [input_path]
+
+Needs QUICKUMLS_PATH. Without an input path a synthetic corpus is generated.
+Each worker logs its hit, miss and eviction counts when it exits.
+"""
+
+import os
+
+os.environ.setdefault("DOCUMENT_BATCH_SIZE", "1000")
+os.environ.setdefault("INQUEUE_MAX_DOCBATCH_COUNT", "10")
+os.environ.setdefault("OUTQUEUE_MAX_DOCBATCH_COUNT", "1000")
+os.environ.setdefault("NUMBER_DOCS_TO_WRITE_BEFORE_YIELD", "1000")
+
+import sys
+import tempfile
+import time
+from collections import Counter
+from multiprocessing import Manager, freeze_support
+from pathlib import Path
+
+from loguru import logger
+from nre_pipeline.common import setup_logging
+from nre_pipeline.reader._filesystem_reader import FileSystemReader
+from nre_pipeline.writer.filesystem._csv_writer import CSVWriter
+from test_result_batching_benchmark import (
+    NUM_SYNTHETIC_DOCS,
+    NUM_WORKERS,
+    build_synthetic_corpus,
+    get_processor_type,
+)
+
+
+def run_pipeline(input_path: Path, output_path: Path, **cache_config):
+    processor_type, processor_kwargs = get_processor_type("quickumls")
+    with Manager() as mgr:
+        reader = FileSystemReader.create(
+            manager=mgr, input_paths=input_path, allowed_extensions=[".txt"]
+        )
+        processors, outqueue, process_counter = processor_type.create(
+            mgr,
+            num_workers=NUM_WORKERS,
+            inqueue=reader.inqueue,
+            num_readers=reader.num_readers,
+            **processor_kwargs,
+            **cache_config,
+        )
+        writer = CSVWriter.create(
+            mgr,
+            outqueue=outqueue,
+            process_counter=process_counter,
+            output_path=str(output_path),
+        )
+        start = time.perf_counter()
+        reader.start()
+        for p in processors:
+            p.start()
+        writer.start()
+        reader.join()
+        for p in processors:
+            p.join()
+        writer.join()
+        return writer, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    freeze_support()
+    setup_logging(verbose=False)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if len(sys.argv) > 1:
+            input_path = Path(sys.argv[1])
+        else:
+            input_path = Path(tmp) / "input"
+            build_synthetic_corpus(input_path, NUM_SYNTHETIC_DOCS)
+        warm_path = str(Path(tmp) / "ngram_cache.db")
+
+        runs = [
+            ("no cache", {"ngram_cache_size": 0}),
+            ("cold cache", {"ngram_cache_path": warm_path, "ngram_cache_save": True}),
+            ("warm cache", {"ngram_cache_path": warm_path, "ngram_cache_save": False}),
+        ]
+        expected = None
+        for label, cache_config in runs:
+            output_path = Path(tmp) / label.replace(" ", "_")
+            output_path.mkdir()
+            writer, elapsed = run_pipeline(input_path, output_path, **cache_config)
+            with open(writer.output_path) as fh:
+                results = Counter(fh.readlines()[1:])
+            if expected is None:
+                expected = results
+            assert results == expected, f"{label} results differ from the uncached run"
+            logger.info(
+                "{:>10}: {} results in {:.2f}s",
+                label,
+                sum(results.values()),
+                elapsed,
+            )
+
+    logger.complete()
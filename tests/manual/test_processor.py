@@ -86,7 +86,7 @@ if __name__ == "__main__":
         processors: List[NoOpProcessor]
         outqueue: queue.Queue[NLPResultItem | TQueueEmpty]
         processors, outqueue = NoOpProcessor.create(
-            mgr, **{"num_workers": 1, "inqueue": inqueue}
+            mgr, **{"num_workers": 1, "inqueue": inqueue, "num_readers": 1}
         )
         for p in processors:
             p.start()
@@ -0,0 +1,112 @@
+"""
+Measure processor startup time and memory per worker, with every worker
+loading its own QuickUMLS matcher and with one matcher shared copy-on-write.
+
+    python tests/manual/test_processor_startup_benchmark.py quickumls [workers ...]
+    python tests/manual/test_processor_startup_benchmark.py noop [workers ...]
+
+The QuickUMLS run needs QUICKUMLS_PATH; the NoOp run gives the baseline of
+an empty worker. Workers default to 4, 16 and 32. Startup is the time from
+``create`` until every worker has finished ``_on_worker_start``. Each worker
+then reports its RSS, which counts shared pages in full, and its PSS, which
+splits them between the processes sharing them (Linux only).
+"""
+
+import os
+
+# No writer drains the outqueue; it must hold every worker's QUEUE_EMPTY
+os.environ.setdefault("OUTQUEUE_MAX_DOCBATCH_COUNT", "1000")
+
+import sys
+import time
+from multiprocessing import Manager, freeze_support
+from typing import Dict, List, Tuple
+
+from loguru import logger
+from nre_pipeline.common import setup_logging
+from nre_pipeline.common.base._consts import QUEUE_EMPTY
+from test_result_batching_benchmark import get_processor_type
+
+DEFAULT_WORKER_COUNTS = (4, 16, 32)
+
+
+def memory_mb() -> Tuple[float, float]:
+    """Get the RSS and PSS of the current process in MB."""
+    values: Dict[str, float] = {}
+    with open("/proc/self/smaps_rollup") as fh:
+        for line in fh:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key] = int(rest.split()[0]) / 1024
+    return values["Rss"], values["Pss"]
+
+
+def startup_probe(processor_type):
+    """Subclass a processor to report when each worker is ready."""
+
+    class StartupProbe(processor_type):
+        def __init__(self, *args, ready=None, **config) -> None:
+            self._ready = ready
+            super().__init__(*args, **config)
+
+        def _on_worker_start(self) -> None:
+            super()._on_worker_start()
+            self._ready.put((time.time(), *memory_mb()))
+
+    return StartupProbe
+
+
+def measure_startup(processor_name: str, num_workers: int, shared: bool):
+    processor_type, processor_kwargs = get_processor_type(processor_name)
+    if processor_name == "quickumls":
+        processor_kwargs["share_matcher"] = shared
+    with Manager() as mgr:
+        inqueue = mgr.Queue()
+        ready = mgr.Queue()
+        start = time.time()
+        processors, _, _ = startup_probe(processor_type).create(
+            mgr,
+            num_workers=num_workers,
+            inqueue=inqueue,
+            num_readers=1,
+            ready=ready,
+            **processor_kwargs,
+        )
+        parent_rss, _ = memory_mb()
+        for p in processors:
+            p.start()
+        reports: List[Tuple[float, float, float]] = [
+            ready.get(timeout=600) for _ in processors
+        ]
+        startup_seconds = max(t for t, _, _ in reports) - start
+        inqueue.put(QUEUE_EMPTY)
+        for p in processors:
+            p.join()
+    rss = sum(r for _, r, _ in reports) / num_workers
+    pss = sum(p for _, _, p in reports) / num_workers
+    return startup_seconds, parent_rss, rss, pss
+
+
+if __name__ == "__main__":
+    freeze_support()
+    setup_logging(verbose=False)
+    processor_name = sys.argv[1] if len(sys.argv) > 1 else "quickumls"
+    worker_counts = [int(n) for n in sys.argv[2:]] or list(DEFAULT_WORKER_COUNTS)
+
+    for num_workers in worker_counts:
+        for shared in (False, True):
+            startup_seconds, parent_rss, rss, pss = measure_startup(
+                processor_name, num_workers, shared
+            )
+            logger.info(
+                "{} x{:<3} {:<10}: startup {:.1f}s, parent RSS {:.0f}MB, per worker RSS {:.0f}MB / PSS {:.0f}MB",
+                processor_name,
+                num_workers,
+                "shared" if shared else "per-worker",
+                startup_seconds,
+                parent_rss,
+                rss,
+                pss,
+            )
+
+    logger.complete()
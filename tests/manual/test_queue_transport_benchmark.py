@@ -0,0 +1,117 @@
+"""
+Compare the queue transports on the reader -> processors -> writer hop and
+report docs/sec for each backend.
+
+A producer process puts DocumentBatch objects into the inqueue, worker
+processes turn every document into an NLPResultItem on the outqueue and a
+single consumer drains the outqueue, mirroring the IPC pattern of
+CorpusReader, Processor and NLPResultWriter without disk or NLP cost.
+
+    python tests/manual/test_queue_transport_benchmark.py [num_docs] [num_workers]
+"""
+
+import queue
+import random
+import sys
+import time
+from multiprocessing import Manager, Process, freeze_support
+
+from loguru import logger
+from nre_pipeline.common import setup_logging
+from nre_pipeline.common.base._consts import QUEUE_EMPTY
+from nre_pipeline.models import Document, DocumentBatch
+from nre_pipeline.models._nlp_result import NLPResultItem
+from nre_pipeline.models._nlp_result_item import NLPResultFeature
+from nre_pipeline.queues import get_queue_transport
+
+WORDS = ["the", "patient", "denies", "chest", "pain", "history", "of", "fever"]
+BATCH_SIZE = 1000
+
+
+def produce(inqueue, num_docs: int, num_workers: int) -> None:
+    rng = random.Random(0)
+    documents = []
+    for idx in range(num_docs):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(50, 400)))
+        documents.append(Document(note_id=idx, text=text, valid=True))
+        if len(documents) == BATCH_SIZE:
+            inqueue.put(DocumentBatch(documents))
+            documents = []
+    if documents:
+        inqueue.put(DocumentBatch(documents))
+    for _ in range(num_workers):
+        inqueue.put(QUEUE_EMPTY)
+
+
+def work(inqueue, outqueue) -> None:
+    while True:
+        item = inqueue.get()
+        if item == QUEUE_EMPTY:
+            break
+        for doc in item:
+            outqueue.put(
+                NLPResultItem(
+                    note_id=doc.note_id,
+                    result_features=[
+                        NLPResultFeature("token_count", len(doc.text)),
+                        NLPResultFeature("first_word", doc.text[:8]),
+                    ],
+                )
+            )
+    outqueue.put(QUEUE_EMPTY)
+
+
+def consume(outqueue, num_workers: int) -> int:
+    received = 0
+    finished = 0
+    while finished < num_workers:
+        try:
+            item = outqueue.get(timeout=1)
+        except queue.Empty:
+            continue
+        if item == QUEUE_EMPTY:
+            finished += 1
+        else:
+            received += 1
+    return received
+
+
+def run(transport_name: str, num_docs: int, num_workers: int):
+    with Manager() as mgr:
+        transport = get_queue_transport(mgr, transport_name)
+        inqueue = transport.create_queue(10)
+        outqueue = transport.create_queue(10000)
+
+        start = time.perf_counter()
+        producer = Process(target=produce, args=(inqueue, num_docs, num_workers))
+        workers = [
+            Process(target=work, args=(inqueue, outqueue)) for _ in range(num_workers)
+        ]
+        producer.start()
+        for w in workers:
+            w.start()
+        received = consume(outqueue, num_workers)
+        producer.join()
+        for w in workers:
+            w.join()
+        return received, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    freeze_support()
+    setup_logging(verbose=False)
+
+    num_docs = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    num_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    for transport_name in ("manager", "native"):
+        received, elapsed = run(transport_name, num_docs, num_workers)
+        logger.info(
+            "{:>8} transport: {} docs in {:.2f}s ({:.0f} docs/sec)",
+            transport_name,
+            received,
+            elapsed,
+            received / elapsed,
+        )
+
+    logger.complete()
@@ -0,0 +1,126 @@
+"""
+Compare FileSystemReader's file listing and reading with different thread
+counts against the previous os.walk scan and serial reads.
+
+    python tests/manual/test_reader_scan_benchmark.py [input_path]
+
+Without an input path a synthetic corpus is generated. Run it against a
+network mount to see the effect of the thread pools on per-file latency;
+the last runs simulate such latency on a local corpus.
+"""
+
+import os
+
+os.environ.setdefault("DOCUMENT_BATCH_SIZE", "1000")
+os.environ.setdefault("INQUEUE_MAX_DOCBATCH_COUNT", "10")
+
+import sys
+import tempfile
+import time
+from multiprocessing import Manager
+from pathlib import Path
+
+from loguru import logger
+from nre_pipeline.common import setup_logging
+from nre_pipeline.reader._directory_scanner import DirectoryScanner
+from nre_pipeline.reader._filesystem_reader import FileSystemReader
+from test_result_batching_benchmark import build_synthetic_corpus
+
+NUM_SYNTHETIC_DOCS = 50000
+WORKER_COUNTS = (1, 4, 16)
+SIMULATED_READ_LATENCY_SECONDS = 0.002
+SIMULATED_LATENCY_DOCS = 5000
+
+
+class SlowStorageReader(FileSystemReader):
+    """FileSystemReader with a fixed delay per file, like a network mount."""
+
+    def _read_document(self, source_path, note_id):
+        time.sleep(SIMULATED_READ_LATENCY_SECONDS)
+        return super()._read_document(source_path, note_id)
+
+
+def legacy_scan(input_path: Path) -> int:
+    count = 0
+    for root, _, files in os.walk(input_path):
+        for f in files:
+            path = Path(root) / f
+            if path.suffix.lower() in {".txt"}:
+                count += 1
+    return count
+
+
+def read_all(
+    input_path: Path, scan_workers: int, read_workers: int, reader_type=FileSystemReader
+) -> int:
+    with Manager() as mgr:
+        reader = reader_type.create(
+            manager=mgr,
+            input_paths=input_path,
+            allowed_extensions=[".txt"],
+            scan_workers=scan_workers,
+            read_workers=read_workers,
+        )
+        # Iterate in this process; no queue or processors involved
+        count = sum(len(batch) for batch in reader._iter())
+        logger.info("{}", reader.read_stats)
+        return count
+
+
+if __name__ == "__main__":
+    setup_logging(verbose=False)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if len(sys.argv) > 1:
+            input_path = Path(sys.argv[1])
+        else:
+            input_path = Path(tmp) / "input"
+            build_synthetic_corpus(input_path, NUM_SYNTHETIC_DOCS)
+
+        start = time.perf_counter()
+        count = legacy_scan(input_path)
+        logger.info("os.walk scan: {} files in {:.2f}s", count, time.perf_counter() - start)
+
+        for workers in WORKER_COUNTS:
+            start = time.perf_counter()
+            count = sum(
+                1
+                for _ in DirectoryScanner(
+                    [str(input_path)], workers, lambda name: name.endswith(".txt")
+                )
+            )
+            logger.info(
+                "scandir scan x{}: {} files in {:.2f}s",
+                workers,
+                count,
+                time.perf_counter() - start,
+            )
+
+        for workers in WORKER_COUNTS:
+            start = time.perf_counter()
+            count = read_all(input_path, workers, workers)
+            elapsed = time.perf_counter() - start
+            logger.info(
+                "scan + read x{}: {} documents in {:.2f}s ({:.0f} docs/sec)",
+                workers,
+                count,
+                elapsed,
+                count / elapsed,
+            )
+
+        slow_input_path = Path(tmp) / "slow_input"
+        build_synthetic_corpus(slow_input_path, SIMULATED_LATENCY_DOCS)
+        for workers in WORKER_COUNTS:
+            start = time.perf_counter()
+            count = read_all(slow_input_path, 1, workers, SlowStorageReader)
+            elapsed = time.perf_counter() - start
+            logger.info(
+                "{}ms per file, read x{}: {} documents in {:.2f}s ({:.0f} docs/sec)",
+                SIMULATED_READ_LATENCY_SECONDS * 1000,
+                workers,
+                count,
+                elapsed,
+                count / elapsed,
+            )
+
+    logger.complete()
@@ -0,0 +1,123 @@
+"""
+Compare processor -> writer throughput with one NLPResultBatch per result item
+(result_batch_size=1, equivalent to the former per-item puts) against one
+NLPResultBatch per document batch (result_batch_size=0).
+
+    python tests/manual/test_result_batching_benchmark.py noop [input_path]
+    python tests/manual/test_result_batching_benchmark.py quickumls [input_path]
+
+The QuickUMLS run needs QUICKUMLS_PATH. Without an input path a synthetic
+corpus is generated.
+"""
+
+import os
+
+os.environ.setdefault("DOCUMENT_BATCH_SIZE", "1000")
+os.environ.setdefault("INQUEUE_MAX_DOCBATCH_COUNT", "10")
+os.environ.setdefault("OUTQUEUE_MAX_DOCBATCH_COUNT", "1000")
+os.environ.setdefault("NUMBER_DOCS_TO_WRITE_BEFORE_YIELD", "1000")
+
+import random
+import sys
+import tempfile
+import time
+from multiprocessing import Manager, freeze_support
+from pathlib import Path
+
+from loguru import logger
+from nre_pipeline.common import setup_logging
+from nre_pipeline.reader._filesystem_reader import FileSystemReader
+from nre_pipeline.writer.filesystem._csv_writer import CSVWriter
+
+WORDS = ["the", "patient", "denies", "chest", "pain", "history", "of", "fever"]
+NUM_SYNTHETIC_DOCS = 20000
+NUM_WORKERS = 4
+
+
+def build_synthetic_corpus(root: Path, num_docs: int) -> None:
+    rng = random.Random(0)
+    for idx in range(num_docs):
+        folder = root / f"{idx // 1000:04d}"
+        folder.mkdir(parents=True, exist_ok=True)
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(50, 400)))
+        (folder / f"note_{idx:08d}.txt").write_text(text)
+
+
+def get_processor_type(name: str):
+    if name == "quickumls":
+        from nre_pipeline.processor.quickumls_processor._quickumls import (
+            QuickUMLSProcessor,
+        )
+
+        return QuickUMLSProcessor, {"processor_config": {"metric": "jaccard"}}
+    from nre_pipeline.processor.noop_processor import NoOpProcessor
+
+    return NoOpProcessor, {}
+
+
+def run_pipeline(processor_name, result_batch_size, input_path, output_path):
+    processor_type, processor_kwargs = get_processor_type(processor_name)
+    with Manager() as mgr:
+        reader: FileSystemReader = FileSystemReader.create(
+            manager=mgr,
+            input_paths=input_path,
+            allowed_extensions=[".txt"],
+        )
+        processors, outqueue, process_counter = processor_type.create(
+            mgr,
+            num_workers=NUM_WORKERS,
+            inqueue=reader.inqueue,
+            num_readers=reader.num_readers,
+            result_batch_size=result_batch_size,
+            **processor_kwargs,
+        )
+        writer: CSVWriter = CSVWriter.create(
+            mgr,
+            outqueue=outqueue,
+            process_counter=process_counter,
+            output_path=str(output_path),
+        )
+
+        start = time.perf_counter()
+        reader.start()
+        for p in processors:
+            p.start()
+        writer.start()
+
+        reader.join()
+        for p in processors:
+            p.join()
+        writer.join()
+        elapsed = time.perf_counter() - start
+        return writer.total_written.get(), elapsed
+
+
+if __name__ == "__main__":
+    freeze_support()
+    setup_logging(verbose=False)
+
+    processor_name = sys.argv[1] if len(sys.argv) > 1 else "noop"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if len(sys.argv) > 2:
+            input_path = Path(sys.argv[2])
+        else:
+            input_path = Path(tmp) / "input"
+            build_synthetic_corpus(input_path, NUM_SYNTHETIC_DOCS)
+
+        for label, result_batch_size in (("per item", 1), ("per doc batch", 0)):
+            output_path = Path(tmp) / f"output_{result_batch_size}"
+            output_path.mkdir()
+            total_written, elapsed = run_pipeline(
+                processor_name, result_batch_size, input_path, output_path
+            )
+            logger.info(
+                "{} {:>14}: {} results in {:.2f}s ({:.0f} results/sec)",
+                processor_name,
+                label,
+                total_written,
+                elapsed,
+                total_written / elapsed,
+            )
+
+    logger.complete()
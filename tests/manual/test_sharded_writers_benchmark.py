@@ -0,0 +1,127 @@
+"""
+Run the NoOp pipeline with several sharded writer processes, merge the
+shards into one output and compare the time with a single writer.
+
+    python tests/manual/test_sharded_writers_benchmark.py [csv|sqlite|parquet] [num_shards] [input_path]
+
+Without an input path a synthetic corpus is generated.
+"""
+
+import os
+
+os.environ.setdefault("DOCUMENT_BATCH_SIZE", "1000")
+os.environ.setdefault("INQUEUE_MAX_DOCBATCH_COUNT", "10")
+os.environ.setdefault("OUTQUEUE_MAX_DOCBATCH_COUNT", "1000")
+os.environ.setdefault("NUMBER_DOCS_TO_WRITE_BEFORE_YIELD", "1000")
+
+import sys
+import tempfile
+import time
+from multiprocessing import Manager, freeze_support
+from pathlib import Path
+
+from loguru import logger
+from nre_pipeline.common import setup_logging
+from nre_pipeline.processor.noop_processor import NoOpProcessor
+from nre_pipeline.reader._filesystem_reader import FileSystemReader
+from test_result_batching_benchmark import build_synthetic_corpus
+
+NUM_SYNTHETIC_DOCS = 20000
+NUM_WORKERS = 8
+
+
+def get_writer_type(name: str):
+    if name == "sqlite":
+        from nre_pipeline.writer.database._sqlite_writer import SQLiteNLPWriter
+
+        return SQLiteNLPWriter
+    if name == "parquet":
+        from nre_pipeline.writer.filesystem._parquet_writer import ParquetWriter
+
+        return ParquetWriter
+    from nre_pipeline.writer.filesystem._csv_writer import CSVWriter
+
+    return CSVWriter
+
+
+def run_pipeline(
+    writer_type, num_shards: int, input_path: Path, output_path: Path, **writer_options
+):
+    with Manager() as mgr:
+        reader: FileSystemReader = FileSystemReader.create(
+            manager=mgr,
+            input_paths=input_path,
+            allowed_extensions=[".txt"],
+        )
+        processors, outqueue, process_counter = NoOpProcessor.create(
+            mgr,
+            num_workers=NUM_WORKERS,
+            inqueue=reader.inqueue,
+            num_readers=reader.num_readers,
+            num_writer_shards=num_shards,
+        )
+        writer_config = {
+            "outqueue": outqueue,
+            "process_counter": process_counter,
+            "output_path": str(output_path),
+            **writer_options,
+        }
+        if num_shards == 1:
+            writers = [writer_type.create(mgr, **writer_config)]
+        else:
+            writers = writer_type.create_shards(mgr, **writer_config)
+
+        start = time.perf_counter()
+        reader.start()
+        for p in processors:
+            p.start()
+        for w in writers:
+            w.start()
+
+        reader.join()
+        for p in processors:
+            p.join()
+        for w in writers:
+            w.join()
+        elapsed = time.perf_counter() - start
+
+        output = writers[0].output_path
+        if num_shards > 1:
+            merge_start = time.perf_counter()
+            output = writer_type.merge_shards(writers)
+            logger.info("merged in {:.2f}s", time.perf_counter() - merge_start)
+        return writers[0].total_written.get(), elapsed, output
+
+
+if __name__ == "__main__":
+    freeze_support()
+    setup_logging(verbose=False)
+
+    writer_name = sys.argv[1] if len(sys.argv) > 1 else "csv"
+    num_shards = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    writer_type = get_writer_type(writer_name)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if len(sys.argv) > 3:
+            input_path = Path(sys.argv[3])
+        else:
+            input_path = Path(tmp) / "input"
+            build_synthetic_corpus(input_path, NUM_SYNTHETIC_DOCS)
+
+        for shards in sorted({1, num_shards}):
+            output_path = Path(tmp) / f"output_{shards}"
+            output_path.mkdir()
+            total_written, elapsed, output = run_pipeline(
+                writer_type, shards, input_path, output_path
+            )
+            logger.info(
+                "{} x{}: {} results in {:.2f}s ({:.0f} results/sec) -> {}",
+                writer_name,
+                shards,
+                total_written,
+                elapsed,
+                total_written / elapsed,
+                output,
+            )
+
+    logger.complete()
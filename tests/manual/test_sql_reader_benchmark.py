@@ -0,0 +1,138 @@
+"""
+Read notes from a local SQLite stand-in for the clinical data mart.
+
+    python tests/manual/test_sql_reader_benchmark.py [num_notes] [num_shards]
+
+Builds a SQLite database of synthetic notes (2M by default), then:
+
+- times one deep page with OFFSET against the same page with keyset
+  pagination;
+- reads the whole table with SQLReader, with one reader and with
+  ``num_shards`` parallel readers, for an integer and a text note id,
+  checking that the shards together hold every note exactly once.
+"""
+
+import os
+
+os.environ.setdefault("DOCUMENT_BATCH_SIZE", "1000")
+os.environ.setdefault("INQUEUE_MAX_DOCBATCH_COUNT", "10")
+
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import Manager
+from pathlib import Path
+from typing import Tuple
+
+from loguru import logger
+from nre_pipeline.common import setup_logging
+from nre_pipeline.reader import SQLReader
+
+WORDS = ["patient", "denies", "chest", "pain", "fever", "history", "of", "the"]
+PAGE_SIZE = 10000
+
+
+def build_database(db_path: Path, num_notes: int) -> None:
+    rng = random.Random(0)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE notes (note_id INTEGER PRIMARY KEY, note_key TEXT, "
+            "site INTEGER, text TEXT)"
+        )
+        conn.executemany(
+            "INSERT INTO notes VALUES (?, ?, ?, ?)",
+            (
+                (
+                    idx,
+                    f"note_{rng.random():.12f}",
+                    idx % 17,
+                    " ".join(rng.choices(WORDS, k=rng.randint(10, 60))),
+                )
+                for idx in range(1, num_notes + 1)
+            ),
+        )
+        conn.execute("CREATE UNIQUE INDEX notes_note_key ON notes (note_key)")
+    conn.close()
+
+
+def time_deep_page(db_path: Path, num_notes: int) -> None:
+    depth = max(num_notes - PAGE_SIZE, 0)
+    with sqlite3.connect(db_path) as conn:
+        start = time.perf_counter()
+        conn.execute(
+            f"SELECT note_id, text FROM notes ORDER BY note_id LIMIT {PAGE_SIZE} OFFSET {depth}"
+        ).fetchall()
+        offset_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        conn.execute(
+            f"SELECT note_id, text FROM notes WHERE note_id > ? ORDER BY note_id LIMIT {PAGE_SIZE}",
+            (depth,),
+        ).fetchall()
+        keyset_seconds = time.perf_counter() - start
+    conn.close()
+    logger.info(
+        "Page at row {}: OFFSET {:.1f}ms, keyset {:.1f}ms",
+        depth,
+        1000 * offset_seconds,
+        1000 * keyset_seconds,
+    )
+
+
+def read_shard(db_path: str, note_id_column: str, shard: Tuple[int, int]) -> list:
+    setup_logging(verbose=False)
+    shard_index, num_shards = shard
+    with Manager() as mgr:
+        reader = SQLReader.create(
+            manager=mgr,
+            connect=partial(sqlite3.connect, db_path),
+            table="notes",
+            note_id_column=note_id_column,
+            metadata_columns=["site"],
+            page_size=PAGE_SIZE,
+            shard_index=shard_index,
+            num_shards=num_shards,
+        )
+        # Iterate in this process; no queue or processors involved
+        return [doc.note_id for batch in reader._iter() for doc in batch]
+
+
+if __name__ == "__main__":
+    setup_logging(verbose=False)
+    num_notes = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    num_shards = int(sys.argv[2]) if len(sys.argv) > 2 else min(4, os.cpu_count() or 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "notes.db"
+        start = time.perf_counter()
+        build_database(db_path, num_notes)
+        logger.info("Built {} notes in {:.1f}s", num_notes, time.perf_counter() - start)
+        time_deep_page(db_path, num_notes)
+
+        for note_id_column in ("note_id", "note_key"):
+            for shards in (1, num_shards):
+                start = time.perf_counter()
+                with ProcessPoolExecutor(shards) as pool:
+                    note_ids = [
+                        note_id
+                        for shard in pool.map(
+                            partial(read_shard, str(db_path), note_id_column),
+                            [(i, shards) for i in range(shards)],
+                        )
+                        for note_id in shard
+                    ]
+                elapsed = time.perf_counter() - start
+                assert len(note_ids) == len(set(note_ids)) == num_notes
+                logger.info(
+                    "{:<8} {} reader(s): {} notes in {:.2f}s ({:.0f} docs/sec)",
+                    note_id_column,
+                    shards,
+                    len(note_ids),
+                    elapsed,
+                    len(note_ids) / elapsed,
+                )
+
+    logger.complete()
@@ -0,0 +1,131 @@
+"""
+Compare SQLiteNLPWriter throughput with a connection per batch (the former
+behaviour), one persistent connection with grouped commits and bulk load
+mode (staging table, deferred indexes).
+
+The writer is driven in-process with synthetic QuickUMLS-shaped result
+batches, so only the database write path is measured.
+
+    python tests/manual/test_sqlite_writer_benchmark.py [num_rows] [batch_size]
+"""
+
+import os
+
+os.environ.setdefault("NUMBER_DOCS_TO_WRITE_BEFORE_YIELD", "1000")
+
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from loguru import logger
+from nre_pipeline.common import setup_logging
+from nre_pipeline.models._nlp_result_batch import NLPResultBatch, TResultSchema
+from nre_pipeline.writer.database._sqlite_writer import SQLiteNLPWriter
+
+# Same columns as QuickUMLSProcessor.RESULT_SCHEMA, without importing quickumls
+RESULT_SCHEMA: TResultSchema = (
+    ("ngram", str),
+    ("term", str),
+    ("cui", str),
+    ("similarity", float),
+    ("semtypes", set),
+    ("pos_start", int),
+    ("pos_end", int),
+    ("doc_length", int),
+)
+TERMS = ["chest pain", "fever", "history", "denies", "shortness of breath"]
+
+
+class LocalValue:
+    """Stand-in for a manager Value when the writer runs in-process."""
+
+    def __init__(self, value: int = 0) -> None:
+        self.value = value
+
+    def get(self) -> int:
+        return self.value
+
+    def set(self, value: int) -> None:
+        self.value = value
+
+
+def build_batches(num_rows: int, batch_size: int) -> List[NLPResultBatch]:
+    rng = random.Random(0)
+    batches = []
+    batch = NLPResultBatch(RESULT_SCHEMA)
+    for idx in range(num_rows):
+        term = rng.choice(TERMS)
+        start = rng.randint(0, 4000)
+        batch.append_row(
+            f"note_{idx // 20:08d}",
+            [
+                term,
+                term,
+                f"C{rng.randint(0, 999999):07d}",
+                rng.random(),
+                {"T184"},
+                start,
+                start + len(term),
+                5000,
+            ],
+        )
+        if len(batch) == batch_size:
+            batches.append(batch)
+            batch = NLPResultBatch(RESULT_SCHEMA)
+    if len(batch):
+        batches.append(batch)
+    return batches
+
+
+def run(
+    output_root: Path,
+    batches: List[NLPResultBatch],
+    persistent: bool,
+    bulk_load: bool,
+):
+    writer = SQLiteNLPWriter(
+        outqueue=None,
+        total_written=LocalValue(),
+        process_counter=LocalValue(),
+        output_path=str(output_root),
+        persistent_connection=persistent,
+        bulk_load=bulk_load,
+    )
+    start = time.perf_counter()
+    for batch in batches:
+        writer.record(batch)
+    writer._on_write_complete()
+    elapsed = time.perf_counter() - start
+
+    with sqlite3.connect(writer.output_path) as conn:
+        (row_count,) = conn.execute("SELECT COUNT(*) FROM nlp_results").fetchone()
+    return row_count, elapsed
+
+
+if __name__ == "__main__":
+    setup_logging(verbose=False)
+
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    batches = build_batches(num_rows, batch_size)
+
+    for label, persistent, bulk_load in (
+        ("connection per batch", False, False),
+        ("persistent", True, False),
+        ("bulk load", True, True),
+    ):
+        with tempfile.TemporaryDirectory() as tmp:
+            row_count, elapsed = run(Path(tmp), batches, persistent, bulk_load)
+        logger.info(
+            "{:>20}: {} rows in {:.2f}s ({:.0f} rows/sec)",
+            label,
+            row_count,
+            elapsed,
+            row_count / elapsed,
+        )
+
+    logger.complete()
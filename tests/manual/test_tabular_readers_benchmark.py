@@ -0,0 +1,111 @@
+"""
+Read a JSONL, a CSV and a Parquet export of the same notes, whole and in
+byte-range shards read by parallel processes.
+
+    python tests/manual/test_tabular_readers_benchmark.py [num_shards]
+
+Each format reports docs/sec for one reader and for ``num_shards`` readers
+each reading its own shard, and checks that the shards together hold every
+note exactly once.
+"""
+
+import os
+
+os.environ.setdefault("DOCUMENT_BATCH_SIZE", "1000")
+os.environ.setdefault("INQUEUE_MAX_DOCBATCH_COUNT", "10")
+
+import csv
+import json
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+from pathlib import Path
+from typing import List
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from loguru import logger
+from nre_pipeline.common import setup_logging
+from nre_pipeline.reader import CsvReader, JsonlReader, ParquetReader
+
+NUM_ROWS = 200000
+WORDS = ["patient", "denies", "chest", "pain", "fever", "history", "of", "the"]
+READERS = {".jsonl": JsonlReader, ".csv": CsvReader, ".parquet": ParquetReader}
+
+
+def build_exports(output_path: Path) -> None:
+    rng = random.Random(0)
+    rows = [
+        {
+            "id": f"note_{idx:08d}",
+            "site": idx % 17,
+            "body": " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 400))),
+        }
+        for idx in range(NUM_ROWS)
+    ]
+    output_path.mkdir(parents=True)
+    with open(output_path / "notes.jsonl", "w") as fh:
+        for row in rows:
+            fh.write(json.dumps(row) + "\n")
+    with open(output_path / "notes.csv", "w", newline="") as fh:
+        writer = csv.DictWriter(fh, ["id", "site", "body"])
+        writer.writeheader()
+        writer.writerows(rows)
+    pq.write_table(
+        pa.Table.from_pylist(rows), output_path / "notes.parquet", row_group_size=10000
+    )
+
+
+def read_shard(suffix: str, path: str, shard_index: int, num_shards: int) -> List[str]:
+    setup_logging(verbose=False)
+    with Manager() as mgr:
+        reader = READERS[suffix].create(
+            manager=mgr,
+            input_paths=path,
+            note_id_column="id",
+            text_column="body",
+            metadata_columns=["site"],
+            shard_index=shard_index,
+            num_shards=num_shards,
+        )
+        # Iterate in this process; no queue or processors involved
+        return [doc.note_id for batch in reader._iter() for doc in batch]
+
+
+if __name__ == "__main__":
+    setup_logging(verbose=False)
+    num_shards = int(sys.argv[1]) if len(sys.argv) > 1 else min(4, os.cpu_count() or 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        build_exports(Path(tmp) / "exports")
+        for suffix in READERS:
+            path = str(Path(tmp) / "exports" / f"notes{suffix}")
+            for shards in (1, num_shards):
+                start = time.perf_counter()
+                with ProcessPoolExecutor(shards) as pool:
+                    note_ids = [
+                        note_id
+                        for shard in pool.map(
+                            read_shard,
+                            [suffix] * shards,
+                            [path] * shards,
+                            range(shards),
+                            [shards] * shards,
+                        )
+                        for note_id in shard
+                    ]
+                elapsed = time.perf_counter() - start
+                assert len(note_ids) == len(set(note_ids)) == NUM_ROWS
+                logger.info(
+                    "{:<8} {} shard(s): {} notes in {:.2f}s ({:.0f} docs/sec)",
+                    suffix,
+                    shards,
+                    len(note_ids),
+                    elapsed,
+                    len(note_ids) / elapsed,
+                )
+
+    logger.complete()
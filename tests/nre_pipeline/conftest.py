@@ -0,0 +1,43 @@
+"""
+Fixtures shared by the nre_pipeline tests.
+"""
+
+import os
+import random
+from multiprocessing import Manager
+from pathlib import Path
+
+import pytest
+
+# nre_pipeline.writer reads this when it is imported
+os.environ.setdefault("NUMBER_DOCS_TO_WRITE_BEFORE_YIELD", "1000")
+
+WORDS = ["the", "patient", "denies", "chest", "pain", "history", "of", "fever"]
+
+
+def build_synthetic_corpus(root: Path, num_docs: int) -> None:
+    """Write num_docs notes of random words, 1000 per folder, under root."""
+    rng = random.Random(0)
+    for idx in range(num_docs):
+        folder = root / f"{idx // 1000:04d}"
+        folder.mkdir(parents=True, exist_ok=True)
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(50, 400)))
+        (folder / f"note_{idx:08d}.txt").write_text(text)
+
+
+@pytest.fixture()
+def manager():
+    with Manager() as mgr:
+        yield mgr
+
+
+@pytest.fixture()
+def synthetic_corpus(tmp_path):
+    """Return a function writing a synthetic corpus under tmp_path/input."""
+
+    def _build(num_docs: int) -> Path:
+        input_path = tmp_path / "input"
+        build_synthetic_corpus(input_path, num_docs)
+        return input_path
+
+    return _build
@@ -0,0 +1,87 @@
+from multiprocessing import Process, resource_tracker, shared_memory
+from typing import Any, List, Tuple
+
+import pytest
+
+from nre_pipeline.common.base._consts import QUEUE_EMPTY
+from nre_pipeline.models import Document, DocumentBatch, SharedDocumentBatch
+from nre_pipeline.reader import FileSystemReader
+
+
+@pytest.fixture(autouse=True)
+def batch_env(monkeypatch):
+    monkeypatch.setenv("DOCUMENT_BATCH_SIZE", "100")
+    monkeypatch.setenv("INQUEUE_MAX_DOCBATCH_COUNT", "1000")
+
+
+def segment_exists(shm_name: str) -> bool:
+    try:
+        shm = shared_memory.SharedMemory(name=shm_name)
+    except FileNotFoundError:
+        return False
+    shm.close()
+    # Only looked at it; don't let this process's tracker unlink it
+    resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    return True
+
+
+def consume(inqueue, outqueue) -> None:
+    """Decode a shared batch in another process and release it."""
+    batch: SharedDocumentBatch = inqueue.get()
+    outqueue.put(
+        [(doc.note_id, doc.text, doc.valid, doc.metadata) for doc in batch]
+    )
+    batch.release()
+
+
+def test_round_trip_to_another_process(manager):
+    documents: List[Document] = [
+        Document(note_id="ascii", text="Patient denies chest pain.", valid=True),
+        Document(note_id=2, text="Temp 38.5°C, évaluation ✔", valid=True),
+        Document(note_id="empty", text="", valid=False),
+        Document(note_id="surrogate", text="lone \ud800 half", valid=True),
+    ]
+    for index, doc in enumerate(documents):
+        doc.metadata.update({"mtime_ns": index, "size": len(doc.text)})
+    batch = DocumentBatch(documents, duplicates=[("copy", "ascii", 7, 26)])
+    shared = SharedDocumentBatch.from_batch(batch)
+    assert segment_exists(shared.shm_name)
+
+    inqueue, outqueue = manager.Queue(), manager.Queue()
+    inqueue.put(shared)
+    consumer = Process(target=consume, args=(inqueue, outqueue))
+    consumer.start()
+    decoded: List[Tuple[Any, ...]] = outqueue.get()
+    consumer.join()
+
+    assert decoded == [
+        (doc.note_id, doc.text, doc.valid, doc.metadata) for doc in documents
+    ]
+    assert shared.manifest_entries() == batch.manifest_entries()
+    assert shared.duplicates == batch.duplicates
+    assert not segment_exists(shared.shm_name)
+
+
+def test_unlink_unreleased_batches(manager, synthetic_corpus):
+    reader = FileSystemReader.create(
+        manager,
+        input_paths=synthetic_corpus(2000),
+        allowed_extensions=[".txt"],
+        shared_memory_batches=True,
+    )
+    reader.start()
+    batches: List[SharedDocumentBatch] = []
+    # Drain before joining; the reader waits until its queue is read
+    while (item := reader.inqueue.get()) != QUEUE_EMPTY:
+        batches.append(item)
+    reader.join()
+    # Process half of the batches; the rest are never released
+    released, leftover = batches[::2], batches[1::2]
+    for batch in released:
+        batch.release()
+    assert all(segment_exists(batch.shm_name) for batch in leftover)
+
+    assert reader.unlink_shared_batches() == len(leftover)
+    assert not any(segment_exists(batch.shm_name) for batch in batches)
+    # A second call finds nothing left to unlink
+    assert reader.unlink_shared_batches() == 0
@@ -0,0 +1,138 @@
+import csv
+import ctypes
+import json
+import signal
+import time
+from pathlib import Path
+from typing import Any, Dict, Set
+
+import pytest
+
+from nre_pipeline.common.base._base_processor import (
+    DocumentTimeoutError,
+    _call_with_time_limit,
+)
+from nre_pipeline.processor.noop_processor import NoOpProcessor
+from nre_pipeline.reader import FileSystemReader
+from nre_pipeline.writer.filesystem._csv_writer import DEFAULT_DELIMITER, CSVWriter
+
+NUM_DOCS = 1000
+NUM_WORKERS = 2
+BATCH_SIZE = 50
+SLOW_MARKER = "SLOWNOTE"
+HANG_MARKER = "HANGNOTE"
+
+
+@pytest.fixture(autouse=True)
+def batch_env(monkeypatch):
+    monkeypatch.setenv("DOCUMENT_BATCH_SIZE", str(BATCH_SIZE))
+    monkeypatch.setenv("INQUEUE_MAX_DOCBATCH_COUNT", "10")
+    monkeypatch.setenv("OUTQUEUE_MAX_DOCBATCH_COUNT", "1000")
+    monkeypatch.setenv("DOCUMENT_TIMEOUT_SECONDS", "1")
+    monkeypatch.setenv("DOCUMENT_HANG_SECONDS", "3")
+
+
+class PathologicalProcessor(NoOpProcessor):
+    """Loops forever in Python on slow notes and blocks in C on hanging ones.
+
+    A hanging note calls into C with the GIL held and the alarm signal
+    blocked, like an extension that never returns to the interpreter, which
+    only Processor.supervise replacing the worker can end.
+    """
+
+    def _call_processor(self, document_batch):
+        for doc in document_batch:
+            if SLOW_MARKER in doc.text:
+                while True:
+                    time.sleep(0.01)
+            if HANG_MARKER in doc.text:
+                signal.pthread_sigmask(signal.SIG_BLOCK, [signal.SIGALRM])
+                ctypes.PyDLL(None).sleep(3600)
+        yield from super()._call_processor(document_batch)
+
+
+def add_pathological_notes(root: Path) -> Dict[str, str]:
+    """Mark some notes slow and some hanging; return their expected reasons."""
+    files = sorted(root.rglob("*.txt"))
+    expected: Dict[str, str] = {}
+    for index, path in enumerate(files[7::97]):
+        marker, reason = (SLOW_MARKER, "timeout") if index % 2 else (HANG_MARKER, "hung")
+        path.write_text(path.read_text() + " " + marker)
+        expected[path.stem] = reason
+    return expected
+
+
+def test_time_limit_returns_the_result():
+    assert _call_with_time_limit(1, lambda: "done") == "done"
+    assert signal.getitimer(signal.ITIMER_REAL) == (0.0, 0.0)
+
+
+def test_time_limit_interrupts_a_slow_call():
+    start = time.perf_counter()
+    with pytest.raises(DocumentTimeoutError):
+        _call_with_time_limit(0.1, lambda: time.sleep(5))
+    assert time.perf_counter() - start < 1
+    assert signal.getsignal(signal.SIGALRM) is signal.SIG_DFL
+
+
+def shared_memory_segments() -> Set[str]:
+    return {path.name for path in Path("/dev/shm").iterdir()}
+
+
+@pytest.mark.parametrize("shared", [False, True], ids=["queue", "shared_memory"])
+def test_pathological_notes_are_quarantined(manager, tmp_path, synthetic_corpus, shared):
+    input_path = synthetic_corpus(NUM_DOCS)
+    expected = add_pathological_notes(input_path)
+    quarantine_path = tmp_path / "quarantine.jsonl"
+    output_path = tmp_path / "output"
+    output_path.mkdir()
+    segments_before = shared_memory_segments()
+
+    reader = FileSystemReader.create(
+        manager,
+        input_paths=input_path,
+        allowed_extensions=[".txt"],
+        shared_memory_batches=shared,
+    )
+    processors, outqueue, process_counter = PathologicalProcessor.create(
+        manager,
+        num_workers=NUM_WORKERS,
+        inqueue=reader.inqueue,
+        num_readers=reader.num_readers,
+        quarantine_path=str(quarantine_path),
+    )
+    writer = CSVWriter.create(
+        manager,
+        outqueue=outqueue,
+        process_counter=process_counter,
+        output_path=str(output_path),
+    )
+    reader.start()
+    for p in processors:
+        p.start()
+    writer.start()
+    # Before joining the reader, which may wait on hung workers
+    PathologicalProcessor.supervise(processors)
+    reader.join()
+    writer.join()
+    assert reader.unlink_shared_batches() == 0
+
+    quarantined: Dict[str, Any] = {}
+    with open(quarantine_path) as fh:
+        for line in fh:
+            record = json.loads(line)
+            quarantined[str(record["note_id"])] = record["reason"]
+    with open(writer.output_path, newline="") as fh:
+        written = {row[0] for row in list(csv.reader(fh, delimiter=DEFAULT_DELIMITER))[1:]}
+
+    assert not written & set(expected)
+    if shared:
+        # The replacement worker finds the hung batch intact
+        assert quarantined == expected
+        assert len(written) == NUM_DOCS - len(expected)
+    else:
+        # The other notes of a hung note's batch are left for a resumed run
+        assert quarantined.items() <= expected.items()
+        num_hung = sum(1 for reason in quarantined.values() if reason == "hung")
+        assert len(written) + len(quarantined) >= NUM_DOCS - num_hung * (BATCH_SIZE - 1)
+    assert shared_memory_segments() <= segments_before
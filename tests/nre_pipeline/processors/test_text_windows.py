@@ -0,0 +1,68 @@
+import random
+import re
+
+import pytest
+
+from nre_pipeline.processor.quickumls_processor._sentence_memo import TMatchGroups
+from nre_pipeline.processor.quickumls_processor._text_windows import (
+    match_in_windows,
+    split_windows,
+)
+
+WORDS = ["patient", "denies", "chest", "pain", "fever", "history", "of", "the"]
+TERMS = re.compile(r"chest pain|fever|history of")
+WINDOW_CHARS = 2000
+OVERLAP_CHARS = 400
+
+
+def build_text(num_sentences: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    sentences = []
+    for _ in range(num_sentences):
+        sentence = " ".join(rng.choices(WORDS, k=rng.randint(3, 30)))
+        sentences.append(sentence + rng.choice([". ", ".\n", " "]))
+    return "".join(sentences)
+
+
+def match_terms(text: str) -> TMatchGroups:
+    """Stand in for QuickUMLS.match: one group per term occurrence."""
+    return [
+        [{"start": m.start(), "end": m.end(), "ngram": m.group(), "cui": m.group()}]
+        for m in TERMS.finditer(text)
+    ]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_cores_partition_the_text(seed):
+    text = build_text(500, seed)
+    windows = list(split_windows(text, WINDOW_CHARS, OVERLAP_CHARS))
+    assert len(windows) > 1
+    assert windows[0][0] == windows[0][2] == 0
+    assert windows[-1][1] == windows[-1][3] == len(text)
+    for (start, end, core_start, core_end) in windows:
+        assert end - start <= WINDOW_CHARS
+        assert start <= core_start < core_end <= end
+    # Each core starts where the previous one ends
+    for previous, window in zip(windows, windows[1:]):
+        assert window[2] == previous[3]
+        assert previous[0] < window[0] < previous[1]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_windowed_matches_equal_whole_text_matches(seed):
+    text = build_text(500, seed)
+    assert match_in_windows(match_terms, text, WINDOW_CHARS, OVERLAP_CHARS) == (
+        match_terms(text)
+    )
+
+
+def test_short_text_is_one_window():
+    text = build_text(5)
+    assert list(split_windows(text, WINDOW_CHARS, OVERLAP_CHARS)) == [
+        (0, len(text), 0, len(text))
+    ]
+
+
+def test_overlap_must_fit_the_window():
+    with pytest.raises(ValueError):
+        list(split_windows("text", 1000, 300))
@@ -0,0 +1,102 @@
+import gzip
+import json
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from nre_pipeline.models import Document
+from nre_pipeline.reader import ArchiveReader, FileSystemReader
+
+NUM_DOCS = 2000
+NUM_ARCHIVES = 8
+
+
+@pytest.fixture(autouse=True)
+def batch_env(monkeypatch):
+    monkeypatch.setenv("DOCUMENT_BATCH_SIZE", "100")
+    monkeypatch.setenv("INQUEUE_MAX_DOCBATCH_COUNT", "10")
+
+
+def write_jsonl_zst(path: Path, files: List[Path]) -> None:
+    import zstandard
+
+    with zstandard.open(path, "wt", encoding="utf-8") as fh:
+        for f in files:
+            fh.write(json.dumps({"note_id": f.stem, "text": f.read_text()}) + "\n")
+
+
+def build_archives(input_path: Path, archive_path: Path) -> None:
+    """Split the .txt files of the corpus over tar.gz, zip and .jsonl.zst files."""
+    files: List[Path] = sorted(input_path.rglob("*.txt"))
+    archive_path.mkdir(parents=True)
+    for index in range(NUM_ARCHIVES):
+        shard = files[index::NUM_ARCHIVES]
+        if index % 4 == 3:
+            write_jsonl_zst(archive_path / f"bundle_{index}.jsonl.zst", shard)
+        elif index % 2 == 0:
+            with tarfile.open(archive_path / f"bundle_{index}.tar.gz", "w:gz") as tar:
+                for f in shard:
+                    tar.add(f, arcname=str(f.relative_to(input_path)))
+        else:
+            with zipfile.ZipFile(
+                archive_path / f"bundle_{index}.zip", "w", zipfile.ZIP_DEFLATED
+            ) as zf:
+                for f in shard:
+                    zf.write(f, arcname=str(f.relative_to(input_path)))
+
+
+def read_documents(manager, reader_type, input_path: Path, **config) -> List[Document]:
+    reader = reader_type.create(
+        manager=manager, input_paths=input_path, allowed_extensions=[".txt"], **config
+    )
+    # Iterate in this process; no queue or processors involved
+    return [doc for batch in reader._iter() for doc in batch]
+
+
+def read_texts(manager, reader_type, input_path: Path, **config) -> Dict[str | int, str]:
+    return {
+        doc.note_id: doc.text
+        for doc in read_documents(manager, reader_type, input_path, **config)
+    }
+
+
+@pytest.mark.parametrize("archive_workers", [1, 4])
+def test_archives_match_loose_files(manager, tmp_path, synthetic_corpus, archive_workers):
+    input_path = synthetic_corpus(NUM_DOCS)
+    archive_path = tmp_path / "archives"
+    build_archives(input_path, archive_path)
+
+    expected = read_texts(manager, FileSystemReader, input_path)
+    texts = read_texts(
+        manager, ArchiveReader, archive_path, archive_workers=archive_workers
+    )
+    assert len(texts) == NUM_DOCS
+    assert texts == expected
+
+
+def test_jsonl_null_and_non_string_text(manager, tmp_path):
+    archive_path = tmp_path / "archives"
+    archive_path.mkdir()
+    lines = [
+        {"note_id": "ok", "text": "Patient denies chest pain."},
+        {"note_id": "null", "text": None},
+        {"note_id": "number", "text": 42},
+        {"note_id": "missing"},
+    ]
+    with gzip.open(archive_path / "notes.jsonl.gz", "wt", encoding="utf-8") as fh:
+        for line in lines:
+            fh.write(json.dumps(line) + "\n")
+        fh.write("not json\n")
+
+    documents = {
+        doc.note_id: doc for doc in read_documents(manager, ArchiveReader, archive_path)
+    }
+    # The non-string text, missing key and malformed line are skipped
+    assert set(documents) == {"ok", "null"}
+    assert documents["ok"].valid
+    assert documents["ok"].metadata["line"] == 1
+    assert documents["null"].text == ""
+    assert not documents["null"].valid
@@ -0,0 +1,123 @@
+import csv
+import random
+import sqlite3
+from collections import Counter
+from pathlib import Path
+from typing import List, Tuple
+
+import pyarrow.parquet as pq
+import pytest
+
+from nre_pipeline.processor.noop_processor import NoOpProcessor
+from nre_pipeline.reader import FileSystemReader
+from nre_pipeline.writer.database._sqlite_writer import SQLiteNLPWriter
+from nre_pipeline.writer.filesystem._csv_writer import DEFAULT_DELIMITER, CSVWriter
+from nre_pipeline.writer.filesystem._parquet_writer import ParquetWriter
+
+NUM_DOCS = 2000
+DUPLICATE_FRACTION = 0.3
+NUM_WORKERS = 2
+
+
+@pytest.fixture(autouse=True)
+def batch_env(monkeypatch):
+    monkeypatch.setenv("DOCUMENT_BATCH_SIZE", "100")
+    monkeypatch.setenv("INQUEUE_MAX_DOCBATCH_COUNT", "10")
+    monkeypatch.setenv("OUTQUEUE_MAX_DOCBATCH_COUNT", "1000")
+
+
+def add_duplicates(root: Path, fraction: float) -> int:
+    """Overwrite a fraction of the notes with copies of other notes.
+
+    Half of the copies have their whitespace changed.
+    """
+    rng = random.Random(1)
+    files: List[Path] = sorted(root.rglob("*.txt"))
+    num_duplicates = int(len(files) * fraction)
+    for index, target in enumerate(rng.sample(files[1:], num_duplicates)):
+        text = rng.choice(files[: files.index(target)]).read_text()
+        if index % 2:
+            text = "  " + text.replace(" ", "\n", 3) + "\n"
+        target.write_text(text)
+    return num_duplicates
+
+
+def run_pipeline(manager, writer_type, input_path: Path, output_path: Path, **reader_config):
+    output_path.mkdir()
+    reader = FileSystemReader.create(
+        manager, input_paths=input_path, allowed_extensions=[".txt"], **reader_config
+    )
+    processors, outqueue, process_counter = NoOpProcessor.create(
+        manager,
+        num_workers=NUM_WORKERS,
+        inqueue=reader.inqueue,
+        num_readers=reader.num_readers,
+    )
+    writer = writer_type.create(
+        manager,
+        outqueue=outqueue,
+        process_counter=process_counter,
+        output_path=str(output_path),
+    )
+    reader.start()
+    for p in processors:
+        p.start()
+    writer.start()
+    reader.join()
+    for p in processors:
+        p.join()
+    writer.join()
+    return reader.total_documents_read.get(), writer
+
+
+def read_results(writer) -> Counter:
+    """Get the result rows of a writer's output as comparable tuples."""
+    if isinstance(writer, CSVWriter):
+        with open(writer.output_path, newline="") as fh:
+            rows: List[Tuple] = list(csv.reader(fh, delimiter=DEFAULT_DELIMITER))[1:]
+    elif isinstance(writer, SQLiteNLPWriter):
+        with sqlite3.connect(writer.output_path) as conn:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(nlp_results)")]
+            selected = ", ".join(c for c in columns if c != "id")
+            rows = conn.execute(f"SELECT {selected} FROM nlp_results").fetchall()
+        conn.close()
+    else:
+        rows = [
+            tuple(row.values())
+            for row in pq.read_table(writer.output_path).to_pylist()
+        ]
+    return Counter(tuple(str(value) for value in row) for row in rows)
+
+
+@pytest.mark.parametrize("writer_type", [CSVWriter, SQLiteNLPWriter, ParquetWriter])
+def test_duplicates_get_copied_results(manager, tmp_path, synthetic_corpus, writer_type):
+    input_path = synthetic_corpus(NUM_DOCS)
+    num_duplicates = add_duplicates(input_path, DUPLICATE_FRACTION)
+
+    processed, writer = run_pipeline(
+        manager, writer_type, input_path, tmp_path / "off", deduplicate=False
+    )
+    assert processed == NUM_DOCS
+    expected = read_results(writer)
+
+    processed_exact, writer = run_pipeline(
+        manager,
+        writer_type,
+        input_path,
+        tmp_path / "exact",
+        deduplicate=True,
+        dedup_normalization="exact",
+    )
+    assert read_results(writer) == expected
+
+    # NoOp results do not depend on whitespace, so these rows match as well
+    processed_whitespace, writer = run_pipeline(
+        manager,
+        writer_type,
+        input_path,
+        tmp_path / "whitespace",
+        deduplicate=True,
+        dedup_normalization="whitespace",
+    )
+    assert read_results(writer) == expected
+    assert NUM_DOCS - num_duplicates <= processed_whitespace < processed_exact < NUM_DOCS
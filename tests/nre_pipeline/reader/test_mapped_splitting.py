@@ -0,0 +1,82 @@
+import pickle
+import random
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from nre_pipeline.models import Document
+from nre_pipeline.reader import FileSystemReader
+
+WORDS = ["patient", "denies", "chest", "pain", "fever", "history", "of", "the", "é"]
+HEADER_PATTERN = r"^=== NOTE (?P<note_id>\d+) ===\n"
+NUM_NOTES = 500
+
+
+@pytest.fixture(autouse=True)
+def batch_env(monkeypatch):
+    monkeypatch.setenv("DOCUMENT_BATCH_SIZE", "100")
+    monkeypatch.setenv("INQUEUE_MAX_DOCBATCH_COUNT", "10")
+
+
+def build_notes(num_notes: int) -> Dict[str, str]:
+    rng = random.Random(0)
+    return {
+        str(index): " ".join(rng.choices(WORDS, k=rng.randint(10, 400))) + "\n"
+        for index in range(num_notes)
+    }
+
+
+def read_documents(manager, input_path: Path, **config) -> List[Document]:
+    reader = FileSystemReader.create(
+        manager=manager, input_paths=input_path, allowed_extensions=[".txt"], **config
+    )
+    # Iterate in this process and pickle every batch like the inqueue would
+    return [
+        document
+        for batch in reader._iter()
+        for document in pickle.loads(pickle.dumps(batch))
+    ]
+
+
+def test_split_on_pattern(manager, tmp_path):
+    notes = build_notes(NUM_NOTES)
+    input_path = tmp_path / "input"
+    input_path.mkdir()
+    with open(input_path / "ocr_dump.txt", "w", encoding="utf-8") as fh:
+        for note_id, text in notes.items():
+            fh.write(f"=== NOTE {note_id} ===\n{text}")
+
+    documents = read_documents(
+        manager, input_path, split_pattern=HEADER_PATTERN, split_min_bytes=1
+    )
+    assert {document.note_id: document.text for document in documents} == notes
+    assert len(documents) == NUM_NOTES
+
+
+def test_split_on_delimiter(manager, tmp_path):
+    notes = list(build_notes(NUM_NOTES).values())
+    input_path = tmp_path / "input"
+    input_path.mkdir()
+    # Blank documents between delimiters are skipped
+    (input_path / "dump.txt").write_text("\f".join(notes) + "\f \n\f", encoding="utf-8")
+
+    documents = read_documents(
+        manager, input_path, split_delimiter="\\f", split_min_bytes=1
+    )
+    assert [document.text for document in documents] == notes
+    assert len({document.note_id for document in documents}) == NUM_NOTES
+
+
+def test_small_files_are_not_split(manager, tmp_path):
+    input_path = tmp_path / "input"
+    input_path.mkdir()
+    text = "=== NOTE 1 ===\nfirst\n=== NOTE 2 ===\nsecond\n"
+    (input_path / "small.txt").write_text(text)
+
+    documents = read_documents(
+        manager, input_path, split_pattern=HEADER_PATTERN, split_min_bytes=1024
+    )
+    assert [(document.note_id, document.text) for document in documents] == [
+        ("small", text)
+    ]
@@ -0,0 +1,121 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from nre_pipeline.processor.noop_processor import NoOpProcessor
+from nre_pipeline.reader._filesystem_reader import FileSystemReader
+from nre_pipeline.writer.database._sqlite_writer import SQLiteNLPWriter
+from nre_pipeline.writer.filesystem._csv_writer import CSVWriter
+from nre_pipeline.writer.filesystem._parquet_writer import ParquetWriter
+
+NUM_DOCS = 2000
+NUM_WORKERS = 4
+
+
+@pytest.fixture(autouse=True)
+def batch_env(monkeypatch):
+    monkeypatch.setenv("DOCUMENT_BATCH_SIZE", "100")
+    monkeypatch.setenv("INQUEUE_MAX_DOCBATCH_COUNT", "10")
+    monkeypatch.setenv("OUTQUEUE_MAX_DOCBATCH_COUNT", "1000")
+
+
+def run_pipeline(
+    manager,
+    writer_type,
+    num_shards: int,
+    input_path: Path,
+    output_path: Path,
+    manifest_path: Path,
+    resume: bool,
+) -> int:
+    output_path.mkdir()
+    reader: FileSystemReader = FileSystemReader.create(
+        manager=manager,
+        input_paths=input_path,
+        allowed_extensions=[".txt"],
+        resume=resume,
+        manifest_path=str(manifest_path),
+    )
+    processors, outqueue, process_counter = NoOpProcessor.create(
+        manager,
+        num_workers=NUM_WORKERS,
+        inqueue=reader.inqueue,
+        num_readers=reader.num_readers,
+        num_writer_shards=num_shards,
+    )
+    writer_config = {
+        "outqueue": outqueue,
+        "process_counter": process_counter,
+        "output_path": str(output_path),
+        "update_manifest": True,
+        "manifest_path": str(manifest_path),
+    }
+    if num_shards == 1:
+        writers = [writer_type.create(manager, **writer_config)]
+    else:
+        writers = writer_type.create_shards(manager, **writer_config)
+
+    reader.start()
+    for p in processors:
+        p.start()
+    for w in writers:
+        w.start()
+    reader.join()
+    for p in processors:
+        p.join()
+    for w in writers:
+        w.join()
+    if num_shards > 1:
+        writer_type.merge_shards(writers)
+    return reader.total_documents_read.get()
+
+
+def completed_count(manifest_path: Path) -> int:
+    with sqlite3.connect(manifest_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM processed_notes").fetchone()[0]
+
+
+def interrupt(manifest_path: Path, input_path: Path) -> int:
+    """Forget every other note and modify one remembered note.
+
+    Returns:
+        int: The number of notes a resumed run should read.
+    """
+    with sqlite3.connect(manifest_path) as conn:
+        note_ids = [
+            row[0]
+            for row in conn.execute("SELECT note_id FROM processed_notes ORDER BY note_id")
+        ]
+        forgotten = note_ids[::2]
+        conn.executemany(
+            "DELETE FROM processed_notes WHERE note_id = ?",
+            [(note_id,) for note_id in forgotten],
+        )
+    modified = next(input_path.rglob(f"{note_ids[1]}.txt"))
+    modified.write_text(modified.read_text() + " modified")
+    return len(forgotten) + 1
+
+
+@pytest.mark.parametrize(
+    "writer_type, num_shards",
+    [(CSVWriter, 1), (SQLiteNLPWriter, 1), (ParquetWriter, 1), (CSVWriter, 2)],
+)
+def test_resume_reads_only_unfinished_notes(
+    manager, tmp_path, synthetic_corpus, writer_type, num_shards
+):
+    input_path = synthetic_corpus(NUM_DOCS)
+    manifest_path = tmp_path / "manifest" / "processed_notes.db"
+
+    read = run_pipeline(
+        manager, writer_type, num_shards, input_path, tmp_path / "first", manifest_path, False
+    )
+    assert read == NUM_DOCS
+    assert completed_count(manifest_path) == NUM_DOCS
+
+    expected = interrupt(manifest_path, input_path)
+    read = run_pipeline(
+        manager, writer_type, num_shards, input_path, tmp_path / "resumed", manifest_path, True
+    )
+    assert read == expected
+    assert completed_count(manifest_path) == NUM_DOCS
@@ -0,0 +1,103 @@
+import random
+import sqlite3
+from functools import partial
+from pathlib import Path
+from typing import List
+from unittest.mock import MagicMock
+
+import pytest
+
+from nre_pipeline.models import Document
+from nre_pipeline.reader import SQLReader
+from nre_pipeline.reader._sql_reader import SERVER_CURSOR_NAME
+
+NUM_NOTES = 5000
+PAGE_SIZE = 333
+WORDS = ["patient", "denies", "chest", "pain", "fever", "history", "of", "the"]
+
+
+@pytest.fixture(autouse=True)
+def batch_env(monkeypatch):
+    monkeypatch.setenv("DOCUMENT_BATCH_SIZE", "1000")
+    monkeypatch.setenv("INQUEUE_MAX_DOCBATCH_COUNT", "10")
+
+
+@pytest.fixture()
+def db_path(tmp_path) -> Path:
+    rng = random.Random(0)
+    path = tmp_path / "notes.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE notes (note_id INTEGER PRIMARY KEY, note_key TEXT, "
+            "site INTEGER, text TEXT)"
+        )
+        conn.executemany(
+            "INSERT INTO notes VALUES (?, ?, ?, ?)",
+            (
+                (
+                    idx,
+                    f"note_{rng.random():.12f}",
+                    idx % 17,
+                    # Every 100th note has a null text
+                    None if idx % 100 == 0 else " ".join(rng.choices(WORDS, k=10)),
+                )
+                for idx in range(1, NUM_NOTES + 1)
+            ),
+        )
+        conn.execute("CREATE UNIQUE INDEX notes_note_key ON notes (note_key)")
+    conn.close()
+    return path
+
+
+def read_documents(manager, db_path: Path, **config) -> List[Document]:
+    reader = SQLReader.create(
+        manager=manager,
+        connect=partial(sqlite3.connect, str(db_path)),
+        table="notes",
+        metadata_columns=["site"],
+        page_size=PAGE_SIZE,
+        **config,
+    )
+    # Iterate in this process; no queue or processors involved
+    return [doc for batch in reader._iter() for doc in batch]
+
+
+@pytest.mark.parametrize("note_id_column", ["note_id", "note_key"])
+@pytest.mark.parametrize("num_shards", [1, 4])
+def test_shards_hold_every_note_once(manager, db_path, note_id_column, num_shards):
+    documents = [
+        doc
+        for shard_index in range(num_shards)
+        for doc in read_documents(
+            manager,
+            db_path,
+            note_id_column=note_id_column,
+            shard_index=shard_index,
+            num_shards=num_shards,
+        )
+    ]
+    note_ids = [doc.note_id for doc in documents]
+    assert len(note_ids) == len(set(note_ids)) == NUM_NOTES
+    # Keyset pages keep the note id order within a shard
+    if num_shards == 1:
+        assert note_ids == sorted(note_ids)
+
+
+def test_null_text_is_invalid(manager, db_path):
+    documents = read_documents(manager, db_path, note_id_column="note_id")
+    invalid = [doc for doc in documents if not doc.valid]
+    assert [doc.note_id for doc in invalid] == list(range(100, NUM_NOTES + 1, 100))
+    assert all(doc.text == "" for doc in invalid)
+    assert documents[0].metadata == {"source": "notes", "site": 1}
+
+
+def test_server_side_cursor_is_named(manager, db_path):
+    reader = SQLReader.create(
+        manager=manager,
+        connect=partial(sqlite3.connect, str(db_path)),
+        table="notes",
+        server_side_cursor=True,
+    )
+    connection = MagicMock()
+    reader._cursor(connection)
+    connection.cursor.assert_called_once_with(name=SERVER_CURSOR_NAME)
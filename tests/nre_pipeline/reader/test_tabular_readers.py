@@ -0,0 +1,100 @@
+import csv
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from nre_pipeline.models import Document
+from nre_pipeline.reader import CsvReader, JsonlReader, ParquetReader
+
+NUM_ROWS = 5000
+WORDS = ["patient", "denies", "chest", "pain", "fever", "history", "of", "the"]
+READERS = {".jsonl": JsonlReader, ".csv": CsvReader, ".parquet": ParquetReader}
+
+
+@pytest.fixture(autouse=True)
+def batch_env(monkeypatch):
+    monkeypatch.setenv("DOCUMENT_BATCH_SIZE", "1000")
+    monkeypatch.setenv("INQUEUE_MAX_DOCBATCH_COUNT", "10")
+
+
+def build_rows(num_rows: int) -> List[Dict[str, Any]]:
+    rng = random.Random(0)
+    return [
+        {
+            "id": f"note_{idx:08d}",
+            "site": idx % 17,
+            "body": " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 400))),
+        }
+        for idx in range(num_rows)
+    ]
+
+
+def write_export(path: Path, rows: List[Dict[str, Any]]) -> None:
+    if path.suffix == ".jsonl":
+        with open(path, "w") as fh:
+            for row in rows:
+                fh.write(json.dumps(row) + "\n")
+    elif path.suffix == ".csv":
+        with open(path, "w", newline="") as fh:
+            writer = csv.DictWriter(fh, ["id", "site", "body"])
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        pq.write_table(pa.Table.from_pylist(rows), path, row_group_size=500)
+
+
+def read_documents(
+    manager, suffix: str, path: Path, shard_index: int = 0, num_shards: int = 1
+) -> List[Document]:
+    reader = READERS[suffix].create(
+        manager=manager,
+        input_paths=str(path),
+        note_id_column="id",
+        text_column="body",
+        metadata_columns=["site"],
+        shard_index=shard_index,
+        num_shards=num_shards,
+    )
+    # Iterate in this process; no queue or processors involved
+    return [doc for batch in reader._iter() for doc in batch]
+
+
+@pytest.mark.parametrize("suffix", list(READERS))
+@pytest.mark.parametrize("num_shards", [1, 4])
+def test_shards_hold_every_row_once(manager, tmp_path, suffix, num_shards):
+    rows = build_rows(NUM_ROWS)
+    path = tmp_path / f"notes{suffix}"
+    write_export(path, rows)
+
+    documents = [
+        doc
+        for shard_index in range(num_shards)
+        for doc in read_documents(manager, suffix, path, shard_index, num_shards)
+    ]
+    note_ids = [doc.note_id for doc in documents]
+    assert len(note_ids) == len(set(note_ids)) == NUM_ROWS
+    by_id = {doc.note_id: doc for doc in documents}
+    for row in rows:
+        doc = by_id[row["id"]]
+        assert doc.text == row["body"]
+        assert doc.valid
+        # CSV values are read back as strings
+        assert str(doc.metadata["site"]) == str(row["site"])
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".parquet"])
+def test_null_text_is_invalid(manager, tmp_path, suffix):
+    rows = build_rows(3)
+    rows[1]["body"] = None
+    path = tmp_path / f"notes{suffix}"
+    write_export(path, rows)
+
+    documents = read_documents(manager, suffix, path)
+    assert [doc.note_id for doc in documents] == [row["id"] for row in rows]
+    assert [doc.valid for doc in documents] == [True, False, True]
+    assert documents[1].text == ""
@@ -0,0 +1,148 @@
+import gzip
+import io
+import sqlite3
+from collections import Counter
+from pathlib import Path
+from typing import List, Tuple
+
+import pyarrow.parquet as pq
+import pytest
+
+from nre_pipeline.processor.noop_processor import NoOpProcessor
+from nre_pipeline.reader._filesystem_reader import FileSystemReader
+from nre_pipeline.writer.database._sqlite_writer import SQLiteNLPWriter
+from nre_pipeline.writer.filesystem._csv_writer import CSVWriter
+from nre_pipeline.writer.filesystem._parquet_writer import ParquetWriter
+
+NUM_DOCS = 2000
+NUM_WORKERS = 4
+NUM_SHARDS = 4
+
+
+@pytest.fixture(autouse=True)
+def batch_env(monkeypatch):
+    monkeypatch.setenv("DOCUMENT_BATCH_SIZE", "100")
+    monkeypatch.setenv("INQUEUE_MAX_DOCBATCH_COUNT", "10")
+    monkeypatch.setenv("OUTQUEUE_MAX_DOCBATCH_COUNT", "1000")
+    monkeypatch.setenv("NUMBER_DOCS_TO_WRITE_BEFORE_YIELD", "1000")
+
+
+@pytest.fixture()
+def input_path(synthetic_corpus) -> Path:
+    return synthetic_corpus(NUM_DOCS)
+
+
+def run_pipeline(
+    manager, writer_type, num_shards: int, input_path: Path, output_path: Path, **writer_options
+) -> Tuple[int, str]:
+    output_path.mkdir()
+    reader: FileSystemReader = FileSystemReader.create(
+        manager=manager,
+        input_paths=input_path,
+        allowed_extensions=[".txt"],
+    )
+    processors, outqueue, process_counter = NoOpProcessor.create(
+        manager,
+        num_workers=NUM_WORKERS,
+        inqueue=reader.inqueue,
+        num_readers=reader.num_readers,
+        num_writer_shards=num_shards,
+    )
+    writer_config = {
+        "outqueue": outqueue,
+        "process_counter": process_counter,
+        "output_path": str(output_path),
+        **writer_options,
+    }
+    if num_shards == 1:
+        writers = [writer_type.create(manager, **writer_config)]
+    else:
+        writers = writer_type.create_shards(manager, **writer_config)
+
+    reader.start()
+    for p in processors:
+        p.start()
+    for w in writers:
+        w.start()
+    reader.join()
+    for p in processors:
+        p.join()
+    for w in writers:
+        w.join()
+
+    if num_shards == 1:
+        return writers[0].total_written.get(), writers[0].output_path
+    return writers[0].total_written.get(), writer_type.merge_shards(writers)
+
+
+def read_csv_lines(path: str, compression: str) -> Tuple[List[bytes], Counter]:
+    """Get the header lines and the counted data lines of a CSV output."""
+    if compression == "gzip":
+        fh = gzip.open(path, "rb")
+    elif compression == "zstd":
+        import zstandard
+
+        fh = io.BufferedReader(zstandard.open(path, "rb"))
+    else:
+        fh = open(path, "rb")
+    with fh:
+        lines = fh.read().splitlines()
+    headers = [line for line in lines if line.startswith(b"note_id")]
+    return headers, Counter(line for line in lines if not line.startswith(b"note_id"))
+
+
+def sqlite_note_ids(path: str) -> Counter:
+    with sqlite3.connect(path) as connection:
+        tables = [
+            row[0]
+            for row in connection.execute(
+                "SELECT name FROM sqlite_master "
+                "WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+            )
+        ]
+        return Counter(
+            row[0]
+            for table in tables
+            for row in connection.execute(f"SELECT note_id FROM {table}")
+        )
+
+
+def parquet_note_ids(path: str) -> Counter:
+    return Counter(pq.read_table(path, columns=["note_id"]).column("note_id").to_pylist())
+
+
+@pytest.mark.parametrize(
+    "writer_type, read_note_ids",
+    [(SQLiteNLPWriter, sqlite_note_ids), (ParquetWriter, parquet_note_ids)],
+)
+def test_merged_shards_hold_every_result(manager, tmp_path, input_path, writer_type, read_note_ids):
+    single_written, single_output = run_pipeline(
+        manager, writer_type, 1, input_path, tmp_path / "single"
+    )
+    sharded_written, merged_output = run_pipeline(
+        manager, writer_type, NUM_SHARDS, input_path, tmp_path / "sharded"
+    )
+    assert sharded_written == single_written
+    merged_note_ids = read_note_ids(merged_output)
+    assert merged_note_ids == read_note_ids(single_output)
+    assert len(merged_note_ids) == NUM_DOCS
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip", "zstd"])
+def test_merged_csv_has_one_header(manager, tmp_path, input_path, compression):
+    _, single_output = run_pipeline(
+        manager, CSVWriter, 1, input_path, tmp_path / "single", compression=compression
+    )
+    _, merged_output = run_pipeline(
+        manager,
+        CSVWriter,
+        NUM_SHARDS,
+        input_path,
+        tmp_path / "sharded",
+        compression=compression,
+    )
+    single_headers, single_rows = read_csv_lines(single_output, compression)
+    merged_headers, merged_rows = read_csv_lines(merged_output, compression)
+    assert len(merged_headers) == 1
+    assert merged_headers == single_headers
+    assert merged_rows == single_rows